@@ -1,4 +1,5 @@
 import os
+import re
 from logging.config import fileConfig
 
 from alembic import context
@@ -7,10 +8,19 @@ from sqlalchemy import engine_from_config
 from sqlalchemy import pool
 
 from src.models.base import Base  # Import the Base from your models
+from src.models.contact import Contact  # noqa
+from src.models.ens_label import EnsLabel  # noqa
+from src.models.indexer_checkpoint import IndexerCheckpoint  # noqa
+from src.models.registration_job import RegistrationJob  # noqa
+from src.models.rollup_active_user import RollupActiveUser  # noqa
+from src.models.scheduled_job import ScheduledJob  # noqa
 from src.models.transaction import Transaction  # noqa
+from src.models.transaction_hash import TransactionHash  # noqa
+from src.models.transaction_rollup import TransactionRollup  # noqa
 
 # Import all models that should be included in migrations
 from src.models.user import User  # noqa
+from src.models.webhook_delivery import WebhookDelivery  # noqa
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -18,7 +28,10 @@ config = context.config
 
 load_dotenv()
 
-DATABASE_URL = os.path.expandvars(os.getenv("DATABASE_URL", ""))
+# Migrations bypass PgBouncer when there is one
+DATABASE_URL = os.path.expandvars(
+    os.getenv("DATABASE_DIRECT_URL") or os.getenv("DATABASE_URL", "")
+)
 config.set_main_option("sqlalchemy.url", DATABASE_URL)
 
 # Interpret the config file for Python logging.
@@ -30,6 +43,14 @@ if config.config_file_name is not None:
 # for 'autogenerate' support
 target_metadata = Base.metadata
 
+# Monthly partitions of the transactions table, managed by src/services/partitions.py
+PARTITION_PATTERN = re.compile(r"^transactions_y\d{4}m\d{2}$")
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    return not (type_ == "table" and reflected and PARTITION_PATTERN.match(name))
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -54,6 +75,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -74,7 +96,11 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+        )
 
         with context.begin_transaction():
             context.run_migrations()
@@ -0,0 +1,37 @@
+"""Integer amounts
+
+Revision ID: 5b20f6e8c931
+Revises: c4e9a0b7d213
+Create Date: 2026-10-19 16:31:58.017446
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b20f6e8c931'
+down_revision: Union[str, None] = 'c4e9a0b7d213'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Amounts were stored in USDC, they are now stored in base units (6 decimals)
+    op.alter_column('transactions', 'amount',
+               existing_type=sa.Float(),
+               type_=sa.BigInteger(),
+               existing_nullable=False,
+               postgresql_using='round(amount * 1000000)::bigint')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column('transactions', 'amount',
+               existing_type=sa.BigInteger(),
+               type_=sa.Float(),
+               existing_nullable=False,
+               postgresql_using='amount / 1000000.0')
@@ -0,0 +1,123 @@
+"""Partition transactions by month
+
+Revision ID: e6a2c9d04f18
+Revises: 8d1f3b6a4e27
+Create Date: 2026-10-19 20:02:47.201935
+
+"""
+from datetime import date, datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6a2c9d04f18'
+down_revision: Union[str, None] = '8d1f3b6a4e27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Partitions created ahead of the current month, the application keeps this window afterwards
+PARTITION_MONTHS_AHEAD = 3
+
+
+def next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def create_partitions(first: date, last: date) -> None:
+    month = first
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE transactions_y{month.year}m{month.month:02d} PARTITION OF transactions_partitioned "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month(month).isoformat()}')"
+        )
+        month = next_month(month)
+
+
+def create_indexes_and_constraints() -> None:
+    op.create_foreign_key(None, 'transactions', 'users', ['receiver_username'], ['username'])
+    op.create_foreign_key(None, 'transactions', 'users', ['sender_username'], ['username'])
+    op.create_index(op.f('ix_transactions_receiver_username'), 'transactions', ['receiver_username'], unique=False)
+    op.create_index(op.f('ix_transactions_sender_username'), 'transactions', ['sender_username'], unique=False)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Partitioned tables can only have unique constraints including the partition key,
+    # so the uniqueness of the hashes is enforced by a separate table
+    op.create_table('transaction_hashes',
+    sa.Column('transaction_hash', sa.String(), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(), nullable=False),
+    sa.PrimaryKeyConstraint('transaction_hash')
+    )
+    op.execute(
+        "INSERT INTO transaction_hashes (transaction_hash, created_at) "
+        "SELECT transaction_hash, created_at FROM transactions"
+    )
+
+    op.create_table('transactions_partitioned',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('receiver_username', sa.String(), nullable=False),
+    sa.Column('sender_username', sa.String(), nullable=False),
+    sa.Column('amount', sa.BigInteger(), nullable=False),
+    sa.Column('type', sa.String(), nullable=False),
+    sa.Column('transaction_hash', sa.String(), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(), nullable=False),
+    postgresql_partition_by='RANGE (created_at)'
+    )
+
+    today = datetime.utcnow().date().replace(day=1)
+    oldest = op.get_bind().execute(sa.text("SELECT min(created_at) FROM transactions")).scalar()
+    first = min(oldest.date().replace(day=1), today) if oldest is not None else today
+    last = today
+    for _ in range(PARTITION_MONTHS_AHEAD):
+        last = next_month(last)
+    create_partitions(first, last)
+
+    op.execute(
+        "INSERT INTO transactions_partitioned "
+        "SELECT id, receiver_username, sender_username, amount, type, transaction_hash, created_at FROM transactions"
+    )
+
+    # Keep the id sequence, it would be dropped with the old table
+    op.execute("ALTER SEQUENCE transactions_id_seq OWNED BY NONE")
+    op.drop_table('transactions')
+    op.rename_table('transactions_partitioned', 'transactions')
+    op.execute("ALTER TABLE transactions ALTER COLUMN id SET DEFAULT nextval('transactions_id_seq')")
+    op.execute("ALTER SEQUENCE transactions_id_seq OWNED BY transactions.id")
+
+    op.create_primary_key('transactions_pkey', 'transactions', ['id', 'created_at'])
+    create_indexes_and_constraints()
+    op.create_index(op.f('ix_transactions_transaction_hash'), 'transactions', ['transaction_hash'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema, the archived partitions are not restored."""
+    op.create_table('transactions_unpartitioned',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('receiver_username', sa.String(), nullable=False),
+    sa.Column('sender_username', sa.String(), nullable=False),
+    sa.Column('amount', sa.BigInteger(), nullable=False),
+    sa.Column('type', sa.String(), nullable=False),
+    sa.Column('transaction_hash', sa.String(), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(), nullable=False)
+    )
+    op.execute(
+        "INSERT INTO transactions_unpartitioned "
+        "SELECT id, receiver_username, sender_username, amount, type, transaction_hash, created_at FROM transactions"
+    )
+
+    op.execute("ALTER SEQUENCE transactions_id_seq OWNED BY NONE")
+    # Drops the partitions as well
+    op.drop_table('transactions')
+    op.rename_table('transactions_unpartitioned', 'transactions')
+    op.execute("ALTER TABLE transactions ALTER COLUMN id SET DEFAULT nextval('transactions_id_seq')")
+    op.execute("ALTER SEQUENCE transactions_id_seq OWNED BY transactions.id")
+
+    op.create_primary_key('transactions_pkey', 'transactions', ['id'])
+    op.create_unique_constraint('transactions_transaction_hash_key', 'transactions', ['transaction_hash'])
+    create_indexes_and_constraints()
+
+    op.drop_table('transaction_hashes')
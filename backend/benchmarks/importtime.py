@@ -0,0 +1,49 @@
+"""
+Report the time spent importing the application, as a cold start would.
+
+Runs `python -X importtime` on a fresh interpreter and prints the total along with the
+modules that have the highest cumulative import time.
+
+Usage (from the backend directory): python benchmarks/importtime.py [module] [--top N]
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def measure(module: str) -> list[tuple[int, int, str]]:
+    """Return the (cumulative microseconds, depth, module) of every import."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    imports = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            imports.append((int(match[2]), len(match[3]) // 2, match[4]))
+    return imports
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("module", nargs="?", default="src.main")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    imports = measure(args.module)
+    total = sum(cumulative for cumulative, depth, _ in imports if depth == 0)
+    print(f"Importing {args.module}: {total / 1000:.0f} ms\n")
+    print(f"{'cumulative (ms)':>16}  module")
+    for cumulative, _, name in sorted(imports, reverse=True)[: args.top]:
+        print(f"{cumulative / 1000:>16.1f}  {name}")
+
+
+if __name__ == "__main__":
+    main()
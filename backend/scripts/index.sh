@@ -0,0 +1,3 @@
+# Backfill the transactions from the PaymentCompleted events
+source .env
+python -m src.services.indexer
\ No newline at end of file
@@ -0,0 +1,3 @@
+# Create the upcoming transactions partitions and archive the old ones, to run monthly
+source .env
+python -m src.services.partitions
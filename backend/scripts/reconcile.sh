@@ -0,0 +1,3 @@
+# Check the transactions of the last LEDGER_RECONCILE_WINDOW_HOURS against the chain events and insert the missing ones
+source .env
+python -m src.services.reconciliation
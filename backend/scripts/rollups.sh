@@ -0,0 +1,3 @@
+# Recompute the analytics rollups from the transactions in the database
+source .env
+python -m src.services.rollups
@@ -13,17 +13,73 @@ class _Config:
     CURVEGRID_ENS_REGISTRY_CONTRACT_LABEL: str
     CURVEGRID_ENS_REGISTRY_CONTRACT_ADDRESS_ALIAS: str
     CURVEGRID_WEBHOOK_SECRET: str
+    CURVEGRID_PAYMENT_CONTRACT_LABEL: str
+    CURVEGRID_INDEXER_BATCH_SIZE: int
+    CURVEGRID_USDC_CONTRACT_LABEL: str | None
+
+    ENS_READ_BACKEND: str
+    ETHEREUM_RPC_URL: str | None
+    ETHEREUM_RPC_BATCH_SIZE: int
+    ENS_REGISTRAR_CONTRACT_ADDRESS: str | None
+    ENS_REGISTRY_CONTRACT_ADDRESS: str | None
 
     LOG_LEVEL: int
     LOG_FILE: str | None
 
     DATABASE_URL: str
+    DATABASE_POOL_SIZE: int
+    DATABASE_MAX_OVERFLOW: int
+    DATABASE_POOL_TIMEOUT: int
+    DATABASE_POOL_RECYCLE_SECONDS: int
+    DATABASE_POOL_PRE_PING: bool
+    DATABASE_PGBOUNCER: bool
+    DATABASE_DIRECT_URL: str | None
+    DATABASE_REPLICA_URLS: list[str]
+    REPLICA_HEALTH_CHECK_SECONDS: int
+    REPLICA_MAX_LAG_SECONDS: float
+    REPLICA_STICKY_SECONDS: int
+    TRANSACTIONS_HOT_MONTHS: int
+    TRANSACTIONS_ARCHIVE_DIR: str
+
+    SERVER_HOST: str
+    SERVER_PORT: int
+    WEB_CONCURRENCY: int | None
+    FORWARDED_ALLOW_IPS: str
+    REALTIME_POSTGRES_BRIDGE: bool
+    RATE_LIMIT_ENABLED: bool
+    RATE_LIMIT_IP_PER_MINUTE: int
+    RATE_LIMIT_ADDRESS_PER_MINUTE: int
+    RATE_LIMIT_REDIS_URL: str | None
+    LOAD_SHED_LOOP_LAG_MS: int
+    LOAD_SHED_POOL_WAIT_MS: int
+    LOOP_BLOCKING_THRESHOLD_MS: int
+    LOOP_MONITOR_DEBUG: bool
+    PROFILING_ENABLED: bool
+    PROFILE_SAMPLE_RATE: float
+    PROFILE_DIR: str
+    PROFILE_MAX_FILES: int
+    PROFILE_MAX_AGE_HOURS: int
+    TRACING_ENABLED: bool
+    TRACE_SAMPLE_RATE: float
+    TRACE_FILE: str | None
+    TRACE_OTLP_URL: str | None
 
     JWT_SECRET: str
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int
+    ADMIN_ADDRESSES: set[str]
     IS_DEVELOPMENT: bool
     PINATA_JWT: str
     THIRDWEB_WEBHOOK_SECRET: str
+    SCHEDULER_ENABLED: bool
+    AVATAR_RECONCILE_INTERVAL_SECONDS: int
+    AVATAR_WARM_INTERVAL_SECONDS: int
+    AVATAR_WARM_ACTIVE_HOURS: int
+    LEDGER_INDEX_INTERVAL_SECONDS: int
+    LEDGER_RECONCILE_INTERVAL_SECONDS: int
+    LEDGER_RECONCILE_WINDOW_HOURS: int
+    LEDGER_TOPUP_SENDER_ADDRESSES: set[str]
+    ROLLUP_REFRESH_INTERVAL_SECONDS: int
+    REGISTRATION_WORKERS: int
 
     def __init__(self):
         load_dotenv()
@@ -43,6 +99,20 @@ class _Config:
             "CURVEGRID_ENS_REGISTRY_CONTRACT_ADDRESS_ALIAS"
         )
         self.CURVEGRID_WEBHOOK_SECRET = os.getenv("CURVEGRID_WEBHOOK_SECRET")
+        self.CURVEGRID_PAYMENT_CONTRACT_LABEL = os.getenv(
+            "CURVEGRID_PAYMENT_CONTRACT_LABEL"
+        )
+        self.CURVEGRID_INDEXER_BATCH_SIZE = int(
+            os.getenv("CURVEGRID_INDEXER_BATCH_SIZE", "1000")
+        )
+        self.CURVEGRID_USDC_CONTRACT_LABEL = os.getenv("CURVEGRID_USDC_CONTRACT_LABEL") or None
+
+        # ENS reads go through Curvegrid by default, or straight to an RPC node with "rpc"
+        self.ENS_READ_BACKEND = (os.getenv("ENS_READ_BACKEND") or "curvegrid").lower()
+        self.ETHEREUM_RPC_URL = os.getenv("ETHEREUM_RPC_URL") or None
+        self.ETHEREUM_RPC_BATCH_SIZE = int(os.getenv("ETHEREUM_RPC_BATCH_SIZE") or "100")
+        self.ENS_REGISTRAR_CONTRACT_ADDRESS = os.getenv("ENS_REGISTRAR_CONTRACT_ADDRESS") or None
+        self.ENS_REGISTRY_CONTRACT_ADDRESS = os.getenv("ENS_REGISTRY_CONTRACT_ADDRESS") or None
 
         # Configure logging
         log_level_str = os.getenv("LOG_LEVEL", "INFO").upper()
@@ -50,14 +120,90 @@ class _Config:
         self.LOG_FILE = os.getenv("LOG_FILE", None)
 
         self.DATABASE_URL = os.path.expandvars(os.getenv("DATABASE_URL", ""))
+        self.DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE") or "5")
+        self.DATABASE_MAX_OVERFLOW = int(os.getenv("DATABASE_MAX_OVERFLOW") or "10")
+        self.DATABASE_POOL_TIMEOUT = int(os.getenv("DATABASE_POOL_TIMEOUT") or "10")
+        self.DATABASE_POOL_RECYCLE_SECONDS = int(
+            os.getenv("DATABASE_POOL_RECYCLE_SECONDS") or "1800"
+        )
+        self.DATABASE_POOL_PRE_PING = (
+            os.getenv("DATABASE_POOL_PRE_PING", "True").lower() == "true"
+        )
+        self.DATABASE_PGBOUNCER = os.getenv("DATABASE_PGBOUNCER", "False").lower() == "true"
+        self.DATABASE_DIRECT_URL = os.path.expandvars(os.getenv("DATABASE_DIRECT_URL", "")) or None
+        self.DATABASE_REPLICA_URLS = [
+            os.path.expandvars(url.strip())
+            for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",")
+            if url.strip()
+        ]
+        self.REPLICA_HEALTH_CHECK_SECONDS = int(os.getenv("REPLICA_HEALTH_CHECK_SECONDS") or "10")
+        self.REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS") or "5")
+        self.REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS") or "10")
+        self.TRANSACTIONS_HOT_MONTHS = int(os.getenv("TRANSACTIONS_HOT_MONTHS") or "12")
+        self.TRANSACTIONS_ARCHIVE_DIR = os.getenv("TRANSACTIONS_ARCHIVE_DIR") or "archive"
+
+        self.SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+        self.SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+        web_concurrency = os.getenv("WEB_CONCURRENCY")
+        self.WEB_CONCURRENCY = int(web_concurrency) if web_concurrency else None
+        self.FORWARDED_ALLOW_IPS = os.getenv("FORWARDED_ALLOW_IPS") or "127.0.0.1"
+        self.REALTIME_POSTGRES_BRIDGE = (
+            os.getenv("REALTIME_POSTGRES_BRIDGE", "True").lower() == "true"
+        )
+        self.RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "True").lower() == "true"
+        self.RATE_LIMIT_IP_PER_MINUTE = int(os.getenv("RATE_LIMIT_IP_PER_MINUTE") or "300")
+        self.RATE_LIMIT_ADDRESS_PER_MINUTE = int(
+            os.getenv("RATE_LIMIT_ADDRESS_PER_MINUTE") or "300"
+        )
+        self.RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL") or None
+        self.LOAD_SHED_LOOP_LAG_MS = int(os.getenv("LOAD_SHED_LOOP_LAG_MS") or "200")
+        self.LOAD_SHED_POOL_WAIT_MS = int(os.getenv("LOAD_SHED_POOL_WAIT_MS") or "500")
+        self.LOOP_BLOCKING_THRESHOLD_MS = int(os.getenv("LOOP_BLOCKING_THRESHOLD_MS") or "100")
+        self.LOOP_MONITOR_DEBUG = os.getenv("LOOP_MONITOR_DEBUG", "False").lower() == "true"
+        self.PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "False").lower() == "true"
+        self.PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE") or "0")
+        self.PROFILE_DIR = os.getenv("PROFILE_DIR") or "profiles"
+        self.PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES") or "100")
+        self.PROFILE_MAX_AGE_HOURS = int(os.getenv("PROFILE_MAX_AGE_HOURS") or "72")
+        self.TRACING_ENABLED = os.getenv("TRACING_ENABLED", "False").lower() == "true"
+        self.TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE") or "1")
+        self.TRACE_FILE = os.getenv("TRACE_FILE") or None
+        self.TRACE_OTLP_URL = (os.getenv("TRACE_OTLP_URL") or "").rstrip("/") or None
 
         self.JWT_SECRET = os.getenv("JWT_SECRET")
         self.JWT_ACCESS_TOKEN_EXPIRE_MINUTES = int(
             os.getenv("JWT_ACCESS_TOKEN_EXPIRE_MINUTES")
         )
+        self.ADMIN_ADDRESSES = {
+            address.strip().lower()
+            for address in os.getenv("ADMIN_ADDRESSES", "").split(",")
+            if address.strip()
+        }
         self.IS_DEVELOPMENT = os.getenv("IS_DEVELOPMENT", "False").lower() == "true"
         self.PINATA_JWT = os.getenv("PINATA_JWT")
         self.THIRDWEB_WEBHOOK_SECRET = os.getenv("THIRDWEB_WEBHOOK_SECRET")
+        self.SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "True").lower() == "true"
+        self.AVATAR_RECONCILE_INTERVAL_SECONDS = int(
+            os.getenv("AVATAR_RECONCILE_INTERVAL_SECONDS") or "3600"
+        )
+        self.AVATAR_WARM_INTERVAL_SECONDS = int(os.getenv("AVATAR_WARM_INTERVAL_SECONDS") or "300")
+        self.AVATAR_WARM_ACTIVE_HOURS = int(os.getenv("AVATAR_WARM_ACTIVE_HOURS") or "24")
+        self.LEDGER_INDEX_INTERVAL_SECONDS = int(
+            os.getenv("LEDGER_INDEX_INTERVAL_SECONDS") or "600"
+        )
+        self.LEDGER_RECONCILE_INTERVAL_SECONDS = int(
+            os.getenv("LEDGER_RECONCILE_INTERVAL_SECONDS") or "3600"
+        )
+        self.LEDGER_RECONCILE_WINDOW_HOURS = int(os.getenv("LEDGER_RECONCILE_WINDOW_HOURS") or "48")
+        self.LEDGER_TOPUP_SENDER_ADDRESSES = {
+            address.strip().lower()
+            for address in os.getenv("LEDGER_TOPUP_SENDER_ADDRESSES", "").split(",")
+            if address.strip()
+        }
+        self.ROLLUP_REFRESH_INTERVAL_SECONDS = int(
+            os.getenv("ROLLUP_REFRESH_INTERVAL_SECONDS") or "86400"
+        )
+        self.REGISTRATION_WORKERS = int(os.getenv("REGISTRATION_WORKERS") or "1")
 
 
 config = _Config()
@@ -0,0 +1,18 @@
+from datetime import datetime
+from typing import Literal
+
+from pydantic import BaseModel
+
+
+class AnalyticsBucket(BaseModel):
+    bucket: datetime
+    p2p_count: int
+    p2p_volume: float
+    topup_count: int
+    topup_volume: float
+    active_users: int
+
+
+class AnalyticsResponse(BaseModel):
+    granularity: Literal["hour", "day"]
+    buckets: list[AnalyticsBucket]
@@ -1,3 +1,6 @@
+from datetime import datetime
+from typing import Literal
+
 from pydantic import BaseModel
 
 
@@ -24,7 +27,18 @@ class AuthRegisterRequest(BaseModel):
 
 
 class AuthRegisterResponse(BaseModel):
-    success: bool
+    success: bool  # The registration was accepted, its outcome is given by the job status
+    job_id: str
+    status: Literal["pending", "completed", "failed"]
+
+
+class AuthRegisterStatusResponse(BaseModel):
+    job_id: str
+    username: str
+    status: Literal["pending", "completed", "failed"]
+    error: str | None = None
+    created_at: datetime
+    updated_at: datetime
 
 
 class AuthCheckUsernameResponse(BaseModel):
@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from pydantic import BaseModel, Field
 
 
@@ -24,6 +26,18 @@ class CurvegridPaymentWebhook(BaseModel):
     data: Data
 
 
+class EventTransactionData(TransactionData):
+    blockNumber: int
+
+
+class CurvegridEvent(BaseModel):
+    """Event as returned by the Curvegrid events API."""
+
+    event: EventData
+    transaction: EventTransactionData
+    triggeredAt: datetime | None = None  # Time of the block of the event
+
+
 class WebhookCreateRequest(BaseModel):
     url: str = Field(..., description="The URL to send webhook events to")
     label: str = Field(..., description="A human-readable label for the webhook")
@@ -0,0 +1,44 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class BlockingEvent(BaseModel):
+    detected_at: datetime
+    duration_ms: float
+    callback: str | None = None  # The slow callback reported by asyncio, when it could tell
+    stack: list[str]  # Where the event loop thread was while it was blocked, innermost last
+
+
+class BlockingReport(BaseModel):
+    pid: int
+    debug: bool  # Stacks are only recorded in debug mode
+    threshold_ms: float
+    lag_ms: float  # Recent average
+    max_lag_ms: float
+    stalls: int  # Lags above the threshold since the worker started
+    lag_histogram: dict[str, int]  # Number of lag measures by upper bound in ms
+    events: list[BlockingEvent]  # Most recent first
+
+
+class PoolReport(BaseModel):
+    pid: int
+    size: int
+    checked_out: int
+    idle: int
+    overflow: int  # Connections opened above the pool size
+    max_overflow: int
+    timeout_s: int
+    wait_ms: float  # Recent average of the checkout waits
+    max_wait_ms: float
+    checkouts: int
+    timeouts: int  # Checkouts that gave up waiting for a connection
+    wait_histogram: dict[str, int]  # Number of checkouts by upper bound of their wait in ms
+
+
+class ScheduledJobReport(BaseModel):
+    name: str
+    last_started_at: datetime
+    last_finished_at: datetime | None  # Before the start while the job runs
+    last_duration_s: float | None
+    last_error: str | None  # None if the last run succeeded
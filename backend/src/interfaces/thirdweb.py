@@ -30,3 +30,12 @@ class ThirdwebBuyWithFiatWebhook(BaseModel):
     status: Literal["ON_RAMP_TRANSFER_COMPLETED"]
     toAddress: str
     purchaseData: ThirdwebPurchaseData
+
+
+class ThirdwebWebhookData(BaseModel):
+    buyWithCryptoStatus: ThirdwebBuyWithCryptoWebhook | None = None
+    buyWithFiatStatus: ThirdwebBuyWithFiatWebhook | None = None
+
+
+class ThirdwebWebhookPayload(BaseModel):
+    data: ThirdwebWebhookData
@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from pydantic import BaseModel
 
 
@@ -13,3 +15,20 @@ class SearchUsersResponse(BaseModel):
     """Response model for user search."""
 
     users: list[UserSearchResult]
+
+
+class UserContact(BaseModel):
+    """Model representing a frequent counterparty of the user."""
+
+    username: str
+    address: str
+    avatar_url: str
+    transaction_count: int
+    last_transaction_at: datetime
+    score: float  # Number of transactions, older ones counting less
+
+
+class GetContactsResponse(BaseModel):
+    """Response model for the user's contacts."""
+
+    contacts: list[UserContact]
@@ -1,13 +1,66 @@
-from fastapi import FastAPI
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from src.config import config
+from src.models.base import dispose_db, init_db, replica_set, request_session
+from src.routes.analytics import router as analytics_router
 from src.routes.auth import router as auth_router
 from src.routes.curvegrid import router as curvegrid_router
+from src.routes.debug import router as debug_router
 from src.routes.thirdweb import router as thirdweb_router
 from src.routes.user import router as user_router
+from src.services.load_shedding import load_shedder
+from src.services.loop_monitor import loop_monitor
+from src.services.partitions import transaction_partition_service
+from src.services.profiling import request_profiler
+from src.services.rate_limit import rate_limiter
+from src.services.realtime import realtime_hub
+from src.services.registration import registration_service
+from src.services.scheduler import scheduler
+from src.services.tracing import span_exporter
+from src.services.user import user_service
+from src.utils.http import http_client
+from src.utils.tracing import trace_request
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # Runs once per worker process: shared clients are created here and reused by all requests
+    init_db()
+    await transaction_partition_service.create_upcoming_partitions()
+    _ = http_client.session
+    await realtime_hub.start()
+    monitor = asyncio.create_task(loop_monitor.run())
+    registration_workers = registration_service.start_workers()
+    scheduled_jobs = scheduler.start()
+    exporter = asyncio.create_task(span_exporter.run()) if config.TRACING_ENABLED else None
+    replica_checks = (
+        asyncio.create_task(replica_set.run_health_checks()) if replica_set.replicas else None
+    )
+    yield
+    if replica_checks is not None:
+        replica_checks.cancel()
+    if exporter is not None:
+        exporter.cancel()
+        await span_exporter.flush()
+    for job in scheduled_jobs:
+        job.cancel()
+    for worker in registration_workers:
+        worker.cancel()
+    monitor.cancel()
+    await realtime_hub.stop()
+    await http_client.close()
+    dispose_db()
 
-app = FastAPI(title="Solva backend")
+
+app = FastAPI(
+    title="Solva backend", lifespan=lifespan, default_response_class=ORJSONResponse
+)
 
 # Add security scheme to OpenAPI documentation
 app.openapi_components = {  # type: ignore
@@ -17,6 +70,66 @@ app.openapi_components = {  # type: ignore
 }
 
 
+# Middlewares run in the reverse order of their declaration
+
+
+@app.middleware("http")
+async def profile_request(request: Request, call_next):
+    # Innermost, so that rejected requests are never profiled
+    if request_profiler.should_profile(request):
+        return await request_profiler.profile(request, call_next)
+    return await call_next(request)
+
+
+# Set after a write, the client reads from the primary until the replicas have caught up
+PRIMARY_COOKIE = "solva_primary_until"
+
+
+@app.middleware("http")
+async def unit_of_work(request: Request, call_next):
+    # The route, its dependencies and the services share a database session and the users they look up
+    try:
+        primary_only = float(request.cookies.get(PRIMARY_COOKIE) or 0) > time.time()
+    except ValueError:
+        primary_only = False
+    with request_session(primary_only) as session, user_service.request_cache():
+        response = await call_next(request)
+    if session.wrote and replica_set.replicas:
+        response.set_cookie(
+            key=PRIMARY_COOKIE,
+            value=str(int(time.time()) + config.REPLICA_STICKY_SECONDS),
+            httponly=True,
+            max_age=config.REPLICA_STICKY_SECONDS,
+            samesite="none",
+            secure=True,
+        )
+    return response
+
+
+@app.middleware("http")
+async def limit_rate(request: Request, call_next):
+    rejection = await rate_limiter.check(request)
+    return rejection if rejection is not None else await call_next(request)
+
+
+@app.middleware("http")
+async def shed_load(request: Request, call_next):
+    # Checked first, as rejecting requests must stay cheap when the worker is overloaded
+    rejection = load_shedder.check(request)
+    return rejection if rejection is not None else await call_next(request)
+
+
+async def trace(request: Request, call_next):
+    # Declared after the other middlewares, so that the time they take is part of the trace
+    return await trace_request(request, call_next)
+
+
+# Each HTTP middleware adds a task and stream hop per request, not worth it when nothing is traced
+if config.TRACING_ENABLED:
+    app.middleware("http")(trace)
+
+
+# Outermost, so that rejections have the CORS headers and browsers can read them
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["https://solva.rezar.fr"]
@@ -31,3 +144,5 @@ app.include_router(auth_router)
 app.include_router(user_router)
 app.include_router(thirdweb_router)
 app.include_router(curvegrid_router)
+app.include_router(analytics_router)
+app.include_router(debug_router)
@@ -1,9 +1,358 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base
+import asyncio
+import itertools
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator
+
+from sqlalchemy import Engine, create_engine, event, text
+from sqlalchemy.exc import OperationalError, TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session, declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool, QueuePool
 
 from src.config import config
+from src.utils.logger import setup_logger
+from src.utils.stats import DecayingAverage
+from src.utils.tracing import instrument_engine
+
+logger = setup_logger(__name__)
 
 Base = declarative_base()
-engine = create_engine(config.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Bound to the engine by init_db, which runs in the app lifespan rather than at import time
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+_engine: Engine | None = None
+
+# Upper bounds of the checkout wait histogram, in milliseconds
+POOL_WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 250, 500, 1000, 5000)
+
+WRITE_STATEMENT_PATTERN = re.compile(r"^\s*(INSERT|UPDATE|DELETE)\b", re.IGNORECASE)
+
+# Seconds behind the primary, 0 when the replica has replayed all it received. Servers that
+# aren't replicas, like a second local instance in development, count as up to date.
+REPLICA_LAG_QUERY = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+
+class PoolMetrics:
+    """How long checkouts wait for a connection, opening it included, and how often they time out."""
+
+    def __init__(self):
+        self.wait = DecayingAverage(half_life_seconds=5)
+        self.max_wait = 0.0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_histogram = dict.fromkeys([*map(str, POOL_WAIT_BUCKETS_MS), "+Inf"], 0)
+
+    def record(self, wait: float) -> None:
+        self.wait.record(wait)
+        self.max_wait = max(self.max_wait, wait)
+        self.checkouts += 1
+        wait_ms = wait * 1000
+        bucket = next((str(bound) for bound in POOL_WAIT_BUCKETS_MS if wait_ms <= bound), "+Inf")
+        self.wait_histogram[bucket] += 1
+
+
+pool_metrics = PoolMetrics()
+
+
+class TimedQueuePool(QueuePool):
+    """Queue pool recording how long checkouts wait for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.timeouts += 1
+            logger.error(f"Database pool exhausted: {self.status()}")
+            raise
+        finally:
+            pool_metrics.record(time.perf_counter() - start)
+
+
+def _create_engine(url: str, poolclass: type[QueuePool]) -> Engine:
+    engine = create_engine(
+        url,
+        poolclass=poolclass,
+        pool_size=config.DATABASE_POOL_SIZE,
+        max_overflow=config.DATABASE_MAX_OVERFLOW,
+        pool_timeout=config.DATABASE_POOL_TIMEOUT,
+        # Replaced before the server or a proxy drops them for being idle too long
+        pool_recycle=config.DATABASE_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=config.DATABASE_POOL_PRE_PING,
+    )
+    instrument_engine(engine)
+    return engine
+
+
+def _remember_writes(conn, cursor, statement, parameters, context, executemany) -> None:
+    holder = _request_session.get()
+    if holder is not None and WRITE_STATEMENT_PATTERN.match(statement):
+        holder.wrote = True
+
+
+class Replica:
+    """A read replica, and the result of its last health check."""
+
+    healthy: bool | None
+    lag_seconds: float | None
+
+    def __init__(self, url: str):
+        self.engine = _create_engine(url, QueuePool)
+        self.name = self.engine.url.render_as_string(hide_password=True)
+        self.healthy = None  # Not used until the first health check passes
+        self.lag_seconds = None
+
+
+class ReplicaSet:
+    """
+    Read replicas the read-only sessions are spread over, round-robin.
+
+    Replicas are checked every REPLICA_HEALTH_CHECK_SECONDS, and only the ones that answer and
+    lag less than REPLICA_MAX_LAG_SECONDS behind the primary get reads. Reads go to the primary
+    when none is healthy.
+    """
+
+    replicas: list[Replica]
+
+    def __init__(self):
+        self.replicas = []
+        self._turns = itertools.count()
+
+    def configure(self) -> None:
+        self.replicas = [Replica(url) for url in config.DATABASE_REPLICA_URLS]
+
+    def dispose(self) -> None:
+        for replica in self.replicas:
+            replica.engine.dispose()
+        self.replicas = []
+
+    def pick(self) -> Replica | None:
+        """Next healthy replica in turn, None if there is none."""
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._turns) % len(healthy)]
+
+    def mark_failed(self, replica: Replica, error: Exception) -> None:
+        if replica.healthy is not False:
+            logger.warning(f"Replica {replica.name} failed, reading from the others: {error}")
+        replica.healthy = False
+
+    def check(self) -> None:
+        """Check the replicas, with blocking calls."""
+        for replica in self.replicas:
+            try:
+                with replica.engine.connect() as connection:
+                    lag = float(connection.execute(REPLICA_LAG_QUERY).scalar_one())
+            except Exception as e:
+                self.mark_failed(replica, e)
+                replica.lag_seconds = None
+                continue
+
+            replica.lag_seconds = lag
+            healthy = lag <= config.REPLICA_MAX_LAG_SECONDS
+            if healthy != replica.healthy:
+                if healthy:
+                    logger.info(f"Replica {replica.name} is healthy, lagging {lag:.1f}s")
+                else:
+                    logger.warning(f"Replica {replica.name} lags {lag:.1f}s, reading from the others")
+            replica.healthy = healthy
+
+    async def run_health_checks(self) -> None:
+        """Check the replicas periodically until cancelled."""
+        while True:
+            await asyncio.to_thread(self.check)
+            await asyncio.sleep(config.REPLICA_HEALTH_CHECK_SECONDS)
+
+
+replica_set = ReplicaSet()
+
+
+def init_db() -> Engine:
+    """Create the database engines if needed and bind the sessions to the primary."""
+    global _engine
+    if _engine is None:
+        _engine = _create_engine(config.DATABASE_URL, TimedQueuePool)
+        event.listen(_engine, "before_cursor_execute", _remember_writes)
+        SessionLocal.configure(bind=_engine)
+        replica_set.configure()
+    return _engine
+
+
+def dispose_db() -> None:
+    """Close all the pooled connections."""
+    global _engine
+    if _engine is not None:
+        _engine.dispose()
+        _engine = None
+    replica_set.dispose()
+
+
+def pool_status() -> dict[str, int]:
+    """Connections of the pool: its size, and how many are checked out, idle and in overflow."""
+    pool = init_db().pool
+    if not isinstance(pool, QueuePool):
+        return {}
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+    }
+
+
+def connect_direct() -> Any:
+    """
+    Open a database connection kept out of the pool, for session level features like LISTEN.
+
+    It goes straight to Postgres through DATABASE_DIRECT_URL when set, as a PgBouncer in
+    transaction mode would hand the session over to other clients between transactions.
+
+    Returns:
+        The psycopg2 connection, to be closed by the caller.
+    """
+    if config.DATABASE_DIRECT_URL:
+        engine = create_engine(config.DATABASE_DIRECT_URL, poolclass=NullPool)
+    elif config.DATABASE_PGBOUNCER:
+        raise Exception("DATABASE_DIRECT_URL is required for session level features with PgBouncer")
+    else:
+        engine = init_db()
+    pooled_connection = engine.raw_connection()
+    connection = pooled_connection.driver_connection
+    pooled_connection.detach()
+    return connection
+
+
+class RequestSession:
+    """Database state of a request: its shared session, and whether it wrote."""
+
+    session: Session | None
+    task: asyncio.Task | None
+
+    def __init__(self, primary_only: bool):
+        self.session = None
+        self.task = None
+        self.depth = 0
+        self.closed = False
+        self.primary_only = primary_only  # Reads go to the primary, the client reads its writes
+        self.wrote = False
+
+
+_request_session: ContextVar[RequestSession | None] = ContextVar("request_session", default=None)
+
+
+@contextmanager
+def request_session(primary_only: bool = False) -> Iterator[RequestSession]:
+    """
+    Share a single session between the get_session blocks run until the end of the block,
+    typically a request, and close it at the end.
+
+    Args:
+        primary_only: Whether the read-only blocks should also use the primary.
+
+    Yields:
+        RequestSession: The state of the block, telling if it wrote to the database.
+    """
+    holder = RequestSession(primary_only)
+    token = _request_session.set(holder)
+    try:
+        yield holder
+    finally:
+        _request_session.reset(token)
+        holder.closed = True
+        if holder.session is not None:
+            holder.session.close()
+
+
+def _current_task() -> asyncio.Task | None:
+    try:
+        return asyncio.current_task()
+    except RuntimeError:  # Sync routes and helpers run in threads
+        return None
+
+
+def mark_written() -> None:
+    """Count the request as a write, for writes done on its behalf elsewhere like in a job."""
+    holder = _request_session.get()
+    if holder is not None:
+        holder.wrote = True
+
+
+@contextmanager
+def get_session(read_only: bool = False) -> Iterator[Session]:
+    """
+    Session for a block of database work, the unit of work of the request when there is one.
+
+    Within request_session, the blocks run by the task handling the request share its session,
+    so the objects loaded by one layer are reused by the next. Objects aren't expired on commit,
+    and the transaction of a block is committed when it ends, so that its connection goes back
+    to the pool between blocks rather than being held during outbound calls. Writes are still
+    committed explicitly by the blocks.
+
+    Other tasks and threads, like gathered coroutines and background jobs, get a session of
+    their own for each block, closed at its end.
+
+    Read-only blocks get a session of their own on a replica when one is healthy, unless the
+    request wrote or the client just did, so that users read their own writes.
+
+    Args:
+        read_only: Whether the block only reads, and can be served by a replica.
+
+    Yields:
+        Session: The session to use in the block.
+    """
+    holder = _request_session.get()
+    replica = None
+    if read_only and (holder is None or not (holder.primary_only or holder.wrote)):
+        replica = replica_set.pick()
+    if replica is not None:
+        db = SessionLocal(bind=replica.engine)
+        try:
+            yield db
+        except OperationalError as e:
+            replica_set.mark_failed(replica, e)
+            raise
+        finally:
+            db.close()
+        return
+
+    task = _current_task()
+    if (
+        holder is None
+        or holder.closed
+        or task is None
+        or (holder.task is not None and holder.task is not task)
+    ):
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+        return
+
+    if holder.session is None:
+        holder.session = SessionLocal(expire_on_commit=False)
+        holder.task = task
+    db = holder.session
+    holder.depth += 1
+    try:
+        yield db
+        if holder.depth == 1 and db.in_transaction():
+            db.commit()
+    except BaseException:
+        if holder.depth == 1:
+            db.rollback()
+        raise
+    finally:
+        holder.depth -= 1
@@ -0,0 +1,19 @@
+from datetime import datetime
+
+from sqlalchemy import Double, ForeignKey, Integer, TIMESTAMP
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.models.base import Base
+
+
+class Contact(Base):
+    """A counterparty of a user, ranked by how often and how recently they transacted."""
+
+    __tablename__ = "contacts"
+
+    username: Mapped[str] = mapped_column(ForeignKey("users.username"), primary_key=True)
+    contact_username: Mapped[str] = mapped_column(ForeignKey("users.username"), primary_key=True)
+    # Decayed number of transactions, see src/services/contacts.py
+    score: Mapped[float] = mapped_column(Double, nullable=False, default=0.0)
+    transaction_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_transaction_at: Mapped[datetime] = mapped_column(TIMESTAMP, nullable=False)
@@ -0,0 +1,16 @@
+from datetime import datetime
+
+from sqlalchemy import String, TIMESTAMP
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from src.models.base import Base
+
+
+class EnsLabel(Base):
+    __tablename__ = "ens_labels"
+
+    # keccak256 of the label, as NameRegistered indexes the label string
+    label_hash: Mapped[str] = mapped_column(String, primary_key=True)
+    owner: Mapped[str | None] = mapped_column(String, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(TIMESTAMP, default=func.current_timestamp())
@@ -0,0 +1,19 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Integer, String, TIMESTAMP
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from src.models.base import Base
+
+
+class IndexerCheckpoint(Base):
+    __tablename__ = "indexer_checkpoints"
+
+    name: Mapped[str] = mapped_column(String, primary_key=True)
+    last_block: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    # Number of events already consumed, as the Curvegrid events API is paginated by offset
+    event_offset: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP, default=func.current_timestamp(), onupdate=func.current_timestamp()
+    )
@@ -0,0 +1,41 @@
+from datetime import datetime
+from typing import Literal
+
+from sqlalchemy import Index, String, TIMESTAMP, text
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from src.models.base import Base
+
+RegistrationStatus = Literal["pending", "completed", "failed"]
+
+
+class RegistrationJob(Base):
+    __tablename__ = "registration_jobs"
+    __table_args__ = (
+        # Pending jobs reserve their username, and an address can only register one name at a time
+        Index(
+            "ix_registration_jobs_pending_username",
+            "username",
+            unique=True,
+            postgresql_where=text("status = 'pending'"),
+        ),
+        Index(
+            "ix_registration_jobs_pending_address",
+            "address",
+            unique=True,
+            postgresql_where=text("status = 'pending'"),
+        ),
+    )
+
+    id: Mapped[str] = mapped_column(String, primary_key=True)
+    address: Mapped[str] = mapped_column(String, nullable=False)
+    username: Mapped[str] = mapped_column(String, nullable=False)
+    status: Mapped[RegistrationStatus] = mapped_column(String, nullable=False)
+    error: Mapped[str | None] = mapped_column(String, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(TIMESTAMP, default=func.current_timestamp())
+    # Set while a worker processes the job, other workers retry it once expired
+    leased_until: Mapped[datetime | None] = mapped_column(TIMESTAMP, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP, default=func.current_timestamp(), onupdate=func.clock_timestamp()
+    )
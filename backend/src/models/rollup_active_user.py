@@ -0,0 +1,16 @@
+from datetime import datetime
+
+from sqlalchemy import String, TIMESTAMP
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.models.base import Base
+
+
+class RollupActiveUser(Base):
+    """Users who sent or received a transaction in a time bucket, to count each of them once."""
+
+    __tablename__ = "rollup_active_users"
+
+    granularity: Mapped[str] = mapped_column(String, primary_key=True)  # "hour" or "day"
+    bucket: Mapped[datetime] = mapped_column(TIMESTAMP, primary_key=True)
+    username: Mapped[str] = mapped_column(String, primary_key=True)
@@ -0,0 +1,17 @@
+from datetime import datetime
+
+from sqlalchemy import Float, String, TIMESTAMP, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.models.base import Base
+
+
+class ScheduledJob(Base):
+    __tablename__ = "scheduled_jobs"
+
+    name: Mapped[str] = mapped_column(String, primary_key=True)
+    # Shared by the workers, so that a job runs once per interval whichever worker runs it
+    last_started_at: Mapped[datetime] = mapped_column(TIMESTAMP, nullable=False)
+    last_finished_at: Mapped[datetime | None] = mapped_column(TIMESTAMP, nullable=True)
+    last_duration_seconds: Mapped[float | None] = mapped_column(Float, nullable=True)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import ForeignKey, String, Float, TIMESTAMP
+from sqlalchemy import ForeignKey, String, BigInteger, TIMESTAMP
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 
@@ -9,15 +9,19 @@ from src.models.base import Base
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    # Monthly partitions, created and archived by src/services/partitions.py
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
-    receiver_username: Mapped[str] = mapped_column(ForeignKey("users.username"), nullable=False)
-    sender_username: Mapped[str] = mapped_column(ForeignKey("users.username"), nullable=False)
-    amount: Mapped[float] = mapped_column(Float, nullable=False)
+    receiver_username: Mapped[str] = mapped_column(ForeignKey("users.username"), nullable=False, index=True)
+    sender_username: Mapped[str] = mapped_column(ForeignKey("users.username"), nullable=False, index=True)
+    amount: Mapped[int] = mapped_column(BigInteger, nullable=False)  # In USDC base units (6 decimals)
     type: Mapped[str] = mapped_column(String, nullable=False)  # "topup" or "p2p"
-    transaction_hash: Mapped[str] = mapped_column(String, nullable=False, unique=True)
-    created_at: Mapped[datetime] = mapped_column(TIMESTAMP, default=func.current_timestamp())
+    # Unique across partitions and archives through the transaction_hashes table
+    transaction_hash: Mapped[str] = mapped_column(String, nullable=False, index=True)
+    # Part of the primary key as the partition key
+    created_at: Mapped[datetime] = mapped_column(TIMESTAMP, primary_key=True, default=func.current_timestamp())
 
     # Relationships
     receiver = relationship("User", foreign_keys=[receiver_username], back_populates="received_transactions")
-    sender = relationship("User", foreign_keys=[sender_username], back_populates="sent_transactions")
\ No newline at end of file
+    sender = relationship("User", foreign_keys=[sender_username], back_populates="sent_transactions")
@@ -0,0 +1,15 @@
+from datetime import datetime
+
+from sqlalchemy import String, TIMESTAMP
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.models.base import Base
+
+
+class TransactionHash(Base):
+    """Hashes of all the recorded transactions, including the archived ones."""
+
+    __tablename__ = "transaction_hashes"
+
+    transaction_hash: Mapped[str] = mapped_column(String, primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(TIMESTAMP, nullable=False)  # Same as the transaction's
@@ -0,0 +1,20 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, String, TIMESTAMP
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.models.base import Base
+
+
+class TransactionRollup(Base):
+    """Platform totals per time bucket, maintained as transactions are recorded."""
+
+    __tablename__ = "transaction_rollups"
+
+    granularity: Mapped[str] = mapped_column(String, primary_key=True)  # "hour" or "day"
+    bucket: Mapped[datetime] = mapped_column(TIMESTAMP, primary_key=True)  # Start of the bucket, UTC
+    p2p_count: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    p2p_volume: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)  # In USDC base units
+    topup_count: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    topup_volume: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)  # In USDC base units
+    active_users: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
@@ -19,6 +19,8 @@ class User(Base):
     )
 
     username: Mapped[str] = mapped_column(String, nullable=False, unique=True)
+    # Copy of the ENS avatar text record, None until first resolved
+    avatar_url: Mapped[str | None] = mapped_column(String, nullable=True)
 
     # Relationships with transactions
     sent_transactions = relationship(
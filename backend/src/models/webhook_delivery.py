@@ -0,0 +1,17 @@
+from datetime import datetime
+
+from sqlalchemy import String, TIMESTAMP
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from src.models.base import Base
+
+
+class WebhookDelivery(Base):
+    __tablename__ = "webhook_deliveries"
+
+    provider: Mapped[str] = mapped_column(String, primary_key=True)  # "curvegrid" or "thirdweb"
+    key: Mapped[str] = mapped_column(String, primary_key=True)  # Signature of the delivery
+    created_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP, default=func.current_timestamp(), index=True
+    )
@@ -0,0 +1,59 @@
+from datetime import UTC, datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from src.interfaces.analytics import AnalyticsBucket, AnalyticsResponse
+from src.services.auth import get_admin_address
+from src.services.rollups import BUCKET_SIZES, Granularity, rollup_service, truncate
+from src.utils.logger import setup_logger
+from src.utils.payments import base_units_to_usdc
+from src.utils.tracing import TracedRoute
+
+logger = setup_logger(__name__)
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"], route_class=TracedRoute)
+
+# Number of buckets returned when no start is given, and at most
+DEFAULT_BUCKETS = 30
+MAX_BUCKETS = 2000
+
+
+@router.get("", description="Platform volume and active users per hour or day")
+async def get_analytics(
+    granularity: Granularity = Query("day", description="Size of the buckets"),
+    start: datetime | None = Query(None, description="Start of the range (UTC), included"),
+    end: datetime | None = Query(None, description="End of the range (UTC), excluded, defaults to now"),
+    _admin_address=Depends(get_admin_address),
+) -> AnalyticsResponse:
+    # Buckets are stored in UTC without timezone, like the transactions
+    if end is None:
+        end = truncate(datetime.now(UTC).replace(tzinfo=None), granularity) + BUCKET_SIZES[granularity]
+    elif end.tzinfo is not None:
+        end = end.astimezone(UTC).replace(tzinfo=None)
+    if start is None:
+        start = end - DEFAULT_BUCKETS * BUCKET_SIZES[granularity]
+    elif start.tzinfo is not None:
+        start = start.astimezone(UTC).replace(tzinfo=None)
+
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if (end - start) / BUCKET_SIZES[granularity] > MAX_BUCKETS:
+        raise HTTPException(
+            status_code=400, detail=f"The range can't span more than {MAX_BUCKETS} buckets"
+        )
+
+    rollups = await rollup_service.get_rollups(granularity, start, end)
+    return AnalyticsResponse(
+        granularity=granularity,
+        buckets=[
+            AnalyticsBucket(
+                bucket=rollup.bucket,
+                p2p_count=rollup.p2p_count,
+                p2p_volume=base_units_to_usdc(rollup.p2p_volume),
+                topup_count=rollup.topup_count,
+                topup_volume=base_units_to_usdc(rollup.topup_volume),
+                active_users=rollup.active_users,
+            )
+            for rollup in rollups
+        ],
+    )
@@ -9,18 +9,22 @@ from src.interfaces.auth import (
     AuthMessageResponse,
     AuthRegisterRequest,
     AuthRegisterResponse,
+    AuthRegisterStatusResponse,
     AuthCheckUsernameResponse,
     AuthIsRegisteredResponse,
 )
-from src.services.auth import create_access_token, get_current_address
-from src.services.multibaas import multibaas_service
+from src.models.base import mark_written
+from src.services.auth import create_access_token, get_current_address, is_admin
+from src.services.ens_registry import ens_registry_service
+from src.services.registration import RegistrationConflictError, registration_service
 from src.services.user import user_service
-from src.utils.ethereum import format_eth_address, is_eth_signature_valid
+from src.utils.ethereum import format_eth_address, is_eth_signature_valid, is_signed_by
 from src.utils.logger import setup_logger
+from src.utils.tracing import TracedRoute
 
 logger = setup_logger(__name__)
 
-router = APIRouter(prefix="/auth", tags=["Authentication"])
+router = APIRouter(prefix="/auth", tags=["Authentication"], route_class=TracedRoute)
 
 
 def auth_message(address: str) -> str:
@@ -49,8 +53,15 @@ async def login_with_wallet(
             detail="Invalid signature",
         )
 
+    # Administrators must prove that they signed, the check above lets smart accounts through
+    admin = is_admin(request.address) and await is_signed_by(
+        auth_message(request.address), request.signature, request.address
+    )
+    if is_admin(request.address) and not admin:
+        logger.warning(f"Unverified signature for administrator {request.address}, logged in as a user")
+
     # Create access token
-    access_token = create_access_token(address=request.address)
+    access_token = create_access_token(address=request.address, admin=admin)
 
     # Set the token as an HTTP-only cookie
     response.set_cookie(
@@ -69,40 +80,66 @@ async def login_with_wallet(
 
 @router.post(
     "/register",
-    description="Adds an ENS subname to a user and creates the user in the database",
+    description="Reserves the username and registers the ENS subname and the user in the background",
+    status_code=status.HTTP_202_ACCEPTED,
 )
 async def register_user(
     request: AuthRegisterRequest, user_address=Depends(get_current_address)
 ) -> AuthRegisterResponse:
-    # First check if ENS subname is available
-    is_available = await multibaas_service.is_ens_subname_available(request.username)
-    if not is_available:
+    if await user_service.get_user_by_address(user_address) is not None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username is not available",
+            detail="User is already registered",
         )
 
-    # Register the ENS subname
-    success = await multibaas_service.register_ens_subname(
-        request.username, user_address
-    )
+    # Checked against the local index here, the worker confirms it on-chain before registering
+    if not await ens_registry_service.is_available(request.username):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Username is not available",
+        )
 
-    # If ENS registration was successful, create the user in the database
-    if success:
-        db_success = await user_service.create_user(
-            address=user_address, username=request.username
+    try:
+        job = await registration_service.enqueue(user_address, request.username)
+    except RegistrationConflictError as e:
+        logger.info(f"Registration rejected: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Username is not available",
         )
-        if not db_success:
-            logger.error(f"Failed to create user in database for {user_address}")
-            # We don't want to fail the request if the database insert fails
-            # since the ENS registration was successful
 
-    return AuthRegisterResponse(success=success)
+    return AuthRegisterResponse(success=True, job_id=job.id, status=job.status)
+
+
+@router.get(
+    "/register/status/{job_id}",
+    description="Get the progress of a registration started with /auth/register",
+)
+async def get_registration_status(
+    job_id: str, user_address=Depends(get_current_address)
+) -> AuthRegisterStatusResponse:
+    job = await registration_service.get_job(job_id, user_address)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Registration not found")
+    if job.status == "completed":
+        # The user was written by a worker, the client reads it back from the primary
+        mark_written()
+
+    return AuthRegisterStatusResponse(
+        job_id=job.id,
+        username=job.username,
+        status=job.status,
+        error=job.error,
+        created_at=job.created_at,
+        updated_at=job.updated_at,
+    )
 
 
 @router.get("/available-ens/{username}")
 async def check_username(username: str) -> AuthCheckUsernameResponse:
-    is_available = await multibaas_service.is_ens_subname_available(username)
+    is_available = await ens_registry_service.is_available(
+        username
+    ) and not await registration_service.is_reserved(username)
     return AuthCheckUsernameResponse(available=is_available)
 
 
@@ -114,7 +151,7 @@ async def is_registered(
     user_address=Depends(get_current_address),
 ) -> AuthIsRegisteredResponse:
     # Check if user exists in the database
-    db_registered = await user_service.get_user_by_address(user_address)
+    db_registered = await user_service.get_user_by_address(user_address, read_only=True)
 
     # User is considered registered if they exist in both ENS and the database
     return AuthIsRegisteredResponse(
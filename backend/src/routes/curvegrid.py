@@ -1,9 +1,11 @@
 import hashlib
 import hmac
 import time
-from typing import Any
+from typing import Annotated, Any
 
 from fastapi import HTTPException, Header, Request, APIRouter
+from fastapi.exceptions import RequestValidationError
+from pydantic import Field, TypeAdapter, ValidationError
 
 from src.config import config
 from src.interfaces.curvegrid import (
@@ -12,20 +14,32 @@ from src.interfaces.curvegrid import (
     WebhookCreateResponse,
     WebhookDeleteRequest,
 )
+from src.services.ens_registry import ens_registry_service
+from src.services.idempotency import idempotency_service
 from src.services.multibaas import multibaas_service
 from src.services.transaction import transaction_service
 from src.services.user import user_service
 from src.utils.logger import setup_logger
+from src.utils.payments import parse_payment_inputs
+from src.utils.tracing import TracedRoute, span
 
 logger = setup_logger(__name__)
 
-router = APIRouter(prefix="/curvegrid", tags=["Curvegrid"])
+router = APIRouter(prefix="/curvegrid", tags=["Curvegrid"], route_class=TracedRoute)
 
 
 # Maximum age of webhook in seconds before rejecting it (5 minutes)
 MAX_WEBHOOK_AGE = 300
 
-USDC_DECIMALS = 6
+# Events that don't match the expected shape are kept as plain dicts, to be skipped individually
+webhook_payload_adapter: TypeAdapter[list[CurvegridPaymentWebhook | dict[str, Any]]] = TypeAdapter(
+    list[
+        Annotated[
+            CurvegridPaymentWebhook | dict[str, Any],
+            Field(union_mode="left_to_right"),
+        ]
+    ]
+)
 
 
 @router.post(
@@ -33,7 +47,6 @@ USDC_DECIMALS = 6
 )
 async def curvegrid_webhook(
     request: Request,
-    payload: list[dict[str, Any]],
     signature: str = Header(None, alias="X-MultiBaas-Signature"),
     timestamp: str = Header(None, alias="X-MultiBaas-Timestamp"),
 ) -> dict[str, str]:
@@ -98,83 +111,118 @@ async def curvegrid_webhook(
         logger.warning("Invalid webhook signature")
         raise HTTPException(status_code=401, detail="Invalid signature")
 
-    # Process PaymentCompleted events in the list
+    # Retried deliveries are acknowledged once authenticated, before doing any work
+    if await idempotency_service.is_duplicate("curvegrid", signature):
+        logger.info("Ignoring duplicate webhook delivery")
+        return {"status": "ignored", "message": "Duplicate delivery"}
+
+    # Decode and validate all the events in a single pass over the raw bytes
+    try:
+        payload = webhook_payload_adapter.validate_json(body)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+
+    # Load the users of all the payments in one query, the checks below then hit the request cache
+    await user_service.get_users_by_addresses(
+        input_data.value
+        for payment_webhook in payload
+        if isinstance(payment_webhook, CurvegridPaymentWebhook)
+        for input_data in payment_webhook.data.event.inputs
+        if input_data.name in ("sender", "receiver")
+    )
+
+    # Process PaymentCompleted and NameRegistered events in the list
     processed_payments = 0
     successful_transactions = 0
-
-    for event_item in payload:
-        try:
-            payment_webhook = CurvegridPaymentWebhook(**event_item)
-            logger.info(f"Processing Payment: {payment_webhook}")
-            processed_payments += 1
-
-            # Extract sender and receiver from the event inputs
-            sender_address = None
-            receiver_address = None
-            amount = None
-
-            for input_data in payment_webhook.data.event.inputs:
-                if input_data.name == "sender":
-                    sender_address = input_data.value
-                elif input_data.name == "receiver":
-                    receiver_address = input_data.value
-                elif input_data.name == "amount":
-                    try:
-                        # Convert string amount to int first, then to float with correct decimals
-                        raw_amount = int(input_data.value)
-                        # Convert from USDC 6 decimals to a human-readable amount
-                        amount = raw_amount / (10**USDC_DECIMALS)
-                        logger.info(f"Converted amount {raw_amount} to {amount} USDC")
-                    except ValueError:
-                        logger.error(f"Invalid amount format: {input_data.value}")
+    registered_names = 0
+    failed_events = 0
+
+    for payment_webhook in payload:
+        if not isinstance(payment_webhook, CurvegridPaymentWebhook):
+            logger.info(f"Not a supported event: {payment_webhook}")
+            continue
+
+        # One span per event, to tell the slow ones apart in the traces
+        with span(
+            "curvegrid.event", **{"event.name": payment_webhook.data.event.name}
+        ) as event_span:
+            try:
+                if payment_webhook.data.event.name == "NameRegistered":
+                    inputs = {
+                        input_data.name: input_data.value
+                        for input_data in payment_webhook.data.event.inputs
+                    }
+                    if "label" not in inputs:
+                        logger.warning(f"Missing label in NameRegistered event: {inputs}")
                         continue
-
-            # Skip if any required data is missing
-            if sender_address is None or receiver_address is None or amount is None:
-                logger.warning(
-                    f"Missing required payment data: sender={sender_address}, receiver={receiver_address}, amount={amount}"
+                    await ens_registry_service.add_label(inputs["label"], inputs.get("owner"))
+                    registered_names += 1
+                    continue
+
+                transaction_hash = payment_webhook.data.transaction.txHash
+                logger.info(f"Processing Payment: {transaction_hash}")
+                processed_payments += 1
+
+                if await idempotency_service.is_transaction_recorded(transaction_hash):
+                    logger.info(f"Skipping already recorded transaction: {transaction_hash}")
+                    continue
+
+                # Extract sender, receiver and amount from the event inputs
+                payment = parse_payment_inputs(payment_webhook.data.event.inputs)
+                if payment is None:
+                    continue
+                sender_address, receiver_address, amount, _ = payment
+
+                # Check if both addresses belong to users in our database
+                users = await user_service.get_users_by_addresses(
+                    [sender_address, receiver_address]
                 )
-                continue
-
-            # Check if both addresses belong to users in our database
-            sender_exists = await user_service.user_exists(sender_address)
-            receiver_exists = await user_service.user_exists(receiver_address)
-
-            if not sender_exists or not receiver_exists:
-                logger.info(
-                    f"Skipping transaction - one or both users not in database: sender={sender_address} ({sender_exists}), "
-                    f"receiver={receiver_address} ({receiver_exists})"
+                sender_exists = sender_address in users
+                receiver_exists = receiver_address in users
+
+                if not sender_exists or not receiver_exists:
+                    logger.info(
+                        f"Skipping transaction - one or both users not in database: sender={sender_address} ({sender_exists}), "
+                        f"receiver={receiver_address} ({receiver_exists})"
+                    )
+                    continue
+
+                # Create the p2p transaction
+                transaction = await transaction_service.create_transaction(
+                    sender_address=sender_address,
+                    receiver_address=receiver_address,
+                    amount=amount,
+                    transaction_type="p2p",
+                    transaction_hash=transaction_hash,
                 )
-                continue
-
-            # Create the p2p transaction
-            transaction = await transaction_service.create_transaction(
-                sender_address=sender_address,
-                receiver_address=receiver_address,
-                amount=amount,
-                transaction_type="p2p",
-                transaction_hash=payment_webhook.data.transaction.txHash,
-            )
 
-            if transaction:
-                logger.info(
-                    f"Successfully created p2p transaction: {transaction.transaction_hash}"
-                )
-                successful_transactions += 1
-            else:
-                logger.error("Failed to create p2p transaction")
-
-        except ValueError as e:
-            logger.info(f"Not a PaymentCompleted event or validation error: {str(e)}")
-            # Continue processing other events in the list
-        except Exception as e:
-            logger.error(f"Error processing PaymentCompleted event: {str(e)}")
-            # Continue with other events
-
-    if processed_payments > 0:
+                if transaction:
+                    logger.info(
+                        f"Successfully created p2p transaction: {transaction.transaction_hash}"
+                    )
+                    idempotency_service.remember_transaction(transaction_hash)
+                    successful_transactions += 1
+                else:
+                    logger.error("Failed to create p2p transaction")
+
+            except Exception as e:
+                logger.error(f"Error processing PaymentCompleted event: {str(e)}")
+                if event_span is not None:
+                    event_span.record_error(e)
+                failed_events += 1
+                # Continue with other events
+
+    if failed_events > 0:
+        # Not remembered, so that Curvegrid retries it, the recorded events are skipped then
+        raise HTTPException(
+            status_code=500, detail=f"Failed to process {failed_events} events, retry later"
+        )
+    await idempotency_service.remember("curvegrid", signature)
+
+    if processed_payments > 0 or registered_names > 0:
         return {
             "status": "success",
-            "message": f"Processed {processed_payments} payment transactions, created {successful_transactions} p2p transactions",
+            "message": f"Processed {processed_payments} payment transactions, created {successful_transactions} p2p transactions, indexed {registered_names} ENS names",
         }
 
     # If we didn't process any events, return a message indicating no supported events were found
@@ -0,0 +1,68 @@
+import os
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+
+from src.config import config
+from src.interfaces.debug import BlockingReport, PoolReport, ScheduledJobReport
+from src.models.base import pool_metrics, pool_status
+from src.services.auth import get_admin_address
+from src.services.loop_monitor import loop_monitor
+from src.services.profiling import request_profiler
+from src.services.scheduler import scheduler
+from src.utils.tracing import TracedRoute
+
+router = APIRouter(prefix="/debug", tags=["Debug"], route_class=TracedRoute)
+
+
+@router.get(
+    "/blocking",
+    description="Event loop lag of the worker serving the request, and the stalls it recorded",
+)
+async def get_blocking_report(_admin_address=Depends(get_admin_address)) -> BlockingReport:
+    return loop_monitor.report()
+
+
+@router.get("/pool", description="Database connection pool of the worker serving the request")
+async def get_pool_report(_admin_address=Depends(get_admin_address)) -> PoolReport:
+    return PoolReport(
+        pid=os.getpid(),
+        **pool_status(),
+        max_overflow=config.DATABASE_MAX_OVERFLOW,
+        timeout_s=config.DATABASE_POOL_TIMEOUT,
+        wait_ms=pool_metrics.wait.value * 1000,
+        max_wait_ms=pool_metrics.max_wait * 1000,
+        checkouts=pool_metrics.checkouts,
+        timeouts=pool_metrics.timeouts,
+        wait_histogram=pool_metrics.wait_histogram,
+    )
+
+
+@router.get(
+    "/profiles",
+    description="Names of the request profiles saved by the worker serving the request, newest first",
+)
+async def get_profiles(_admin_address=Depends(get_admin_address)) -> list[str]:
+    return request_profiler.list_profiles()
+
+
+@router.get("/profiles/{name}", description="Download a request profile")
+async def get_profile(name: str, _admin_address=Depends(get_admin_address)) -> FileResponse:
+    path = request_profiler.get_profile_path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, filename=name)
+
+
+@router.get("/jobs", description="Last run of each scheduled job, whichever worker ran it")
+async def get_jobs(_admin_address=Depends(get_admin_address)) -> list[ScheduledJobReport]:
+    return [
+        ScheduledJobReport(
+            name=job.name,
+            last_started_at=job.last_started_at,
+            last_finished_at=job.last_finished_at,
+            last_duration_s=job.last_duration_seconds,
+            last_error=job.last_error,
+        )
+        for job in scheduler.get_jobs()
+    ]
@@ -1,51 +1,30 @@
 import hashlib
 import hmac
 import time
-from typing import Any, Dict
 
 from fastapi import HTTPException, Header, Request, APIRouter
-from pydantic import BaseModel, Field
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
 
 from src.config import config
-from src.interfaces.thirdweb import (
-    ThirdwebBuyWithFiatWebhook,
-    ThirdwebBuyWithCryptoWebhook,
-)
+from src.interfaces.thirdweb import ThirdwebWebhookPayload
+from src.services.idempotency import idempotency_service
 from src.services.transaction import transaction_service
 from src.utils.logger import setup_logger
+from src.utils.payments import USD_CENT_IN_BASE_UNITS
+from src.utils.tracing import TracedRoute, span
 
 logger = setup_logger(__name__)
 
-router = APIRouter(prefix="/thirdweb", tags=["Thirdweb"])
+router = APIRouter(prefix="/thirdweb", tags=["Thirdweb"], route_class=TracedRoute)
 
 # Maximum age of webhook in seconds before rejecting it (5 minutes)
 MAX_WEBHOOK_AGE = 300
 
 
-class ThirdwebWebhookPayload(BaseModel):
-    data: Dict[str, Any] = Field(...)
-
-    @property
-    def buy_with_crypto_status(
-        self,
-    ) -> ThirdwebBuyWithCryptoWebhook | None:
-        if "buyWithCryptoStatus" in self.data:
-            return ThirdwebBuyWithCryptoWebhook(**self.data["buyWithCryptoStatus"])
-        return None
-
-    @property
-    def buy_with_fiat_status(
-        self,
-    ) -> ThirdwebBuyWithFiatWebhook | None:
-        if "buyWithFiatStatus" in self.data:
-            return ThirdwebBuyWithFiatWebhook(**self.data["buyWithFiatStatus"])
-        return None
-
-
 @router.post("/webhook", description="Receive webhooks from Thirdweb")
 async def thirdweb_webhook(
     request: Request,
-    payload: ThirdwebWebhookPayload,
     signature: str = Header(None, alias="X-Pay-Signature"),
     timestamp: str = Header(None, alias="X-Pay-Timestamp"),
 ) -> None:
@@ -87,52 +66,73 @@ async def thirdweb_webhook(
         logger.warning(f"Invalid timestamp format: {timestamp}")
         raise HTTPException(status_code=401, detail="Invalid timestamp format")
 
-    # Get raw request body for signature verification
+    # Get raw request body for signature verification, it is read only once
     body = await request.body()
-    body_str = body.decode("utf-8")
 
-    # Combine timestamp and body to create the payload for signature verification
-    signature_payload = f"{timestamp}.{body_str}"
-
-    # Calculate expected signature
-    expected_signature = hmac.new(
+    # Calculate expected signature over the timestamp and body joined by a dot
+    mac = hmac.new(
         config.THIRDWEB_WEBHOOK_SECRET.encode(),
-        signature_payload.encode(),
+        timestamp.encode(),
         hashlib.sha256,
-    ).hexdigest()
+    )
+    mac.update(b".")
+    mac.update(body)
+    expected_signature = mac.hexdigest()
 
     # Secure comparison to prevent timing attacks
     if not hmac.compare_digest(expected_signature, signature):
         logger.warning("Invalid webhook signature")
         raise HTTPException(status_code=401, detail="Invalid signature")
 
-    logger.debug(f"Received Thirdweb webhook: {payload.model_dump_json()}")
+    # Retried deliveries are acknowledged once authenticated, before doing any work
+    if await idempotency_service.is_duplicate("thirdweb", signature):
+        logger.info("Ignoring duplicate webhook delivery")
+        return
 
-    crypto_data = payload.buy_with_crypto_status
+    # Decode and validate the nested events in a single pass over the raw bytes
+    try:
+        payload = ThirdwebWebhookPayload.model_validate_json(body)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+
+    logger.debug(f"Received Thirdweb webhook: {body!r}")
+
+    crypto_data = payload.data.buyWithCryptoStatus
     if crypto_data is None or crypto_data.destination is None:
-        fiat_data = payload.buy_with_fiat_status
+        fiat_data = payload.data.buyWithFiatStatus
         if fiat_data is None:
             raise HTTPException(status_code=400, detail="Unsupported webhook type")
         if fiat_data.status != "ON_RAMP_TRANSFER_COMPLETED":
             logger.debug(f"Ignoring non-completed transaction: {fiat_data.status}")
+            await idempotency_service.remember("thirdweb", signature)
             return
         transaction_hash = fiat_data.source.transactionHash
-        amount_usd = fiat_data.source.amountUSDCents / 100
+        amount = fiat_data.source.amountUSDCents * USD_CENT_IN_BASE_UNITS
         address = fiat_data.purchaseData.userAddress
 
     elif crypto_data.status != "COMPLETED":
         logger.debug(f"Ignoring non-completed transaction: {crypto_data.status}")
+        await idempotency_service.remember("thirdweb", signature)
         return
     else:
         transaction_hash = crypto_data.destination.transactionHash
-        amount_usd = crypto_data.destination.amountUSDCents / 100
+        amount = crypto_data.destination.amountUSDCents * USD_CENT_IN_BASE_UNITS
         address = crypto_data.purchaseData.userAddress
 
+    if await idempotency_service.is_transaction_recorded(transaction_hash):
+        logger.info(f"Skipping already recorded transaction: {transaction_hash}")
+        await idempotency_service.remember("thirdweb", signature)
+        return
+
     # Create transaction record - for topup, sender and receiver are the same
-    await transaction_service.create_transaction(
-        sender_address=address,
-        receiver_address=address,
-        amount=amount_usd,
-        transaction_type="topup",
-        transaction_hash=transaction_hash,
-    )
+    with span("thirdweb.event", **{"transaction.hash": transaction_hash}):
+        transaction = await transaction_service.create_transaction(
+            sender_address=address,
+            receiver_address=address,
+            amount=amount,
+            transaction_type="topup",
+            transaction_hash=transaction_hash,
+        )
+    if transaction:
+        idempotency_service.remember_transaction(transaction_hash)
+    await idempotency_service.remember("thirdweb", signature)
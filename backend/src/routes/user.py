@@ -1,22 +1,39 @@
 import asyncio
+import json
+from datetime import UTC, datetime
 
 import aiohttp
-from fastapi import UploadFile, File, APIRouter, HTTPException, Query
+from fastapi import UploadFile, File, APIRouter, HTTPException, Query, Request, Response
 from fastapi.params import Depends
+from fastapi.responses import ORJSONResponse, StreamingResponse
 
 from src.config import config
 from src.interfaces.transaction import GetTransactionsResponse
-from src.interfaces.user import UserSearchResult, SearchUsersResponse
+from src.interfaces.user import (
+    GetContactsResponse,
+    SearchUsersResponse,
+    UserContact,
+)
 from src.services.auth import get_current_address
+from src.services.contacts import contact_service, decay_factor
 from src.services.multibaas import multibaas_service
+from src.services.realtime import realtime_hub
 from src.services.transaction import transaction_service
 from src.services.user import user_service
 from src.utils.ens import get_ens_from_username
+from src.utils.http import http_client
+from src.utils.http_cache import (
+    cache_headers,
+    is_not_modified,
+    make_etag,
+    not_modified_response,
+)
 from src.utils.logger import setup_logger
+from src.utils.tracing import TracedRoute
 
 logger = setup_logger(__name__)
 
-router = APIRouter(prefix="/user", tags=["User"])
+router = APIRouter(prefix="/user", tags=["User"], route_class=TracedRoute)
 
 
 @router.post(
@@ -39,11 +56,10 @@ async def change_avatar(
         "Authorization": f"Bearer {config.PINATA_JWT}",
     }
 
-    async with aiohttp.ClientSession() as session:
-        async with session.post(url, data=data, headers=headers) as response:
-            response.raise_for_status()
-            result = await response.json()
-            image_url = f"https://gateway.pinata.cloud/ipfs/{result.get("IpfsHash")}"
+    async with http_client.session.post(url, data=data, headers=headers) as response:
+        response.raise_for_status()
+        result = await response.json()
+        image_url = f"https://gateway.pinata.cloud/ipfs/{result.get("IpfsHash")}"
 
     user = await user_service.get_user_by_address(user_address)
     if not user:
@@ -54,30 +70,105 @@ async def change_avatar(
     )
     if not success:
         raise HTTPException(status_code=500, detail="Failed to update ENS avatar")
+    await user_service.update_avatar_urls({user.username: image_url})
     return image_url
 
 
-@router.get("/avatar", description="Get the avatar URL")
-async def get_avatar(user_address=Depends(get_current_address)) -> str:
+@router.get("/avatar", description="Get the avatar URL", response_model=str)
+async def get_avatar(
+    request: Request, response: Response, user_address=Depends(get_current_address)
+) -> str | Response:
     user = await user_service.get_user_by_address(user_address)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    avatar_url = await multibaas_service.get_ens_avatar(
-        get_ens_from_username(user.username)
-    )
+    [avatar_url] = await user_service.get_avatar_urls([user])
+    if not avatar_url:
+        # Curvegrid couldn't be reached, don't let clients revalidate against this result
+        return avatar_url
+
+    etag = make_etag("avatar", user.username, avatar_url)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    response.headers.update(cache_headers(etag))
     return avatar_url
 
 
-@router.get("/transactions", description="Get all transactions for the connected user")
+@router.get(
+    "/transactions",
+    description="Get all transactions for the connected user",
+    response_model=GetTransactionsResponse,
+)
 async def get_user_transactions(
+    request: Request,
+    include_archived: bool = Query(
+        False, description="Also return the archived transactions, older than a year by default"
+    ),
     user_address=Depends(get_current_address),
-) -> GetTransactionsResponse:
-    transactions = await transaction_service.get_user_transactions(user_address)
-    return GetTransactionsResponse(transactions=transactions)
+) -> Response:
+    user = await user_service.get_user_by_address(user_address)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    # The history is append-only, so its size and latest entry are enough to tell if it changed.
+    # No Last-Modified: the indexer backfills rows dated in the past, which wouldn't advance it.
+    version = await transaction_service.get_ledger_version(user.username)
+    etag = make_etag(
+        "transactions", user.username, include_archived, version.transaction_count, version.last_id
+    )
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+
+    transactions = await transaction_service.get_user_transactions(
+        user_address, include_archived=include_archived
+    )
+    # Serialized straight from the rows, response_model only documents the schema
+    return ORJSONResponse(
+        {"transactions": transaction_service.to_json(transactions)},
+        headers=cache_headers(etag),
+    )
+
 
+# Comment line sent on idle streams so that proxies don't close the connection
+STREAM_KEEPALIVE_SECONDS = 15
 
-@router.get("/search", description="Search for users by username or address")
+
+@router.get(
+    "/stream",
+    description="Server-sent events stream of the connected user's new transactions",
+    response_class=StreamingResponse,
+)
+async def stream_events(request: Request, user_address=Depends(get_current_address)):
+    user = await user_service.get_user_by_address(user_address)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    async def events():
+        queue = realtime_hub.subscribe(user.username)
+        try:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            realtime_hub.unsubscribe(user.username, queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get(
+    "/search",
+    description="Search for users by username or address",
+    response_model=SearchUsersResponse,
+)
 async def search_users(
     query: str = Query(
         ..., min_length=1, description="Search query for username or address"
@@ -86,7 +177,7 @@ async def search_users(
         10, ge=1, le=50, description="Maximum number of results to return"
     ),
     current_user_address=Depends(get_current_address),
-) -> SearchUsersResponse:
+) -> Response:
     # Get current user
     current_user = await user_service.get_user_by_address(current_user_address)
     if not current_user:
@@ -99,19 +190,46 @@ async def search_users(
         exclude_address=current_user_address
     )
 
-    # Fetch all avatars in parallel for better performance
-    avatar_tasks = [
-        multibaas_service.get_ens_avatar(get_ens_from_username(user.username))
-        for user in users
-    ]
-    avatar_urls = await asyncio.gather(*avatar_tasks)
+    avatar_urls = await user_service.get_avatar_urls(users)
 
     # Combine users with their avatar URLs
     result_users = [
-        UserSearchResult(
-            username=user.username, address=user.address, avatar_url=avatar_url
-        )
+        {"username": user.username, "address": user.address, "avatar_url": avatar_url}
         for user, avatar_url in zip(users, avatar_urls)
     ]
 
-    return SearchUsersResponse(users=result_users)
+    return ORJSONResponse({"users": result_users})
+
+
+@router.get("/contacts", description="Get the users the connected user transacts with the most")
+async def get_contacts(
+    limit: int = Query(
+        10, ge=1, le=50, description="Maximum number of contacts to return"
+    ),
+    user_address=Depends(get_current_address),
+) -> GetContactsResponse:
+    user = await user_service.get_user_by_address(user_address)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    contacts = await contact_service.get_contacts(user.username, limit)
+
+    avatar_urls = await user_service.get_avatar_urls(
+        [contact_user for _, contact_user in contacts]
+    )
+
+    # Stored scores grow with time, bring them back to a number of recent transactions
+    now_factor = decay_factor(datetime.now(UTC).replace(tzinfo=None))
+    return GetContactsResponse(
+        contacts=[
+            UserContact(
+                username=contact_user.username,
+                address=contact_user.address,
+                avatar_url=avatar_url,
+                transaction_count=contact.transaction_count,
+                last_transaction_at=contact.last_transaction_at,
+                score=contact.score / now_factor,
+            )
+            for (contact, contact_user), avatar_url in zip(contacts, avatar_urls)
+        ]
+    )
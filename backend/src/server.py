@@ -0,0 +1,106 @@
+import importlib.util
+import os
+
+import uvicorn
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+from src.config import config
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Database connections left for migrations, scripts and admin sessions
+RESERVED_CONNECTIONS = 10
+
+# Seconds given to in-flight requests when a worker is stopped or restarted (SIGHUP)
+GRACEFUL_SHUTDOWN_TIMEOUT = 30
+
+
+def available_cpus() -> int:
+    """Number of CPUs this process can use, honoring the cgroup quota inside containers."""
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            return max(1, int(quota) // int(period))
+    except (OSError, ValueError):
+        pass
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def database_max_connections() -> int | None:
+    """Read max_connections from the database server, None if it can't be reached."""
+    engine = create_engine(config.DATABASE_URL, poolclass=NullPool)
+    try:
+        with engine.connect() as connection:
+            return int(connection.execute(text("SHOW max_connections")).scalar_one())
+    except Exception as e:
+        logger.warning(f"Couldn't read max_connections from the database: {e}")
+        return None
+    finally:
+        engine.dispose()
+
+
+def configure_database_pools(workers: int) -> None:
+    """
+    Split the database connections between the workers, unless the pool sizes are configured.
+
+    The values are passed through the environment as the workers load their own configuration.
+    """
+    if os.getenv("DATABASE_POOL_SIZE") or os.getenv("DATABASE_MAX_OVERFLOW"):
+        return
+    # PgBouncer multiplexes the client connections on its own pool of server connections
+    if config.DATABASE_PGBOUNCER:
+        return
+
+    max_connections = database_max_connections()
+    if max_connections is None:
+        return
+
+    budget = max((max_connections - RESERVED_CONNECTIONS) // workers, 2)
+    # Keep a third of each worker's budget for spikes
+    pool_size = max(budget * 2 // 3, 1)
+    os.environ["DATABASE_POOL_SIZE"] = str(pool_size)
+    os.environ["DATABASE_MAX_OVERFLOW"] = str(budget - pool_size)
+    logger.info(
+        f"Database allows {max_connections} connections, using a pool of {pool_size}+{budget - pool_size} per worker"
+    )
+
+
+def pick_implementation(module: str, fallback: str) -> str:
+    return module if importlib.util.find_spec(module) is not None else fallback
+
+
+def main() -> None:
+    """
+    Run the API with one worker process per available CPU.
+
+    Send SIGHUP to the main process to restart the workers one by one, and SIGTTIN / SIGTTOU
+    to add or remove a worker.
+    """
+    workers = config.WEB_CONCURRENCY or available_cpus()
+    configure_database_pools(workers)
+    loop = pick_implementation("uvloop", "asyncio")
+    http = pick_implementation("httptools", "h11")
+
+    logger.info(f"Starting {workers} workers with the {loop} event loop and {http} parser")
+    uvicorn.run(
+        "src.main:app",
+        host=config.SERVER_HOST,
+        port=config.SERVER_PORT,
+        workers=workers,
+        loop=loop,  # type: ignore[arg-type]
+        http=http,  # type: ignore[arg-type]
+        # The client IP used by the rate limits is only read from the headers of these proxies
+        proxy_headers=True,
+        forwarded_allow_ips=config.FORWARDED_ALLOW_IPS,
+        timeout_graceful_shutdown=GRACEFUL_SHUTDOWN_TIMEOUT,
+    )
+
+
+if __name__ == "__main__":
+    main()
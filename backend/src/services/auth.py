@@ -6,6 +6,7 @@ from fastapi import Depends, HTTPException, status, Cookie
 from pydantic import BaseModel
 
 from src.config import config
+from src.utils.ethereum import format_eth_address
 from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -13,16 +14,52 @@ logger = setup_logger(__name__)
 
 class TokenData(BaseModel):
     address: str
+    admin: bool = False
 
 
-def create_access_token(address: str) -> str:
-    """Create a JWT access token for the given wallet address."""
+def create_access_token(address: str, admin: bool = False) -> str:
+    """
+    Create a JWT access token for the given wallet address.
+
+    Args:
+        address: The wallet address the token is for.
+        admin: Whether the login proved that the address signed, which administrators need.
+
+    Returns:
+        str: The encoded token.
+    """
     expire = datetime.now() + timedelta(minutes=config.JWT_ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode = {"sub": address, "exp": expire}
+    to_encode: dict = {"sub": address, "exp": expire}
+    if admin:
+        to_encode["admin"] = True
     encoded_jwt = jwt.encode(to_encode, config.JWT_SECRET, algorithm="HS256")
     return encoded_jwt
 
 
+def _decode_token(token: str | None) -> dict:
+    if not token:
+        return {}
+    try:
+        return jwt.decode(token, config.JWT_SECRET, algorithms=["HS256"])
+    except jwt.PyJWTError:
+        return {}
+
+
+def get_token_address(token: str | None) -> str | None:
+    """Wallet address of a JWT access token, None if it is missing or invalid."""
+    return _decode_token(token).get("sub")
+
+
+def is_admin(address: str | None) -> bool:
+    return address is not None and format_eth_address(address) in config.ADMIN_ADDRESSES
+
+
+def is_admin_token(token: str | None) -> bool:
+    """Whether a JWT access token was issued to an administrator whose signature was checked."""
+    payload = _decode_token(token)
+    return payload.get("admin") is True and is_admin(payload.get("sub"))
+
+
 def verify_token(solva_auth: str = Cookie(default=None)) -> TokenData:
     """Verify JWT token from cookie and return the wallet address."""
     if not solva_auth:
@@ -39,7 +76,7 @@ def verify_token(solva_auth: str = Cookie(default=None)) -> TokenData:
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid authentication credentials",
             )
-        token_data = TokenData(address=address)
+        token_data = TokenData(address=address, admin=payload.get("admin") is True)
     except jwt.PyJWTError as e:
         logger.error(f"JWT verification error: {str(e)}")
         raise HTTPException(
@@ -52,3 +89,18 @@ def verify_token(solva_auth: str = Cookie(default=None)) -> TokenData:
 def get_current_address(token_data: Annotated[TokenData, Depends(verify_token)]) -> str:
     """Return the current wallet address from the token."""
     return token_data.address
+
+
+def get_admin_address(token_data: Annotated[TokenData, Depends(verify_token)]) -> str:
+    """
+    Return the current wallet address, if it belongs to an administrator.
+
+    The login of users doesn't check who signed, for smart accounts, so the address of the
+    token is only trusted if the login proved that the administrator signed.
+    """
+    if not token_data.admin or not is_admin(token_data.address):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Administrator access required",
+        )
+    return token_data.address
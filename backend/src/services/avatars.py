@@ -0,0 +1,122 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+
+from pydantic import BaseModel
+from sqlalchemy import func, select, union
+
+from src.config import config
+from src.models.base import SessionLocal, init_db
+from src.models.transaction import Transaction
+from src.models.user import User
+from src.services.multibaas import multibaas_service
+from src.services.user import user_service
+from src.utils.ens import get_ens_from_username
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Text records read concurrently from Curvegrid
+RECONCILE_BATCH_SIZE = 50
+
+# Only one worker reconciles at a time
+RECONCILE_LOCK_ID = 0x61766174  # "avat"
+
+
+class AvatarReconcileReport(BaseModel):
+    checked: int = 0
+    updated: int = 0
+
+
+class AvatarReconciler:
+    """
+    Checks the stored avatar URLs against the ENS text records.
+
+    The backend is the only writer of the records, so differences only come from failed writes
+    or changes made outside of the app, and a periodic pass is enough to catch them.
+    """
+
+    async def run(self) -> AvatarReconcileReport:
+        """
+        Compare all the stored avatars with their text record, in batches.
+
+        Returns:
+            AvatarReconcileReport: The number of users checked and updated.
+        """
+        report = AvatarReconcileReport()
+        lock = SessionLocal()
+        try:
+            if not lock.scalar(select(func.pg_try_advisory_xact_lock(RECONCILE_LOCK_ID))):
+                logger.debug("Avatars are already being reconciled by another worker")
+                return report
+
+            last_username = ""
+            while True:
+                db = SessionLocal()
+                try:
+                    batch = db.execute(
+                        select(User.username, User.avatar_url)
+                        .where(User.username > last_username)
+                        .order_by(User.username)
+                        .limit(RECONCILE_BATCH_SIZE)
+                    ).all()
+                finally:
+                    db.close()
+                if not batch:
+                    break
+                last_username = batch[-1].username
+
+                records = await multibaas_service.get_ens_avatars(
+                    [get_ens_from_username(username) for username, _ in batch]
+                )
+                # Empty records are lookup errors, the stored value is kept
+                changes = {
+                    username: record
+                    for (username, avatar_url), record in zip(batch, records)
+                    if record and record != avatar_url
+                }
+                await user_service.update_avatar_urls(changes)
+
+                report.checked += len(batch)
+                report.updated += len(changes)
+        finally:
+            lock.close()
+
+        logger.info(f"Reconciled avatars: {report.checked} checked, {report.updated} updated")
+        return report
+
+    async def warm(self) -> int:
+        """
+        Resolve the avatars not stored yet of the users active in the last AVATAR_WARM_ACTIVE_HOURS,
+        so that the requests showing them don't wait for ENS.
+
+        Returns:
+            int: The number of users whose avatar was looked up.
+        """
+        since = datetime.now(UTC).replace(tzinfo=None) - timedelta(
+            hours=config.AVATAR_WARM_ACTIVE_HOURS
+        )
+        active_usernames = union(
+            select(Transaction.sender_username).where(Transaction.created_at >= since),
+            select(Transaction.receiver_username).where(Transaction.created_at >= since),
+        )
+        db = SessionLocal()
+        try:
+            users = db.scalars(
+                select(User).where(User.avatar_url.is_(None), User.username.in_(active_usernames))
+            ).all()
+        finally:
+            db.close()
+
+        for start in range(0, len(users), RECONCILE_BATCH_SIZE):
+            await user_service.get_avatar_urls(users[start : start + RECONCILE_BATCH_SIZE])
+        if users:
+            logger.info(f"Warmed the avatars of {len(users)} active users")
+        return len(users)
+
+
+avatar_reconciler = AvatarReconciler()
+
+
+if __name__ == "__main__":
+    init_db()
+    asyncio.run(avatar_reconciler.run())
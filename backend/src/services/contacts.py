@@ -0,0 +1,107 @@
+from datetime import datetime
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from src.models.base import get_session
+from src.models.contact import Contact
+from src.models.transaction import Transaction
+from src.models.user import User
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Scores use forward decay: a transaction at time t adds 2 ** ((t - epoch) / half_life), so that
+# newer transactions weigh more without ever rewriting the existing scores. Scores can then be
+# compared directly, and are brought back to a number of recent transactions when displayed.
+SCORE_EPOCH = datetime(2025, 1, 1)
+SCORE_HALF_LIFE_SECONDS = 30 * 24 * 3600
+
+# People a user paid are better payee suggestions than people who paid them
+SENT_WEIGHT = 1.0
+RECEIVED_WEIGHT = 0.5
+
+
+def decay_factor(moment: datetime) -> float:
+    return 2 ** ((moment - SCORE_EPOCH).total_seconds() / SCORE_HALF_LIFE_SECONDS)
+
+
+class ContactService:
+    """Index of the counterparties of each user, updated as p2p transactions are recorded."""
+
+    @staticmethod
+    def record_transactions(transactions: list[Transaction], db: Session) -> None:
+        """
+        Add transactions being created to the contacts of their sender and receiver.
+
+        Args:
+            transactions: The transactions being created.
+            db: The session creating them.
+        """
+        entries: dict[tuple[str, str], dict] = {}
+        for transaction in transactions:
+            if transaction.type != "p2p" or transaction.sender_username == transaction.receiver_username:
+                continue
+            factor = decay_factor(transaction.created_at)
+            for username, contact_username, weight in (
+                (transaction.sender_username, transaction.receiver_username, SENT_WEIGHT),
+                (transaction.receiver_username, transaction.sender_username, RECEIVED_WEIGHT),
+            ):
+                entry = entries.setdefault(
+                    (username, contact_username),
+                    {
+                        "username": username,
+                        "contact_username": contact_username,
+                        "score": 0.0,
+                        "transaction_count": 0,
+                        "last_transaction_at": transaction.created_at,
+                    },
+                )
+                entry["score"] += weight * factor
+                entry["transaction_count"] += 1
+                entry["last_transaction_at"] = max(entry["last_transaction_at"], transaction.created_at)
+
+        if not entries:
+            return
+
+        # Always lock the rows in the same order to avoid deadlocks between writers
+        statement = insert(Contact).values([entries[key] for key in sorted(entries)])
+        db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[Contact.username, Contact.contact_username],
+                set_={
+                    "score": Contact.score + statement.excluded.score,
+                    "transaction_count": Contact.transaction_count
+                    + statement.excluded.transaction_count,
+                    "last_transaction_at": func.greatest(
+                        Contact.last_transaction_at, statement.excluded.last_transaction_at
+                    ),
+                },
+            )
+        )
+
+    @staticmethod
+    async def get_contacts(username: str, limit: int) -> list[tuple[Contact, User]]:
+        """
+        Get the most relevant contacts of a user.
+
+        Args:
+            username: The username of the user.
+            limit: Maximum number of contacts to return.
+
+        Returns:
+            list[tuple[Contact, User]]: The contacts with their user, best first.
+        """
+        with get_session(read_only=True) as db:
+            rows = db.execute(
+                select(Contact, User)
+                .join(User, User.username == Contact.contact_username)
+                .where(Contact.username == username)
+                .order_by(Contact.score.desc())
+                .limit(limit)
+            ).all()
+            return [(contact, user) for contact, user in rows]
+
+
+contact_service = ContactService()
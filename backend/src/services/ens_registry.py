@@ -0,0 +1,127 @@
+import asyncio
+import re
+import time
+
+from sqlalchemy import exists, select
+from sqlalchemy.dialects.postgresql import insert
+
+from src.models.base import get_session
+from src.models.ens_label import EnsLabel
+from src.models.user import User
+from src.utils.bloom import BloomFilter
+from src.utils.ens import labelhash
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Minimum label length accepted by L2Registrar.available
+MIN_LABEL_LENGTH = 3
+
+# Other workers can register names too, so the filter is rebuilt periodically
+INDEX_REFRESH_SECONDS = 60
+
+# Headroom kept in the filter so that new registrations don't degrade it before the next rebuild
+BLOOM_MIN_CAPACITY = 10_000
+
+LABEL_HASH_PATTERN = re.compile(r"^0x[0-9a-fA-F]{64}$")
+
+
+class EnsRegistryService:
+    """
+    Local index of the taken ENS labels, fed by the users table and the NameRegistered events.
+
+    Answers availability checks from memory when possible: a Bloom filter miss means the label
+    is free, and only filter hits need to be confirmed against the database.
+    """
+
+    loaded_at: float | None
+
+    def __init__(self):
+        self.bloom = BloomFilter(BLOOM_MIN_CAPACITY)
+        self.loaded_at = None
+        self._lock = asyncio.Lock()
+
+    async def load(self) -> None:
+        """Rebuild the Bloom filter from the database."""
+        with get_session() as db:
+            label_hashes = [row[0] for row in db.execute(select(EnsLabel.label_hash))]
+            usernames = [row[0] for row in db.execute(select(User.username))]
+
+        bloom = BloomFilter(max(2 * (len(label_hashes) + len(usernames)), BLOOM_MIN_CAPACITY))
+        for label_hash in label_hashes:
+            bloom.add(label_hash)
+        for username in usernames:
+            bloom.add(labelhash(username))
+
+        self.bloom = bloom
+        self.loaded_at = time.monotonic()
+        logger.info(
+            f"Loaded ENS index with {len(label_hashes)} labels and {len(usernames)} usernames"
+        )
+
+    async def _ensure_fresh(self) -> None:
+        if self.loaded_at is not None and time.monotonic() - self.loaded_at < INDEX_REFRESH_SECONDS:
+            return
+        async with self._lock:
+            # Another coroutine might have reloaded the index while we were waiting
+            if self.loaded_at is None or time.monotonic() - self.loaded_at >= INDEX_REFRESH_SECONDS:
+                await self.load()
+
+    async def is_available(self, username: str) -> bool:
+        """
+        Check if the given username is free according to the local index.
+
+        This is only a hint for the UI, the registration must still be confirmed on-chain.
+
+        Args:
+            username: The username to check.
+
+        Returns:
+            bool: True if the username is not known to be taken, False otherwise.
+        """
+        if len(username) < MIN_LABEL_LENGTH:
+            return False
+
+        await self._ensure_fresh()
+        label_hash = labelhash(username)
+        if label_hash not in self.bloom:
+            return True
+
+        # Possible false positive, confirm with the database
+        with get_session() as db:
+            taken = db.scalar(
+                select(
+                    exists().where(EnsLabel.label_hash == label_hash)
+                    | exists().where(User.username == username)
+                )
+            )
+            return not taken
+
+    @staticmethod
+    async def get_owner(label: str) -> str | None:
+        """Owner of a taken label, as indexed from the NameRegistered events, None if unknown."""
+        with get_session(read_only=True) as db:
+            return db.scalar(select(EnsLabel.owner).where(EnsLabel.label_hash == labelhash(label)))
+
+    async def add_label(self, label: str, owner: str | None = None) -> None:
+        """
+        Mark a label as taken.
+
+        Args:
+            label: The label, or its keccak256 hash when coming from an indexed event topic.
+            owner: The address owning the name, if known.
+        """
+        label_hash = label.lower() if LABEL_HASH_PATTERN.match(label) else labelhash(label)
+        logger.debug(f"Adding ENS label {label_hash} owned by {owner}")
+
+        with get_session() as db:
+            db.execute(
+                insert(EnsLabel)
+                .values(label_hash=label_hash, owner=owner)
+                .on_conflict_do_nothing(index_elements=[EnsLabel.label_hash])
+            )
+            db.commit()
+        self.bloom.add(label_hash)
+
+
+ens_registry_service = EnsRegistryService()
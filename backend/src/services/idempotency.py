@@ -0,0 +1,138 @@
+from collections import OrderedDict
+from datetime import timedelta
+
+from sqlalchemy import delete, exists, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from src.models.base import get_session
+from src.models.transaction_hash import TransactionHash
+from src.models.webhook_delivery import WebhookDelivery
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Number of keys kept in memory
+CACHE_SIZE = 50_000
+
+# Deliveries older than this are rejected by the timestamp checks anyway, so they don't need to be kept
+DELIVERY_RETENTION = timedelta(hours=1)
+# Interval of the purge of the older deliveries, run by the scheduler
+PURGE_INTERVAL_SECONDS = 600
+
+
+class IdempotencyService:
+    """
+    Detects webhook deliveries and transactions that were already processed.
+
+    Lookups go through an in-memory LRU first, so retries hitting the same worker don't touch
+    the database at all. The webhook_deliveries and transaction_hashes tables are the source of truth
+    shared between workers.
+    """
+
+    _cache: OrderedDict[tuple[str, str], None]
+
+    def __init__(self):
+        self._cache = OrderedDict()
+
+    def _cache_hit(self, entry: tuple[str, str]) -> bool:
+        if entry in self._cache:
+            self._cache.move_to_end(entry)
+            return True
+        return False
+
+    def _cache_add(self, entry: tuple[str, str]) -> None:
+        self._cache[entry] = None
+        self._cache.move_to_end(entry)
+        if len(self._cache) > CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    async def is_duplicate(self, provider: str, key: str) -> bool:
+        """
+        Check if a webhook delivery was already processed.
+
+        Args:
+            provider: The webhook provider ("curvegrid" or "thirdweb").
+            key: The key of the delivery, its signature.
+
+        Returns:
+            bool: True if the delivery was already processed, False otherwise.
+        """
+        entry = (provider, key)
+        if self._cache_hit(entry):
+            return True
+
+        with get_session() as db:
+            found = db.scalar(
+                select(
+                    exists().where(
+                        WebhookDelivery.provider == provider, WebhookDelivery.key == key
+                    )
+                )
+            )
+
+        if found:
+            self._cache_add(entry)
+        return bool(found)
+
+    async def remember(self, provider: str, key: str) -> None:
+        """
+        Record a webhook delivery as processed.
+
+        Args:
+            provider: The webhook provider ("curvegrid" or "thirdweb").
+            key: The key of the delivery, its signature.
+        """
+        with get_session() as db:
+            db.execute(
+                insert(WebhookDelivery)
+                .values(provider=provider, key=key)
+                .on_conflict_do_nothing()
+            )
+            db.commit()
+        self._cache_add((provider, key))
+
+    async def purge_deliveries(self) -> int:
+        """
+        Delete the deliveries older than the retention.
+
+        Returns:
+            int: The number of deliveries deleted.
+        """
+        with get_session() as db:
+            result = db.execute(
+                delete(WebhookDelivery).where(
+                    WebhookDelivery.created_at < func.current_timestamp() - DELIVERY_RETENTION
+                )
+            )
+            db.commit()
+        return getattr(result, "rowcount", 0)
+
+    async def is_transaction_recorded(self, transaction_hash: str) -> bool:
+        """
+        Check if a blockchain transaction is already in the ledger.
+
+        Args:
+            transaction_hash: The blockchain transaction hash.
+
+        Returns:
+            bool: True if the transaction is already recorded, False otherwise.
+        """
+        entry = ("transaction", transaction_hash)
+        if self._cache_hit(entry):
+            return True
+
+        with get_session() as db:
+            found = db.scalar(
+                select(exists().where(TransactionHash.transaction_hash == transaction_hash))
+            )
+
+        if found:
+            self._cache_add(entry)
+        return bool(found)
+
+    def remember_transaction(self, transaction_hash: str) -> None:
+        """Record in memory that a blockchain transaction is in the ledger."""
+        self._cache_add(("transaction", transaction_hash))
+
+
+idempotency_service = IdempotencyService()
@@ -0,0 +1,158 @@
+import asyncio
+from typing import Awaitable, Callable
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import select
+
+from src.config import config
+from src.interfaces.curvegrid import CurvegridEvent
+from src.models.base import SessionLocal, init_db
+from src.models.indexer_checkpoint import IndexerCheckpoint
+from src.models.transaction_hash import TransactionHash
+from src.services.multibaas import multibaas_service
+from src.services.transaction import transaction_service
+from src.utils.logger import setup_logger
+from src.utils.payments import PaymentEvent, parse_payment_inputs
+
+logger = setup_logger(__name__)
+
+PAYMENT_COMPLETED_SIGNATURE = "PaymentCompleted(address,address,uint256,uint256)"
+
+# (contract_label, event_signature, limit, offset) -> raw events
+EventsFetcher = Callable[[str, str, int, int], Awaitable[list[dict]]]
+
+
+class IndexerReport(BaseModel):
+    fetched: int = 0
+    missing: int = 0
+    created: int = 0
+    last_block: int = 0
+
+
+class PaymentIndexer:
+    """
+    Backfills the PaymentCompleted events into the transactions table.
+
+    Events are paged through the Curvegrid events API from a checkpoint committed after every
+    batch, so an interrupted run resumes where it stopped. Payments missing from the database
+    (lost webhook deliveries) are reported as gaps and inserted in bulk.
+    """
+
+    def __init__(
+        self,
+        name: str = "PaymentCompleted",
+        fetch_events: EventsFetcher | None = None,
+        batch_size: int | None = None,
+    ):
+        self.name = name
+        self.fetch_events = fetch_events or multibaas_service.list_events
+        self.batch_size = batch_size or config.CURVEGRID_INDEXER_BATCH_SIZE
+
+    def _get_checkpoint(self, db) -> IndexerCheckpoint:
+        checkpoint = db.get(IndexerCheckpoint, self.name)
+        if checkpoint is None:
+            checkpoint = IndexerCheckpoint(name=self.name, last_block=0, event_offset=0)
+            db.add(checkpoint)
+            db.commit()
+        return checkpoint
+
+    async def _process_batch(
+        self, raw_events: list[dict], checkpoint: IndexerCheckpoint, report: IndexerReport
+    ) -> None:
+        payments: dict[str, PaymentEvent] = {}
+        for raw_event in raw_events:
+            try:
+                event = CurvegridEvent(**raw_event)
+            except ValidationError as e:
+                logger.warning(f"Skipping malformed event: {e}")
+                continue
+
+            block_number = event.transaction.blockNumber
+            if block_number < checkpoint.last_block:
+                # Events are expected in chain order, this hints at a reorg or a reindex on Curvegrid's side
+                logger.warning(
+                    f"Out of order event in block {block_number} after block {checkpoint.last_block}"
+                )
+            checkpoint.last_block = max(checkpoint.last_block, block_number)
+
+            payment = parse_payment_inputs(event.event.inputs)
+            if payment is not None:
+                payments[event.transaction.txHash] = payment
+
+        db = SessionLocal()
+        try:
+            known_hashes = set(
+                db.scalars(
+                    select(TransactionHash.transaction_hash).where(
+                        TransactionHash.transaction_hash.in_(payments.keys())
+                    )
+                )
+            )
+        finally:
+            db.close()
+
+        missing = {
+            transaction_hash: payment
+            for transaction_hash, payment in payments.items()
+            if transaction_hash not in known_hashes
+        }
+        if missing:
+            logger.warning(
+                f"Found {len(missing)} payments missing from the database: {list(missing.keys())}"
+            )
+
+        report.fetched += len(raw_events)
+        report.missing += len(missing)
+        report.created += await transaction_service.bulk_create_transactions(
+            missing, transaction_type="p2p"
+        )
+
+    async def run(self) -> IndexerReport:
+        """
+        Index all the events emitted since the last checkpoint.
+
+        Returns:
+            IndexerReport: Statistics about the indexed events.
+        """
+        report = IndexerReport()
+        db = SessionLocal()
+        try:
+            checkpoint = self._get_checkpoint(db)
+            logger.info(
+                f"Starting {self.name} indexer at offset {checkpoint.event_offset} (block {checkpoint.last_block})"
+            )
+
+            while True:
+                raw_events = await self.fetch_events(
+                    config.CURVEGRID_PAYMENT_CONTRACT_LABEL,
+                    PAYMENT_COMPLETED_SIGNATURE,
+                    self.batch_size,
+                    checkpoint.event_offset,
+                )
+                if not raw_events:
+                    break
+
+                await self._process_batch(raw_events, checkpoint, report)
+
+                checkpoint.event_offset += len(raw_events)
+                db.commit()
+
+                if len(raw_events) < self.batch_size:
+                    break
+
+            report.last_block = checkpoint.last_block
+        finally:
+            db.close()
+
+        logger.info(
+            f"{self.name} indexer done: {report.fetched} events, {report.missing} missing, {report.created} created"
+        )
+        return report
+
+
+payment_indexer = PaymentIndexer()
+
+
+if __name__ == "__main__":
+    init_db()
+    asyncio.run(payment_indexer.run())
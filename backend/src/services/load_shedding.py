@@ -0,0 +1,79 @@
+import random
+import time
+
+from fastapi import Request, Response, status
+from fastapi.responses import ORJSONResponse
+
+from src.config import config
+from src.models.base import pool_metrics
+from src.services.loop_monitor import loop_monitor
+from src.services.rate_limit import EXEMPT_PATHS
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Rejections are logged at most this often, logging each of them would add to the load
+LOG_INTERVAL_SECONDS = 10
+
+# Some requests always go through, so that the measures can show the recovery
+MAX_SHED_PROBABILITY = 0.9
+
+
+class LoadShedder:
+    """
+    Rejects a share of the requests while the worker is overloaded, so that the ones it accepts
+    are still served quickly.
+
+    Overload is measured by the event loop lag, which grows when the loop has more work than it
+    can handle or is blocked, and by the wait for a database connection. Requests start being
+    shed when a measure reaches its threshold, and the share of rejected requests grows with it.
+    """
+
+    def __init__(self):
+        self._shed_count = 0
+        self._logged_at = 0.0
+
+    def shed_probability(self) -> float:
+        """
+        Share of the requests to reject, 0 below the thresholds and growing to the maximum at twice
+        a threshold.
+        """
+        overload = 0.0
+        if config.LOAD_SHED_LOOP_LAG_MS > 0:
+            overload = max(overload, loop_monitor.lag.value * 1000 / config.LOAD_SHED_LOOP_LAG_MS)
+        if config.LOAD_SHED_POOL_WAIT_MS > 0:
+            overload = max(overload, pool_metrics.wait.value * 1000 / config.LOAD_SHED_POOL_WAIT_MS)
+        return min(max(overload - 1, 0.0), MAX_SHED_PROBABILITY)
+
+    def check(self, request: Request) -> Response | None:
+        """
+        Decide if a request should be rejected.
+
+        Args:
+            request: The incoming request.
+
+        Returns:
+            Response | None: A 503 response if the request is shed, None if it can go on.
+        """
+        if request.url.path in EXEMPT_PATHS:
+            return None
+        probability = self.shed_probability()
+        if probability == 0 or random.random() >= probability:
+            return None
+
+        self._shed_count += 1
+        if time.monotonic() - self._logged_at >= LOG_INTERVAL_SECONDS:
+            logger.warning(
+                f"Shed {self._shed_count} requests: loop lag {loop_monitor.lag.value * 1000:.0f}ms, "
+                f"pool wait {pool_metrics.wait.value * 1000:.0f}ms"
+            )
+            self._shed_count = 0
+            self._logged_at = time.monotonic()
+        return ORJSONResponse(
+            {"detail": "Server overloaded, try again later"},
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={"Retry-After": "1"},
+        )
+
+
+load_shedder = LoadShedder()
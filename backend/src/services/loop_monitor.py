@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import UTC, datetime
+
+from src.config import config
+from src.interfaces.debug import BlockingEvent, BlockingReport
+from src.utils.logger import setup_logger
+from src.utils.stats import DecayingAverage
+
+logger = setup_logger(__name__)
+
+# Interval between two measures of the event loop lag
+LAG_PROBE_SECONDS = 0.1
+
+# Upper bounds of the lag histogram, in milliseconds
+LAG_BUCKETS_MS = (1, 5, 10, 50, 100, 250, 500, 1000, 5000)
+
+BLOCKING_EVENTS_KEPT = 100
+STACK_DEPTH = 40
+
+
+class _SlowCallbackHandler(logging.Handler):
+    """Catches the slow callbacks reported by the asyncio logger in debug mode."""
+
+    def __init__(self, monitor: "LoopMonitor"):
+        super().__init__(logging.WARNING)
+        self.monitor = monitor
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if isinstance(record.msg, str) and record.msg.startswith("Executing") and record.args:
+            self.monitor.last_slow_callback = str(record.args[0])  # type: ignore[index]
+
+
+class LoopMonitor:
+    """
+    Measures the event loop lag of the worker, and in debug mode finds out what blocks it.
+
+    A probe task measures how late it wakes up. In debug mode (LOOP_MONITOR_DEBUG), a watchdog
+    thread also takes the stack of the event loop thread when the probe hasn't run for longer
+    than LOOP_BLOCKING_THRESHOLD_MS, which points at the code blocking the loop, typically sync
+    database or file calls. asyncio's own slow callback reports are attached when available.
+    """
+
+    lag: DecayingAverage
+    events: deque[BlockingEvent]
+    last_slow_callback: str | None
+    _watchdog: threading.Thread | None
+    _stall_stack: list[str] | None
+    _captured_heartbeat: float | None
+
+    def __init__(self):
+        self.lag = DecayingAverage(half_life_seconds=2)
+        self.max_lag = 0.0
+        self.stalls = 0
+        self.lag_histogram = dict.fromkeys([*map(str, LAG_BUCKETS_MS), "+Inf"], 0)
+        self.events = deque(maxlen=BLOCKING_EVENTS_KEPT)
+        self.last_slow_callback = None
+        self._heartbeat = time.monotonic()
+        self._watchdog = None
+        self._stopping = threading.Event()
+        self._stall_stack = None
+        self._captured_heartbeat = None
+        self._log_handler = _SlowCallbackHandler(self)
+
+    @property
+    def threshold(self) -> float:
+        return config.LOOP_BLOCKING_THRESHOLD_MS / 1000
+
+    def _watch(self, loop_thread_id: int) -> None:
+        while not self._stopping.wait(self.threshold / 4):
+            heartbeat = self._heartbeat
+            if (
+                time.monotonic() - heartbeat > self.threshold + LAG_PROBE_SECONDS
+                and self._captured_heartbeat != heartbeat
+            ):
+                frame = sys._current_frames().get(loop_thread_id)
+                if frame is not None:
+                    self._stall_stack = traceback.format_stack(frame)[-STACK_DEPTH:]
+                    self._captured_heartbeat = heartbeat
+
+    def _start_debug(self, loop: asyncio.AbstractEventLoop) -> None:
+        loop.set_debug(True)
+        loop.slow_callback_duration = self.threshold
+        logging.getLogger("asyncio").addHandler(self._log_handler)
+        self._stopping.clear()
+        self._watchdog = threading.Thread(
+            target=self._watch, args=(threading.get_ident(),), name="loop-watchdog", daemon=True
+        )
+        self._watchdog.start()
+        logger.info(f"Recording the event loop stalls longer than {config.LOOP_BLOCKING_THRESHOLD_MS}ms")
+
+    def _stop_debug(self) -> None:
+        self._stopping.set()
+        logging.getLogger("asyncio").removeHandler(self._log_handler)
+        self._watchdog = None
+
+    def _record(self, lag: float) -> None:
+        self.lag.record(lag)
+        self.max_lag = max(self.max_lag, lag)
+        lag_ms = lag * 1000
+        bucket = next((str(bound) for bound in LAG_BUCKETS_MS if lag_ms <= bound), "+Inf")
+        self.lag_histogram[bucket] += 1
+
+        if lag < self.threshold:
+            return
+        self.stalls += 1
+        if config.LOOP_MONITOR_DEBUG:
+            event = BlockingEvent(
+                detected_at=datetime.now(UTC),
+                duration_ms=lag_ms,
+                callback=self.last_slow_callback,
+                stack=self._stall_stack or [],
+            )
+            self.events.append(event)
+            logger.warning(
+                f"Event loop blocked for {lag_ms:.0f}ms"
+                + (f" in:\n{''.join(event.stack[-5:])}" if event.stack else "")
+            )
+        self._stall_stack = None
+        self.last_slow_callback = None
+
+    async def run(self) -> None:
+        """Measure the event loop lag until cancelled."""
+        loop = asyncio.get_running_loop()
+        if config.LOOP_MONITOR_DEBUG:
+            self._start_debug(loop)
+        try:
+            while True:
+                start = loop.time()
+                self._heartbeat = time.monotonic()
+                await asyncio.sleep(LAG_PROBE_SECONDS)
+                self._record(max(loop.time() - start - LAG_PROBE_SECONDS, 0))
+        finally:
+            if config.LOOP_MONITOR_DEBUG:
+                self._stop_debug()
+
+    def report(self) -> BlockingReport:
+        return BlockingReport(
+            pid=os.getpid(),
+            debug=config.LOOP_MONITOR_DEBUG,
+            threshold_ms=config.LOOP_BLOCKING_THRESHOLD_MS,
+            lag_ms=self.lag.value * 1000,
+            max_lag_ms=self.max_lag * 1000,
+            stalls=self.stalls,
+            lag_histogram=self.lag_histogram,
+            events=list(reversed(self.events)),
+        )
+
+
+loop_monitor = LoopMonitor()
@@ -1,13 +1,23 @@
-import aiohttp
+import asyncio
 
 from src.config import config
 from src.utils.ens import namehash
+from src.utils.eth_rpc import EthCall, eth_call_batch
+from src.utils.http import http_client
 from src.utils.logger import setup_logger
+from src.utils.tracing import span
 
 logger = setup_logger(__name__)
 
 
 class MultibaasService:
+    """
+    Curvegrid API client.
+
+    Avatars aren't cached here: the avatar_url column of the users table, shared by all the
+    workers and updated with the records, is their cache.
+    """
+
     def __init__(self):
         self.base_url = config.CURVEGRID_DEPLOYMENT_URL
         self.headers = {
@@ -26,6 +36,23 @@ class MultibaasService:
             bool: True if the username is available, False otherwise.
         """
         logger.debug(f"Checking if {username} is an available ENS subname")
+        if config.ENS_READ_BACKEND == "rpc":
+            try:
+                [output] = await eth_call_batch(
+                    [
+                        EthCall(
+                            to=config.ENS_REGISTRAR_CONTRACT_ADDRESS or "",
+                            signature="available(string)",
+                            args=(username,),
+                            output_types=("bool",),
+                        )
+                    ]
+                )
+            except Exception as e:
+                logger.error(f"Error checking ENS subname availability: {e}")
+                return False
+            return output is not None and output[0]
+
         api_url = f"{self.base_url}/api/v0/chains/ethereum/addresses/{config.CURVEGRID_ENS_REGISTRAR_CONTRACT_ADDRESS_ALIAS}/contracts/{config.CURVEGRID_ENS_REGISTRAR_CONTRACT_LABEL}/methods/available"
 
         args = {
@@ -35,13 +62,12 @@ class MultibaasService:
         }
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    api_url, headers=self.headers, json=args
-                ) as response:
-                    response.raise_for_status()
-                    result = await response.json()
-                    return result.get("result", {}).get("output", False)
+            async with http_client.session.post(
+                api_url, headers=self.headers, json=args
+            ) as response:
+                response.raise_for_status()
+                result = await response.json()
+                return result.get("result", {}).get("output", False)
         except Exception as e:
             logger.error(f"Error checking ENS subname availability: {e}")
             return False
@@ -69,16 +95,66 @@ class MultibaasService:
         }
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
+            async with http_client.session.post(
+                api_url, headers=self.headers, json=args
+            ) as response:
+                response.raise_for_status()
+                result = await response.json()
+                return result.get("status", 0) == 200
+        except Exception as e:
+            logger.error(f"Error registering ENS subname: {e}")
+            return False
+
+    async def get_ens_owner(self, ens: str) -> str | None:
+        """
+        Get the address owning the given ENS subname on-chain.
+
+        Args:
+            ens: The ENS subname to look up.
+
+        Returns:
+            str | None: The owner address, None if the name isn't registered or the lookup failed.
+        """
+        logger.debug(f"Getting the owner of {ens}")
+        if config.ENS_READ_BACKEND == "rpc":
+            try:
+                [output] = await eth_call_batch(
+                    [
+                        EthCall(
+                            to=config.ENS_REGISTRY_CONTRACT_ADDRESS or "",
+                            signature="owner(bytes32)",
+                            args=(bytes.fromhex(namehash(ens)[2:]),),
+                            output_types=("address",),
+                        )
+                    ]
+                )
+            except Exception as e:
+                logger.error(f"Error getting ENS owner: {e}")
+                return None
+            owner = output[0] if output is not None else None
+        else:
+            api_url = f"{self.base_url}/api/v0/chains/ethereum/addresses/{config.CURVEGRID_ENS_REGISTRY_CONTRACT_ADDRESS_ALIAS}/contracts/{config.CURVEGRID_ENS_REGISTRY_CONTRACT_LABEL}/methods/owner"
+
+            args = {
+                "args": [namehash(ens)],
+                "signature": "owner(bytes32)",
+                "contractOverride": False,
+            }
+
+            try:
+                async with http_client.session.post(
                     api_url, headers=self.headers, json=args
                 ) as response:
                     response.raise_for_status()
                     result = await response.json()
-                    return result.get("status", 0) == 200
-        except Exception as e:
-            logger.error(f"Error registering ENS subname: {e}")
-            return False
+                    owner = result.get("result", {}).get("output")
+            except Exception as e:
+                logger.error(f"Error getting ENS owner: {e}")
+                return None
+
+        if not owner or int(owner, 16) == 0:
+            return None
+        return owner
 
     async def change_ens_avatar(self, ens: str, image_url: str) -> bool:
         """
@@ -103,17 +179,45 @@ class MultibaasService:
         }
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    api_url, headers=self.headers, json=args
-                ) as response:
-                    response.raise_for_status()
-                    result = await response.json()
-                    return result.get("status", 0) == 200
+            async with http_client.session.post(
+                api_url, headers=self.headers, json=args
+            ) as response:
+                response.raise_for_status()
+                result = await response.json()
+                return result.get("status", 0) == 200
         except Exception as e:
             logger.error(f"Error changing ENS avatar: {e}")
             return False
 
+    @staticmethod
+    def _avatar_or_default(ens: str, record: str) -> str:
+        return record if record != "" else f"https://avatars.jakerunzer.com/{ens}"
+
+    async def _read_avatars_rpc(self, enses: list[str]) -> list[str]:
+        try:
+            outputs = await eth_call_batch(
+                [
+                    EthCall(
+                        to=config.ENS_REGISTRY_CONTRACT_ADDRESS or "",
+                        signature="text(bytes32,string)",
+                        args=(bytes.fromhex(namehash(ens)[2:]), "avatar"),
+                        output_types=("string",),
+                    )
+                    for ens in enses
+                ]
+            )
+        except Exception as e:
+            logger.error(f"Error getting ENS avatars: {e}")
+            return [""] * len(enses)
+
+        avatar_urls = []
+        for ens, output in zip(enses, outputs):
+            if output is None:
+                avatar_urls.append("")
+                continue
+            avatar_urls.append(self._avatar_or_default(ens, output[0]))
+        return avatar_urls
+
     async def get_ens_avatar(self, ens: str) -> str:
         """
         Get the avatar URL for the given ENS subname.
@@ -125,6 +229,10 @@ class MultibaasService:
             str: The URL of the avatar image.
         """
         logger.debug(f"Getting ENS avatar for {ens}")
+        if config.ENS_READ_BACKEND == "rpc":
+            [avatar_url] = await self._read_avatars_rpc([ens])
+            return avatar_url
+
         api_url = f"{self.base_url}/api/v0/chains/ethereum/addresses/{config.CURVEGRID_ENS_REGISTRY_CONTRACT_ADDRESS_ALIAS}/contracts/{config.CURVEGRID_ENS_REGISTRY_CONTRACT_LABEL}/methods/text"
 
         args = {
@@ -134,22 +242,34 @@ class MultibaasService:
         }
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    api_url, headers=self.headers, json=args
-                ) as response:
-                    response.raise_for_status()
-                    result = await response.json()
-                    output = result.get("result", {}).get("output", "")
-                    return (
-                        output
-                        if output != ""
-                        else f"https://avatars.jakerunzer.com/{ens}"
-                    )
+            async with http_client.session.post(
+                api_url, headers=self.headers, json=args
+            ) as response:
+                response.raise_for_status()
+                result = await response.json()
+                return self._avatar_or_default(ens, result.get("result", {}).get("output", ""))
         except Exception as e:
             logger.error(f"Error getting ENS avatar: {e}")
             return ""
 
+    async def get_ens_avatars(self, enses: list[str]) -> list[str]:
+        """
+        Get the avatar URLs of several ENS subnames, in a single batch with the RPC backend.
+
+        Args:
+            enses: The ENS subnames to get the avatars of.
+
+        Returns:
+            list[str]: The URLs of the avatar images, in the same order. Lookup errors are empty.
+        """
+        if not enses:
+            return []
+        logger.debug(f"Getting ENS avatars for {len(enses)} names")
+        with span("ens.avatars", count=len(enses)):
+            if config.ENS_READ_BACKEND == "rpc":
+                return await self._read_avatars_rpc(enses)
+            return list(await asyncio.gather(*[self.get_ens_avatar(ens) for ens in enses]))
+
     async def create_webhook(self, url: str, label: str) -> dict:
         """
         Create a new webhook in Curvegrid.
@@ -167,20 +287,19 @@ class MultibaasService:
         webhook_data = {"url": url, "label": label, "subscriptions": ["event.emitted"]}
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    api_url, headers=self.headers, json=webhook_data
-                ) as response:
-                    response.raise_for_status()
-                    result = await response.json()
-                    logger.info(
-                        f"Webhook created successfully with ID: {result.get('result', {}).get('id')}"
-                    )
-
-                    return {
-                        "webhook_id": result.get("result", {}).get("id"),
-                        "secret": result.get("result", {}).get("secret"),
-                    }
+            async with http_client.session.post(
+                api_url, headers=self.headers, json=webhook_data
+            ) as response:
+                response.raise_for_status()
+                result = await response.json()
+                logger.info(
+                    f"Webhook created successfully with ID: {result.get('result', {}).get('id')}"
+                )
+
+                return {
+                    "webhook_id": result.get("result", {}).get("id"),
+                    "secret": result.get("result", {}).get("secret"),
+                }
         except Exception as e:
             logger.error(f"Error creating webhook: {e}")
             raise Exception(f"Failed to create webhook: {e}")
@@ -199,14 +318,13 @@ class MultibaasService:
         api_url = f"{self.base_url}/api/v0/webhooks/{webhook_id}"
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    api_url, headers=self.headers
-                ) as response:
-                    response.raise_for_status()
-                    result = await response.json()
-                    logger.debug(f"Retrieved webhook: {result}")
-                    return result.get("result", {})
+            async with http_client.session.get(
+                api_url, headers=self.headers
+            ) as response:
+                response.raise_for_status()
+                result = await response.json()
+                logger.debug(f"Retrieved webhook: {result}")
+                return result.get("result", {})
         except Exception as e:
             logger.error(f"Error getting webhook: {e}")
             raise Exception(f"Failed to get webhook: {e}")
@@ -225,16 +343,52 @@ class MultibaasService:
         api_url = f"{self.base_url}/api/v0/webhooks/{webhook_id}"
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.delete(
-                    api_url, headers=self.headers
-                ) as response:
-                    response.raise_for_status()
-                    logger.info(f"Successfully deleted webhook with ID: {webhook_id}")
-                    return True
+            async with http_client.session.delete(
+                api_url, headers=self.headers
+            ) as response:
+                response.raise_for_status()
+                logger.info(f"Successfully deleted webhook with ID: {webhook_id}")
+                return True
         except Exception as e:
             logger.error(f"Error deleting webhook: {e}")
             raise Exception(f"Failed to delete webhook: {e}")
 
+    async def list_events(
+        self, contract_label: str, event_signature: str, limit: int, offset: int
+    ) -> list[dict]:
+        """
+        List the events emitted by a contract, oldest first.
+
+        Args:
+            contract_label: The Curvegrid label of the contract.
+            event_signature: The signature of the event to list.
+            limit: Maximum number of events to return.
+            offset: Number of events to skip.
+
+        Returns:
+            list[dict]: The raw events.
+        """
+        logger.debug(
+            f"Listing {event_signature} events of {contract_label} (limit={limit}, offset={offset})"
+        )
+        api_url = f"{self.base_url}/api/v0/events"
+        params = {
+            "contract_label": contract_label,
+            "event_signature": event_signature,
+            "limit": str(limit),
+            "offset": str(offset),
+        }
+
+        try:
+            async with http_client.session.get(
+                api_url, headers=self.headers, params=params
+            ) as response:
+                response.raise_for_status()
+                result = await response.json()
+                return result.get("result", []) or []
+        except Exception as e:
+            logger.error(f"Error listing events: {e}")
+            raise Exception(f"Failed to list events: {e}")
+
 
 multibaas_service = MultibaasService()
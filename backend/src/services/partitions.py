@@ -0,0 +1,303 @@
+import asyncio
+import csv
+import gzip
+import os
+import re
+import time
+from datetime import UTC, date, datetime
+from pathlib import Path
+from typing import Callable, Iterable
+
+from pydantic import BaseModel
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from src.config import config
+from src.models.base import SessionLocal, init_db
+from src.models.transaction import Transaction
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Partitions kept ready ahead of the current month
+PARTITION_MONTHS_AHEAD = 3
+
+# Serializes the DDL on the transactions table between workers and scripts
+PARTITION_LOCK_ID = 0x7472616E73  # "trans"
+
+PARTITION_NAME_PATTERN = re.compile(r"^transactions_y(\d{4})m(\d{2})$")
+
+ARCHIVE_COLUMNS = [column.name for column in Transaction.__table__.columns]
+
+ARCHIVE_SUFFIX = ".csv.gz"
+
+
+def archive_index_path(path: Path) -> Path:
+    """The file listing the usernames found in an archive file, one per line."""
+    return path.with_name(path.name.removesuffix(ARCHIVE_SUFFIX) + ".users")
+
+
+def month_start(moment: date | datetime) -> date:
+    return date(moment.year, moment.month, 1)
+
+
+def next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def previous_month(month: date) -> date:
+    return date(month.year - (month.month == 1), (month.month - 2) % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"transactions_y{month.year}m{month.month:02d}"
+
+
+class ArchiveReport(BaseModel):
+    partitions: list[str] = []
+    rows: int = 0
+
+
+class TransactionPartitionService:
+    """
+    Manages the monthly partitions of the transactions table.
+
+    Partitions are created ahead of time, and the ones older than TRANSACTIONS_HOT_MONTHS are
+    moved to gzipped CSV files in TRANSACTIONS_ARCHIVE_DIR, which are only read when a user
+    explicitly asks for their archived history. Each archive file comes with an index of the
+    usernames it contains, so that only the files holding a user's transactions are read.
+    """
+
+    _known_months: set[date]
+    _archive_indexes: dict[Path, frozenset[str]]
+
+    def __init__(self):
+        self._known_months = set()
+        # Archive files are never modified once written, neither are their indexes
+        self._archive_indexes = {}
+
+    @staticmethod
+    def _existing_months(db: Session) -> set[date]:
+        names = db.scalars(
+            text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE parent.relname = 'transactions'"
+            )
+        )
+        months = set()
+        for name in names:
+            match = PARTITION_NAME_PATTERN.match(name)
+            if match:
+                months.add(date(int(match.group(1)), int(match.group(2)), 1))
+        return months
+
+    async def ensure_partitions(self, moments: Iterable[date | datetime]) -> None:
+        """
+        Create the partitions receiving the given dates, if they don't exist yet.
+
+        This runs in its own transaction, as partitions created by a rolled back insert would
+        otherwise be assumed to exist.
+
+        Args:
+            moments: The dates of the rows about to be inserted.
+        """
+        missing = {month_start(moment) for moment in moments} - self._known_months
+        if not missing:
+            return
+
+        db = SessionLocal()
+        try:
+            existing = self._existing_months(db)
+            to_create = sorted(missing - existing)
+            if to_create:
+                db.execute(select(func.pg_advisory_xact_lock(PARTITION_LOCK_ID)))
+                for month in to_create:
+                    logger.info(f"Creating partition {partition_name(month)}")
+                    db.execute(
+                        text(
+                            f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF transactions "
+                            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month(month).isoformat()}')"
+                        )
+                    )
+                db.commit()
+        finally:
+            db.close()
+        self._known_months |= missing
+
+    async def create_upcoming_partitions(self) -> None:
+        """Make sure that the partitions of the current month and the next ones exist."""
+        month = month_start(datetime.now(UTC))
+        months = [month]
+        for _ in range(PARTITION_MONTHS_AHEAD):
+            month = next_month(month)
+            months.append(month)
+        await self.ensure_partitions(months)
+
+    @staticmethod
+    def _write_file(path: Path, write: Callable[[Path], None]) -> None:
+        # Written next to the destination and renamed once complete, so readers never see a partial file
+        temporary_path = path.with_suffix(".tmp")
+        write(temporary_path)
+        with open(temporary_path, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def _write_archive(cls, path: Path, rows: list[dict]) -> None:
+        def write_rows(temporary_path: Path) -> None:
+            with gzip.open(temporary_path, "wt", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=ARCHIVE_COLUMNS)
+                writer.writeheader()
+                writer.writerows(rows)
+
+        # The index goes first, an archive file is never visible without it
+        cls._write_index(path, rows)
+        cls._write_file(path, write_rows)
+
+    @classmethod
+    def _write_index(cls, path: Path, rows: Iterable[dict]) -> None:
+        usernames = {row[key] for row in rows for key in ("sender_username", "receiver_username")}
+
+        def write_usernames(temporary_path: Path) -> None:
+            temporary_path.write_text("".join(f"{username}\n" for username in sorted(usernames)))
+
+        cls._write_file(archive_index_path(path), write_usernames)
+
+    @classmethod
+    def _index_archives(cls) -> int:
+        indexed = 0
+        for path in sorted(Path(config.TRANSACTIONS_ARCHIVE_DIR).glob(f"transactions_y*{ARCHIVE_SUFFIX}")):
+            if archive_index_path(path).exists():
+                continue
+            with gzip.open(path, "rt", newline="") as f:
+                cls._write_index(path, csv.DictReader(f))
+            indexed += 1
+        return indexed
+
+    async def index_archives(self) -> int:
+        """
+        Write the missing username indexes, of the files archived before they existed.
+
+        Returns:
+            int: The number of archive files indexed.
+        """
+        indexed = await asyncio.to_thread(self._index_archives)
+        if indexed:
+            logger.info(f"Indexed {indexed} archive files")
+        return indexed
+
+    async def archive_partitions(self, hot_months: int | None = None) -> ArchiveReport:
+        """
+        Move the partitions older than the hot months to the archive directory.
+
+        A partition is only dropped once its archive file is written, a failed run leaves the
+        data in the database and can simply be retried.
+
+        Args:
+            hot_months: Number of months kept in the database, the current one included.
+
+        Returns:
+            ArchiveReport: The archived partitions and their number of rows.
+        """
+        hot_months = hot_months or config.TRANSACTIONS_HOT_MONTHS
+        cutoff = month_start(datetime.now(UTC))
+        for _ in range(hot_months - 1):
+            cutoff = previous_month(cutoff)
+
+        archive_dir = Path(config.TRANSACTIONS_ARCHIVE_DIR)
+        archive_dir.mkdir(parents=True, exist_ok=True)
+
+        report = ArchiveReport()
+        db = SessionLocal()
+        try:
+            for month in sorted(self._existing_months(db)):
+                if month >= cutoff:
+                    break
+                name = partition_name(month)
+                db.execute(select(func.pg_advisory_xact_lock(PARTITION_LOCK_ID)))
+                rows = [
+                    dict(row)
+                    for row in db.execute(text(f"SELECT * FROM {name} ORDER BY id")).mappings()
+                ]
+                for row in rows:
+                    row["created_at"] = row["created_at"].isoformat()
+
+                if rows:
+                    # A month can be archived several times if old payments were backfilled since
+                    path = archive_dir / f"{name}_{int(time.time())}{ARCHIVE_SUFFIX}"
+                    await asyncio.to_thread(self._write_archive, path, rows)
+                    logger.info(f"Archived {len(rows)} transactions from {name} to {path}")
+
+                db.execute(text(f"ALTER TABLE transactions DETACH PARTITION {name}"))
+                db.execute(text(f"DROP TABLE {name}"))
+                db.commit()
+                self._known_months.discard(month)
+
+                report.partitions.append(name)
+                report.rows += len(rows)
+        finally:
+            db.close()
+        return report
+
+    def _archive_usernames(self, path: Path) -> frozenset[str] | None:
+        usernames = self._archive_indexes.get(path)
+        if usernames is None:
+            try:
+                usernames = frozenset(archive_index_path(path).read_text().splitlines())
+            except FileNotFoundError:
+                # Archived before the indexes existed, the file has to be read
+                return None
+            self._archive_indexes[path] = usernames
+        return usernames
+
+    def _read_archives(self, username: str) -> list[Transaction]:
+        transactions: dict[str, Transaction] = {}
+        for path in sorted(Path(config.TRANSACTIONS_ARCHIVE_DIR).glob(f"transactions_y*{ARCHIVE_SUFFIX}")):
+            usernames = self._archive_usernames(path)
+            if usernames is not None and username not in usernames:
+                continue
+            with gzip.open(path, "rt", newline="") as f:
+                for row in csv.DictReader(f):
+                    if username not in (row["sender_username"], row["receiver_username"]):
+                        continue
+                    # The same rows can be in two files if a run was interrupted after writing its file
+                    transactions[row["transaction_hash"]] = Transaction(
+                        id=int(row["id"]),
+                        receiver_username=row["receiver_username"],
+                        sender_username=row["sender_username"],
+                        amount=int(row["amount"]),
+                        type=row["type"],
+                        transaction_hash=row["transaction_hash"],
+                        created_at=datetime.fromisoformat(row["created_at"]),
+                    )
+        return list(transactions.values())
+
+    async def get_archived_transactions(self, username: str) -> list[Transaction]:
+        """
+        Read a user's transactions from the archive files.
+
+        Args:
+            username: The username of the user.
+
+        Returns:
+            list[Transaction]: The archived transactions sent or received by the user, detached
+            from any session.
+        """
+        return await asyncio.to_thread(self._read_archives, username)
+
+
+transaction_partition_service = TransactionPartitionService()
+
+
+async def main() -> None:
+    await transaction_partition_service.create_upcoming_partitions()
+    await transaction_partition_service.index_archives()
+    report = await transaction_partition_service.archive_partitions()
+    logger.info(f"Archived {report.rows} transactions from {len(report.partitions)} partitions")
+
+
+if __name__ == "__main__":
+    init_db()
+    asyncio.run(main())
@@ -0,0 +1,148 @@
+import asyncio
+import cProfile
+import importlib.util
+import random
+import re
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from fastapi import Request, Response
+
+from src.config import config
+from src.services.auth import is_admin_token
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Sent by administrators to profile a request
+PROFILE_HEADER = "x-profile"
+
+# Name of the profile of a request, returned to the client
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+# pyinstrument gives flame graphs of the awaited coroutines, cProfile is the fallback
+USE_PYINSTRUMENT = importlib.util.find_spec("pyinstrument") is not None
+if USE_PYINSTRUMENT:
+    from pyinstrument import Profiler  # type: ignore[import-not-found, unused-ignore]
+
+PROFILE_NAME_PATTERN = re.compile(r"^[\w.-]+\.(html|prof)$")
+
+
+class RequestProfiler:
+    """
+    Profiles requests asked for by administrators, and a sample of all the requests.
+
+    Profiles are written to PROFILE_DIR, as pyinstrument HTML pages when it is installed or as
+    cProfile stats otherwise (open them with snakeviz or pstats). Only the newest
+    PROFILE_MAX_FILES profiles younger than PROFILE_MAX_AGE_HOURS are kept.
+
+    A single request is profiled at a time by each worker, as profilers can't be nested. cProfile
+    also records the other requests handled by the event loop meanwhile.
+    """
+
+    _active: bool
+
+    def __init__(self):
+        self._active = False
+
+    def should_profile(self, request: Request) -> bool:
+        if not config.PROFILING_ENABLED or self._active:
+            return False
+        if request.headers.get(PROFILE_HEADER) and is_admin_token(request.cookies.get("solva_auth")):
+            return True
+        return config.PROFILE_SAMPLE_RATE > 0 and random.random() < config.PROFILE_SAMPLE_RATE
+
+    @staticmethod
+    def _profile_path(request: Request, duration: float, extension: str) -> Path:
+        slug = re.sub(r"[^\w]+", "_", request.url.path).strip("_") or "root"
+        timestamp = datetime.now(UTC).strftime("%Y%m%dT%H%M%S%f")
+        return Path(config.PROFILE_DIR) / (
+            f"{timestamp}_{request.method}_{slug}_{duration * 1000:.0f}ms.{extension}"
+        )
+
+    @staticmethod
+    def _prune() -> None:
+        profiles = sorted(
+            (path for path in Path(config.PROFILE_DIR).iterdir() if PROFILE_NAME_PATTERN.match(path.name)),
+            key=lambda path: path.name,
+            reverse=True,
+        )
+        expires_at = time.time() - config.PROFILE_MAX_AGE_HOURS * 3600
+        for index, path in enumerate(profiles):
+            if index >= config.PROFILE_MAX_FILES or path.stat().st_mtime < expires_at:
+                path.unlink(missing_ok=True)
+
+    def _save(self, path: Path, profiler: "cProfile.Profile | Profiler") -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if isinstance(profiler, cProfile.Profile):
+            profiler.dump_stats(path)
+        else:
+            path.write_text(profiler.output_html())
+        self._prune()
+
+    async def profile(
+        self, request: Request, call_next: Callable[[Request], Awaitable[Response]]
+    ) -> Response:
+        """
+        Handle a request under a profiler and save its profile.
+
+        Args:
+            request: The request to profile.
+            call_next: The rest of the application.
+
+        Returns:
+            Response: The response, with the name of the profile in a header.
+        """
+        self._active = True
+        start = time.perf_counter()
+        profiler: cProfile.Profile | Profiler
+        if USE_PYINSTRUMENT:
+            profiler = Profiler(async_mode="enabled")
+            profiler.start()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        try:
+            response = await call_next(request)
+        finally:
+            if isinstance(profiler, cProfile.Profile):
+                profiler.disable()
+            else:
+                profiler.stop()
+            self._active = False
+        duration = time.perf_counter() - start
+
+        extension = "prof" if isinstance(profiler, cProfile.Profile) else "html"
+        path = self._profile_path(request, duration, extension)
+        try:
+            await asyncio.to_thread(self._save, path, profiler)
+        except OSError as e:
+            logger.error(f"Error saving the profile of {request.url.path}: {e}")
+            return response
+        logger.info(f"Profiled {request.method} {request.url.path} in {duration * 1000:.0f}ms: {path}")
+        response.headers[PROFILE_ID_HEADER] = path.name
+        return response
+
+    @staticmethod
+    def list_profiles() -> list[str]:
+        """Names of the saved profiles, newest first."""
+        directory = Path(config.PROFILE_DIR)
+        if not directory.is_dir():
+            return []
+        return sorted(
+            (path.name for path in directory.iterdir() if PROFILE_NAME_PATTERN.match(path.name)),
+            reverse=True,
+        )
+
+    @staticmethod
+    def get_profile_path(name: str) -> Path | None:
+        """Path of a saved profile, None if there is no such profile."""
+        if not PROFILE_NAME_PATTERN.match(name):
+            return None
+        path = Path(config.PROFILE_DIR) / name
+        return path if path.is_file() else None
+
+
+request_profiler = RequestProfiler()
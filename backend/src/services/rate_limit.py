@@ -0,0 +1,164 @@
+import math
+import time
+from typing import NamedTuple
+
+from fastapi import Request, Response, status
+from fastapi.responses import ORJSONResponse
+
+from src.config import config
+from src.services.auth import get_token_address
+from src.utils.logger import setup_logger
+from src.utils.resp import RespClient
+
+logger = setup_logger(__name__)
+
+WINDOW_SECONDS = 60
+
+# Webhooks come in bursts from a few provider IPs, and dropping them would lose payments
+EXEMPT_PATHS = {"/curvegrid/internal-webhook", "/thirdweb/webhook"}
+
+# Seconds during which the shared store isn't used again after an error
+STORE_RETRY_SECONDS = 30
+
+
+class RateLimitRule(NamedTuple):
+    path: str
+    limit: int  # Requests per client IP and per minute
+    prefix: bool = False  # Whether the rule covers the paths starting with its path
+
+    def matches(self, path: str) -> bool:
+        return path.startswith(self.path) if self.prefix else path == self.path
+
+
+# Public routes calling Curvegrid or checking signatures get stricter limits than the default.
+# Paths are matched exactly, /auth/register/status/{job_id} is polled and keeps the default limits.
+RATE_LIMIT_RULES = [
+    RateLimitRule("/auth/login", 10),
+    RateLimitRule("/auth/message", 30),
+    RateLimitRule("/auth/register", 10),
+    RateLimitRule("/auth/available-ens/", 60, prefix=True),
+]
+
+
+class RateLimiter:
+    """
+    Sliding window rate limits, per client IP and per authenticated address.
+
+    Each key counts its requests in fixed windows, and the previous window is weighted by how
+    much of it still overlaps the sliding window. Counters are kept in memory, or in a Redis
+    compatible store shared by all the workers when RATE_LIMIT_REDIS_URL is set. The limits of
+    a worker fall back to its own memory while the store is unreachable.
+    """
+
+    _counters: dict[str, tuple[int, int, int]]  # Key -> window, current count, previous count
+    _store: RespClient | None
+    _store_failed_at: float | None
+
+    def __init__(self):
+        self._counters = {}
+        self._store = RespClient(config.RATE_LIMIT_REDIS_URL) if config.RATE_LIMIT_REDIS_URL else None
+        self._store_failed_at = None
+        self._swept_window = 0
+
+    def _hit_local(self, key: str, window: int) -> tuple[int, int]:
+        if window != self._swept_window:
+            # Counters of the windows before the previous one don't weigh anything anymore
+            self._counters = {
+                counter_key: counter
+                for counter_key, counter in self._counters.items()
+                if counter[0] >= window - 1
+            }
+            self._swept_window = window
+
+        counter_window, current, previous = self._counters.get(key, (window, 0, 0))
+        if counter_window != window:
+            previous = current if counter_window == window - 1 else 0
+            current = 0
+        current += 1
+        self._counters[key] = (window, current, previous)
+        return current, previous
+
+    async def _hit_store(self, store: RespClient, key: str, window: int) -> tuple[int, int]:
+        current_key = f"ratelimit:{key}:{window}"
+        current, _, previous = await store.pipeline(
+            ("INCR", current_key),
+            ("EXPIRE", current_key, 2 * WINDOW_SECONDS),
+            ("GET", f"ratelimit:{key}:{window - 1}"),
+        )
+        if not isinstance(current, int):
+            raise Exception(f"Invalid INCR reply: {current}")
+        return current, int(previous) if isinstance(previous, str) else 0
+
+    async def hit(self, key: str, limit: int) -> float | None:
+        """
+        Count a request against the limit of a key.
+
+        Args:
+            key: The client the limit applies to.
+            limit: Maximum number of requests in the sliding window.
+
+        Returns:
+            float | None: Seconds to wait before retrying if the limit is exceeded, None otherwise.
+        """
+        now = time.time()
+        window = int(now // WINDOW_SECONDS)
+        elapsed = now / WINDOW_SECONDS - window
+
+        store = self._store
+        if self._store_failed_at is not None and now - self._store_failed_at < STORE_RETRY_SECONDS:
+            store = None
+        if store is not None:
+            try:
+                current, previous = await self._hit_store(store, key, window)
+                self._store_failed_at = None
+            except Exception as e:
+                logger.warning(f"Rate limit store unavailable, limiting in memory: {e}")
+                self._store_failed_at = now
+                current, previous = self._hit_local(key, window)
+        else:
+            current, previous = self._hit_local(key, window)
+
+        if previous * (1 - elapsed) + current <= limit:
+            return None
+        if current > limit:
+            return (1 - elapsed) * WINDOW_SECONDS
+        # Time until the weight of the previous window makes room for one more request
+        return max((1 - (limit - current) / previous - elapsed) * WINDOW_SECONDS, 1)
+
+    async def check(self, request: Request) -> Response | None:
+        """
+        Count a request against the limits of its client.
+
+        Args:
+            request: The incoming request.
+
+        Returns:
+            Response | None: A 429 response if a limit is exceeded, None if the request can go on.
+        """
+        path = request.url.path
+        if not config.RATE_LIMIT_ENABLED or path in EXEMPT_PATHS:
+            return None
+
+        # The proxy's address unless it is listed in FORWARDED_ALLOW_IPS
+        ip = request.client.host if request.client else "unknown"
+        limits = [(f"ip:{ip}", config.RATE_LIMIT_IP_PER_MINUTE)]
+        for rule in RATE_LIMIT_RULES:
+            if rule.matches(path):
+                limits.append((f"ip:{ip}:{rule.path}", rule.limit))
+        address = get_token_address(request.cookies.get("solva_auth"))
+        if address is not None:
+            limits.append((f"address:{address.lower()}", config.RATE_LIMIT_ADDRESS_PER_MINUTE))
+
+        for key, limit in limits:
+            retry_after = await self.hit(key, limit)
+            if retry_after is not None:
+                logger.info(f"Rate limit exceeded for {key} on {path}")
+                return ORJSONResponse(
+                    {"detail": "Too many requests"},
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    headers={"Retry-After": str(math.ceil(retry_after))},
+                )
+        return None
+
+
+rate_limiter = RateLimiter()
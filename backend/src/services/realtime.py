@@ -0,0 +1,161 @@
+import asyncio
+import json
+from typing import Any
+
+from sqlalchemy import func, select
+from sqlalchemy.event import listen
+from sqlalchemy.orm import Session
+
+from src.config import config
+from src.models.base import SessionLocal, connect_direct
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+NOTIFY_CHANNEL = "solva_events"
+
+# Events kept for a slow client before dropping new ones, it can still refetch its history
+SUBSCRIBER_QUEUE_SIZE = 100
+
+LISTENER_RECONNECT_DELAY = 5
+
+
+class RealtimeHub:
+    """
+    In-process pub/sub delivering events to the connected clients of each user.
+
+    With several workers, events go through Postgres NOTIFY and every worker LISTENs on the
+    channel, so a client receives events whichever worker handled the write.
+    """
+
+    _subscribers: dict[str, set[asyncio.Queue]]
+    # Raw psycopg2 connection dedicated to LISTEN, kept out of the pool
+    _connection: Any | None
+    _loop: asyncio.AbstractEventLoop | None
+
+    def __init__(self):
+        self._subscribers = {}
+        self._connection = None
+        self._loop = None
+
+    def subscribe(self, username: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.setdefault(username, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, username: str, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(username)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[username]
+
+    def _dispatch(self, username: str, event: dict) -> None:
+        for queue in self._subscribers.get(username, ()):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                logger.warning(f"Dropping event for slow subscriber of {username}")
+
+    def _dispatch_all(self, usernames: set[str], event: dict) -> None:
+        for username in usernames:
+            self._dispatch(username, event)
+
+    def publish(self, usernames: set[str], event: dict, db: Session | None = None) -> None:
+        """
+        Publish an event to the clients of the given users.
+
+        Args:
+            usernames: The users concerned by the event.
+            event: The JSON-serializable event.
+            db: Session of the write producing the event, which is then sent when (and only if)
+                its transaction commits.
+        """
+        if not config.REALTIME_POSTGRES_BRIDGE:
+            if db is None:
+                self._dispatch_all(usernames, event)
+            else:
+                listen(
+                    db,
+                    "after_commit",
+                    lambda _session: self._dispatch_all(usernames, event),
+                    once=True,
+                )
+            return
+
+        payload = json.dumps({"usernames": sorted(usernames), "event": event})
+        statement = select(func.pg_notify(NOTIFY_CHANNEL, payload))
+        if db is not None:
+            db.execute(statement)
+            return
+
+        session = SessionLocal()
+        try:
+            session.execute(statement)
+            session.commit()
+        finally:
+            session.close()
+
+    def _on_notify(self) -> None:
+        connection = self._connection
+        if connection is None:
+            return
+        try:
+            connection.poll()
+        except Exception as e:
+            logger.error(f"Lost the realtime listener connection: {e}")
+            self._close_connection()
+            if self._loop is not None:
+                self._loop.call_later(LISTENER_RECONNECT_DELAY, self._connect)
+            return
+
+        while connection.notifies:
+            notification = connection.notifies.pop(0)
+            try:
+                message = json.loads(notification.payload)
+                self._dispatch_all(set(message["usernames"]), message["event"])
+            except (ValueError, KeyError) as e:
+                logger.error(f"Invalid realtime notification: {e}")
+
+    def _connect(self) -> None:
+        try:
+            connection = connect_direct()
+            connection.autocommit = True
+            with connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+        except Exception as e:
+            logger.error(f"Couldn't start the realtime listener: {e}")
+            if self._loop is not None:
+                self._loop.call_later(LISTENER_RECONNECT_DELAY, self._connect)
+            return
+
+        self._connection = connection
+        if self._loop is not None:
+            self._loop.add_reader(connection.fileno(), self._on_notify)
+        logger.info(f"Listening for realtime events on {NOTIFY_CHANNEL}")
+
+    def _close_connection(self) -> None:
+        if self._connection is None:
+            return
+        if self._loop is not None:
+            try:
+                self._loop.remove_reader(self._connection.fileno())
+            except Exception:
+                pass
+        self._connection.close()
+        self._connection = None
+
+    async def start(self) -> None:
+        """Start listening for the events published by the other workers."""
+        if not config.REALTIME_POSTGRES_BRIDGE:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._connect()
+
+    async def stop(self) -> None:
+        self._close_connection()
+        self._loop = None
+
+
+realtime_hub = RealtimeHub()
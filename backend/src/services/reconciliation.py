@@ -0,0 +1,273 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+from typing import Literal
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import select
+
+from src.config import config
+from src.interfaces.curvegrid import CurvegridEvent
+from src.models.base import get_session, init_db
+from src.models.transaction_hash import TransactionHash
+from src.services.indexer import PAYMENT_COMPLETED_SIGNATURE, EventsFetcher
+from src.services.multibaas import multibaas_service
+from src.services.transaction import transaction_service
+from src.services.user import user_service
+from src.utils.logger import setup_logger
+from src.utils.payments import PaymentEvent, parse_payment_inputs
+
+logger = setup_logger(__name__)
+
+TRANSFER_SIGNATURE = "Transfer(address,address,uint256)"
+
+# Hashes of the missing transactions listed in the report, the others are only counted
+MAX_REPORTED_HASHES = 100
+
+
+class ReconciliationReport(BaseModel):
+    since: datetime
+    until: datetime
+    payments: int = 0  # PaymentCompleted events in the window
+    topups: int = 0  # Transfers to users from the on-ramp senders in the window
+    missing: int = 0  # Events whose transaction isn't in the database
+    created: int = 0  # The others involve addresses unknown to the database
+    missing_hashes: list[str] = []
+
+
+def sorted_difference(items: list[str], others: list[str]) -> list[str]:
+    """
+    Items missing from other items, both sorted, in a single pass over the two lists.
+
+    Args:
+        items: The sorted items to look for.
+        others: The sorted items to look in.
+
+    Returns:
+        list[str]: The items not in the others, sorted.
+    """
+    missing = []
+    index = 0
+    for item in items:
+        while index < len(others) and others[index] < item:
+            index += 1
+        if index == len(others) or others[index] != item:
+            missing.append(item)
+    return missing
+
+
+def _event_time(event: CurvegridEvent) -> datetime | None:
+    if event.triggeredAt is None:
+        return None
+    if event.triggeredAt.tzinfo is None:
+        return event.triggeredAt.replace(tzinfo=UTC)
+    return event.triggeredAt
+
+
+class LedgerReconciler:
+    """
+    Checks the transactions table against the chain over a time window.
+
+    Payments are the PaymentCompleted events of the payment contract, and top-ups the USDC
+    transfers to users from the on-ramp addresses listed in LEDGER_TOPUP_SENDER_ADDRESSES, the
+    ones the Thirdweb webhooks report. Other incoming transfers aren't top-ups, and top-ups
+    are only reconciled when senders are listed. Transactions missing from the database, after
+    a lost or rejected webhook, are inserted.
+
+    Events are listed oldest first, so the window is found with a few single event requests,
+    and then read in chunks of CURVEGRID_INDEXER_BATCH_SIZE events. Each chunk is diffed with
+    the recorded hashes as two sorted lists and inserted before the next one is read, so the
+    memory used doesn't depend on the size of the window.
+    """
+
+    def __init__(self, fetch_events: EventsFetcher | None = None, batch_size: int | None = None):
+        self.fetch_events = fetch_events or multibaas_service.list_events
+        self.batch_size = batch_size or config.CURVEGRID_INDEXER_BATCH_SIZE
+
+    async def _is_before(
+        self, contract_label: str, event_signature: str, offset: int, since: datetime
+    ) -> bool:
+        raw_events = await self.fetch_events(contract_label, event_signature, 1, offset)
+        if not raw_events:
+            return False
+        try:
+            event_time = _event_time(CurvegridEvent(**raw_events[0]))
+        except ValidationError:
+            return False
+        return event_time is not None and event_time < since
+
+    async def _find_start(self, contract_label: str, event_signature: str, since: datetime) -> int:
+        """Offset of the first event from since, found by exponential then binary search."""
+        if not await self._is_before(contract_label, event_signature, 0, since):
+            return 0
+        low, step = 0, 1
+        while await self._is_before(contract_label, event_signature, low + step, since):
+            low += step
+            step *= 2
+        high = low + step
+        while high - low > 1:
+            middle = (low + high) // 2
+            if await self._is_before(contract_label, event_signature, middle, since):
+                low = middle
+            else:
+                high = middle
+        return high
+
+    @staticmethod
+    def _parse_payments(events: list[CurvegridEvent]) -> dict[str, PaymentEvent]:
+        payments = {}
+        for event in events:
+            payment = parse_payment_inputs(event.event.inputs)
+            if payment is None:
+                continue
+            event_time = _event_time(event)
+            if payment.timestamp is None and event_time is not None:
+                payment = payment._replace(timestamp=int(event_time.timestamp()))
+            payments[event.transaction.txHash] = payment
+        return payments
+
+    @staticmethod
+    async def _parse_topups(events: list[CurvegridEvent]) -> dict[str, PaymentEvent]:
+        transfers = []
+        for event in events:
+            inputs = {input_data.name: input_data.value for input_data in event.event.inputs}
+            try:
+                amount = int(inputs["value"])
+                sender_address, receiver_address = inputs["from"], inputs["to"]
+            except (KeyError, ValueError):
+                logger.warning(f"Skipping malformed transfer {event.transaction.txHash}: {inputs}")
+                continue
+            # Filtered before looking up the users, most USDC transfers have nothing to do with them
+            if str(sender_address).lower() in config.LEDGER_TOPUP_SENDER_ADDRESSES:
+                transfers.append((event, receiver_address, amount))
+        if not transfers:
+            return {}
+
+        users = await user_service.get_users_by_addresses(
+            {receiver for _, receiver, _ in transfers}, read_only=True
+        )
+        topups: dict[str, PaymentEvent] = {}
+        for event, receiver_address, amount in transfers:
+            if receiver_address not in users:
+                continue
+            event_time = _event_time(event)
+            # Recorded like the Thirdweb webhooks, with the user as sender and receiver
+            topups.setdefault(
+                event.transaction.txHash,
+                PaymentEvent(
+                    receiver_address,
+                    receiver_address,
+                    amount,
+                    int(event_time.timestamp()) if event_time is not None else None,
+                ),
+            )
+        return topups
+
+    async def _reconcile_chunk(
+        self,
+        transactions: dict[str, PaymentEvent],
+        transaction_type: Literal["topup", "p2p"],
+        report: ReconciliationReport,
+    ) -> None:
+        hashes = sorted(transactions)
+        with get_session() as db:
+            # Sorted by code point like Python strings, whatever the collation of the database
+            recorded = list(
+                db.scalars(
+                    select(TransactionHash.transaction_hash)
+                    .where(TransactionHash.transaction_hash.in_(hashes))
+                    .order_by(TransactionHash.transaction_hash.collate("C"))
+                )
+            )
+        missing = sorted_difference(hashes, recorded)
+        if not missing:
+            return
+
+        logger.warning(f"Found {len(missing)} {transaction_type} transactions missing from the database")
+        report.missing += len(missing)
+        report.missing_hashes.extend(missing[: MAX_REPORTED_HASHES - len(report.missing_hashes)])
+        report.created += await transaction_service.bulk_create_transactions(
+            {transaction_hash: transactions[transaction_hash] for transaction_hash in missing},
+            transaction_type=transaction_type,
+        )
+
+    async def _reconcile_events(
+        self,
+        contract_label: str,
+        event_signature: str,
+        transaction_type: Literal["topup", "p2p"],
+        report: ReconciliationReport,
+    ) -> None:
+        offset = await self._find_start(contract_label, event_signature, report.since)
+        while True:
+            raw_events = await self.fetch_events(
+                contract_label, event_signature, self.batch_size, offset
+            )
+            offset += len(raw_events)
+
+            events = []
+            ended = len(raw_events) < self.batch_size
+            for raw_event in raw_events:
+                try:
+                    event = CurvegridEvent(**raw_event)
+                except ValidationError as e:
+                    logger.warning(f"Skipping malformed event: {e}")
+                    continue
+                event_time = _event_time(event)
+                if event_time is not None and event_time >= report.until:
+                    ended = True
+                    break
+                # Events without a time are checked whatever the window
+                if event_time is None or event_time >= report.since:
+                    events.append(event)
+
+            if transaction_type == "p2p":
+                transactions = self._parse_payments(events)
+                report.payments += len(transactions)
+            else:
+                transactions = await self._parse_topups(events)
+                report.topups += len(transactions)
+            if transactions:
+                await self._reconcile_chunk(transactions, transaction_type, report)
+
+            if ended:
+                break
+
+    async def run(
+        self, since: datetime | None = None, until: datetime | None = None
+    ) -> ReconciliationReport:
+        """
+        Reconcile the payments and top-ups of a time window.
+
+        Args:
+            since: Start of the window, LEDGER_RECONCILE_WINDOW_HOURS before its end by default.
+            until: End of the window, excluded, now by default.
+
+        Returns:
+            ReconciliationReport: What was found on chain, and what was missing from the database.
+        """
+        until = until or datetime.now(UTC)
+        since = since or until - timedelta(hours=config.LEDGER_RECONCILE_WINDOW_HOURS)
+        report = ReconciliationReport(since=since, until=until)
+
+        await self._reconcile_events(
+            config.CURVEGRID_PAYMENT_CONTRACT_LABEL, PAYMENT_COMPLETED_SIGNATURE, "p2p", report
+        )
+        if config.CURVEGRID_USDC_CONTRACT_LABEL and config.LEDGER_TOPUP_SENDER_ADDRESSES:
+            await self._reconcile_events(
+                config.CURVEGRID_USDC_CONTRACT_LABEL, TRANSFER_SIGNATURE, "topup", report
+            )
+
+        logger.info(
+            f"Reconciled the ledger from {since:%Y-%m-%d %H:%M} to {until:%Y-%m-%d %H:%M}: "
+            f"{report.payments} payments, {report.topups} top-ups, {report.missing} missing, "
+            f"{report.created} created"
+        )
+        return report
+
+
+ledger_reconciler = LedgerReconciler()
+
+
+if __name__ == "__main__":
+    init_db()
+    asyncio.run(ledger_reconciler.run())
@@ -0,0 +1,233 @@
+import asyncio
+from datetime import timedelta
+from uuid import uuid4
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from src.config import config
+from src.models.base import SessionLocal
+from src.models.registration_job import RegistrationJob
+from src.services.ens_registry import ens_registry_service
+from src.services.multibaas import multibaas_service
+from src.services.user import user_service
+from src.utils.ens import get_ens_from_username
+from src.utils.ethereum import format_eth_address
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Jobs enqueued by other workers, or left by a dead one, are picked up after at most this delay
+REGISTRATION_POLL_SECONDS = 5
+
+# A claimed job is left to its worker for this long, then retried by another one
+REGISTRATION_LEASE = timedelta(minutes=5)
+
+
+class RegistrationConflictError(Exception):
+    pass
+
+
+class RegistrationUserError(Exception):
+    pass
+
+
+class RegistrationService:
+    """
+    Registers the ENS subnames of new users in the background.
+
+    Requests only reserve the username with a pending job. The on-chain registration is done by
+    worker tasks running in each process: a job is claimed with a lease committed before its
+    transaction is submitted, so it is processed by one worker at a time without holding a
+    database transaction open, and is retried by another worker if its worker dies.
+    """
+
+    _wakeup: asyncio.Event
+
+    def __init__(self):
+        self._wakeup = asyncio.Event()
+
+    async def enqueue(self, address: str, username: str) -> RegistrationJob:
+        """
+        Reserve a username for an address and schedule its ENS registration.
+
+        Enqueuing the same registration again returns the pending job.
+
+        Args:
+            address: The wallet address of the user.
+            username: The username to register.
+
+        Returns:
+            RegistrationJob: The pending job.
+
+        Raises:
+            RegistrationConflictError: If the username is reserved by another address, or the
+                address is already registering another username.
+        """
+        db = SessionLocal()
+        try:
+            pending = db.scalar(
+                select(RegistrationJob).where(
+                    RegistrationJob.address == address, RegistrationJob.status == "pending"
+                )
+            )
+            if pending is not None:
+                if pending.username == username:
+                    return pending
+                raise RegistrationConflictError(
+                    f"Already registering {pending.username} for {address}"
+                )
+
+            job = RegistrationJob(
+                id=uuid4().hex, address=address, username=username, status="pending"
+            )
+            db.add(job)
+            try:
+                db.commit()
+            except IntegrityError:
+                db.rollback()
+                raise RegistrationConflictError(f"{username} is already being registered")
+            db.refresh(job)
+        finally:
+            db.close()
+
+        logger.info(f"Enqueued registration {job.id} of {username} for {address}")
+        self._wakeup.set()
+        return job
+
+    @staticmethod
+    async def get_job(job_id: str, address: str) -> RegistrationJob | None:
+        """
+        Get a registration job of an address.
+
+        Args:
+            job_id: The ID of the job.
+            address: The wallet address that enqueued it.
+
+        Returns:
+            RegistrationJob | None: The job if found, None otherwise.
+        """
+        db = SessionLocal()
+        try:
+            return db.scalar(
+                select(RegistrationJob).where(
+                    RegistrationJob.id == job_id, RegistrationJob.address == address
+                )
+            )
+        finally:
+            db.close()
+
+    @staticmethod
+    async def is_reserved(username: str) -> bool:
+        """Check if a username is reserved by a pending registration."""
+        db = SessionLocal()
+        try:
+            return (
+                db.scalar(
+                    select(RegistrationJob.id).where(
+                        RegistrationJob.username == username, RegistrationJob.status == "pending"
+                    )
+                )
+                is not None
+            )
+        finally:
+            db.close()
+
+    @staticmethod
+    async def _is_owned_by(username: str, address: str) -> bool:
+        owner = await ens_registry_service.get_owner(username)
+        if owner is None:
+            owner = await multibaas_service.get_ens_owner(get_ens_from_username(username))
+        return owner is not None and format_eth_address(owner) == format_eth_address(address)
+
+    async def _register(self, job: RegistrationJob) -> str | None:
+        if await multibaas_service.is_ens_subname_available(job.username):
+            if not await multibaas_service.register_ens_subname(job.username, job.address):
+                return "ENS registration failed"
+        elif await self._is_owned_by(job.username, job.address):
+            # A job interrupted after its transaction was submitted finds its name taken when
+            # retried, the registration only has to be finished
+            logger.info(f"{job.username} is already registered to {job.address}, finishing {job.id}")
+        else:
+            return "Username is not available"
+
+        await ens_registry_service.add_label(job.username, job.address)
+        if not await user_service.create_user(address=job.address, username=job.username):
+            # Already there if an earlier attempt was interrupted after creating it
+            if await user_service.get_user_by_address(job.address) is None:
+                # Left pending, the retry once the lease expires finds the name registered
+                raise RegistrationUserError(f"Failed to create user {job.username} for {job.address}")
+        return None
+
+    async def process_next(self) -> bool:
+        """
+        Process the oldest pending job that no other worker is processing.
+
+        Returns:
+            bool: True if a job was processed, False if there was none.
+
+        Raises:
+            RegistrationUserError: If the name was registered but the user couldn't be created,
+                the job is left pending to be retried.
+        """
+        # Not expired on commit, so that reading the job doesn't open a transaction again
+        db = SessionLocal(expire_on_commit=False)
+        try:
+            next_job_id = (
+                select(RegistrationJob.id)
+                .where(
+                    RegistrationJob.status == "pending",
+                    or_(
+                        RegistrationJob.leased_until.is_(None),
+                        RegistrationJob.leased_until < func.current_timestamp(),
+                    ),
+                )
+                .order_by(RegistrationJob.created_at)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+                .scalar_subquery()
+            )
+            job = db.scalar(
+                update(RegistrationJob)
+                .where(RegistrationJob.id == next_job_id)
+                .values(leased_until=func.current_timestamp() + REGISTRATION_LEASE)
+                .returning(RegistrationJob)
+            )
+            # Committed before the on-chain call, which can take a while
+            db.commit()
+            if job is None:
+                return False
+
+            error = await self._register(job)
+            db.execute(
+                update(RegistrationJob)
+                .where(RegistrationJob.id == job.id)
+                .values(status="failed" if error else "completed", error=error, leased_until=None)
+            )
+            db.commit()
+            logger.info(f"Registration {job.id} of {job.username} {'failed' if error else 'completed'}")
+            return True
+        finally:
+            db.close()
+
+    async def run_worker(self) -> None:
+        """Process the registration jobs as they are enqueued, until cancelled."""
+        while True:
+            self._wakeup.clear()
+            try:
+                while await self.process_next():
+                    pass
+            except Exception as e:
+                logger.error(f"Error processing registrations: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), REGISTRATION_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    def start_workers(self) -> list[asyncio.Task]:
+        return [
+            asyncio.create_task(self.run_worker()) for _ in range(config.REGISTRATION_WORKERS)
+        ]
+
+
+registration_service = RegistrationService()
@@ -0,0 +1,414 @@
+import asyncio
+from collections import Counter, defaultdict
+from datetime import UTC, date, datetime, timedelta
+from typing import Literal
+
+from sqlalchemy import (
+    BigInteger,
+    Select,
+    String,
+    Subquery,
+    cast,
+    delete,
+    func,
+    literal,
+    select,
+    text,
+    tuple_,
+    union_all,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from src.models.base import SessionLocal, init_db
+from src.models.rollup_active_user import RollupActiveUser
+from src.models.transaction import Transaction
+from src.models.transaction_rollup import TransactionRollup
+from src.services.partitions import month_start, next_month
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+Granularity = Literal["hour", "day"]
+GRANULARITIES: tuple[Granularity, ...] = ("hour", "day")
+
+BUCKET_SIZES: dict[Granularity, timedelta] = {
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+}
+
+COUNTERS = ["p2p_count", "p2p_volume", "topup_count", "topup_volume", "active_users"]
+
+
+def truncate(moment: datetime, granularity: Granularity) -> datetime:
+    """Start of the bucket containing the given moment, like date_trunc in Postgres."""
+    moment = moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0) if granularity == "day" else moment
+
+
+class RollupService:
+    """
+    Maintains the hourly and daily platform totals of the transactions.
+
+    Rollups are updated in the transaction recording the rows, so dashboards read a handful of
+    buckets instead of scanning the ledger. They also outlive the archived partitions.
+    """
+
+    @staticmethod
+    def record_transactions(transactions: list[Transaction], db: Session) -> None:
+        """
+        Add transactions being created to the rollups of their buckets.
+
+        Args:
+            transactions: The transactions being created.
+            db: The session creating them.
+        """
+        if not transactions:
+            return
+
+        deltas: dict[tuple[str, datetime], dict[str, int]] = defaultdict(
+            lambda: dict.fromkeys(COUNTERS, 0)
+        )
+        participants = set()
+        for transaction in transactions:
+            for granularity in GRANULARITIES:
+                bucket = truncate(transaction.created_at, granularity)
+                delta = deltas[(granularity, bucket)]
+                delta[f"{transaction.type}_count"] += 1
+                delta[f"{transaction.type}_volume"] += transaction.amount
+                participants.add((granularity, bucket, transaction.sender_username))
+                participants.add((granularity, bucket, transaction.receiver_username))
+
+        # Only users not seen yet in a bucket increase its active users
+        newly_active = db.execute(
+            insert(RollupActiveUser)
+            .values(
+                [
+                    {"granularity": granularity, "bucket": bucket, "username": username}
+                    for granularity, bucket, username in sorted(participants)
+                ]
+            )
+            .on_conflict_do_nothing()
+            .returning(RollupActiveUser.granularity, RollupActiveUser.bucket)
+        ).all()
+        for active_granularity, active_bucket in newly_active:
+            deltas[(active_granularity, active_bucket)]["active_users"] += 1
+
+        statement = insert(TransactionRollup).values(
+            [
+                {"granularity": granularity, "bucket": bucket, **delta}
+                # Always lock the rows in the same order to avoid deadlocks between writers
+                for (granularity, bucket), delta in sorted(deltas.items())
+            ]
+        )
+        db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[TransactionRollup.granularity, TransactionRollup.bucket],
+                set_={
+                    counter: getattr(TransactionRollup, counter) + statement.excluded[counter]
+                    for counter in COUNTERS
+                },
+            )
+        )
+
+    @staticmethod
+    async def get_rollups(
+        granularity: Granularity, start: datetime, end: datetime
+    ) -> list[TransactionRollup]:
+        """
+        Get the rollups of the buckets in a time range, empty buckets included.
+
+        Args:
+            granularity: The size of the buckets.
+            start: Start of the range, included.
+            end: End of the range, excluded.
+
+        Returns:
+            list[TransactionRollup]: One rollup per bucket, oldest first.
+        """
+        db = SessionLocal()
+        try:
+            stored = {
+                rollup.bucket: rollup
+                for rollup in db.scalars(
+                    select(TransactionRollup).where(
+                        TransactionRollup.granularity == granularity,
+                        TransactionRollup.bucket >= truncate(start, granularity),
+                        TransactionRollup.bucket < end,
+                    )
+                )
+            }
+        finally:
+            db.close()
+
+        rollups = []
+        bucket = truncate(start, granularity)
+        while bucket < end:
+            rollups.append(
+                stored.get(bucket)
+                or TransactionRollup(
+                    granularity=granularity,
+                    bucket=bucket,
+                    **dict.fromkeys(COUNTERS, 0),
+                )
+            )
+            bucket += BUCKET_SIZES[granularity]
+        return rollups
+
+    @staticmethod
+    def _members(granularity: Granularity, start: date, end: date) -> Select:
+        """The users taking part in a transaction of each bucket of a range."""
+        in_range = (Transaction.created_at >= start, Transaction.created_at < end)
+        participants = union_all(
+            select(Transaction.created_at, Transaction.sender_username.label("username")).where(
+                *in_range
+            ),
+            select(Transaction.created_at, Transaction.receiver_username.label("username")).where(
+                *in_range
+            ),
+        ).subquery()
+        return select(
+            literal(granularity, String).label("granularity"),
+            func.date_trunc(granularity, participants.c.created_at).label("bucket"),
+            participants.c.username,
+        ).distinct()
+
+    @staticmethod
+    def _totals(granularity: Granularity, start: date, end: date) -> Subquery:
+        """The transaction counters of each bucket of a range, active users aside."""
+        bucket = func.date_trunc(granularity, Transaction.created_at)
+        return (
+            select(
+                bucket.label("bucket"),
+                func.count().filter(Transaction.type == "p2p").label("p2p_count"),
+                cast(
+                    func.coalesce(func.sum(Transaction.amount).filter(Transaction.type == "p2p"), 0),
+                    BigInteger,
+                ).label("p2p_volume"),
+                func.count().filter(Transaction.type == "topup").label("topup_count"),
+                cast(
+                    func.coalesce(func.sum(Transaction.amount).filter(Transaction.type == "topup"), 0),
+                    BigInteger,
+                ).label("topup_volume"),
+            )
+            .where(Transaction.created_at >= start, Transaction.created_at < end)
+            .group_by(bucket)
+            .subquery()
+        )
+
+    @classmethod
+    def _backfill_range(cls, db: Session, granularity: Granularity, start: date, end: date) -> None:
+        db.execute(
+            delete(RollupActiveUser).where(
+                RollupActiveUser.granularity == granularity,
+                RollupActiveUser.bucket >= start,
+                RollupActiveUser.bucket < end,
+            )
+        )
+        db.execute(
+            delete(TransactionRollup).where(
+                TransactionRollup.granularity == granularity,
+                TransactionRollup.bucket >= start,
+                TransactionRollup.bucket < end,
+            )
+        )
+
+        db.execute(
+            insert(RollupActiveUser).from_select(
+                ["granularity", "bucket", "username"], cls._members(granularity, start, end)
+            )
+        )
+
+        active_users = (
+            select(RollupActiveUser.bucket, func.count().label("active_users"))
+            .where(
+                RollupActiveUser.granularity == granularity,
+                RollupActiveUser.bucket >= start,
+                RollupActiveUser.bucket < end,
+            )
+            .group_by(RollupActiveUser.bucket)
+            .subquery()
+        )
+        totals = cls._totals(granularity, start, end)
+        db.execute(
+            insert(TransactionRollup).from_select(
+                ["granularity", "bucket", *COUNTERS],
+                select(
+                    literal(granularity, String),
+                    totals.c.bucket,
+                    totals.c.p2p_count,
+                    totals.c.p2p_volume,
+                    totals.c.topup_count,
+                    totals.c.topup_volume,
+                    active_users.c.active_users,
+                ).join(active_users, active_users.c.bucket == totals.c.bucket),
+            )
+        )
+
+    @classmethod
+    def _refresh_range(cls, granularity: Granularity, start: date, end: date) -> int:
+        stored_members = select(
+            RollupActiveUser.granularity, RollupActiveUser.bucket, RollupActiveUser.username
+        ).where(
+            RollupActiveUser.granularity == granularity,
+            RollupActiveUser.bucket >= start,
+            RollupActiveUser.bucket < end,
+        )
+        members = cls._members(granularity, start, end).subquery()
+
+        db = SessionLocal()
+        try:
+            # A single snapshot, so that the transactions and the rollups counting them agree
+            db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+            missing = db.execute(select(members).except_(stored_members)).all()
+            extra = db.execute(stored_members.except_(select(members))).all()
+            expected: dict[datetime, dict[str, int]] = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+            totals = cls._totals(granularity, start, end)
+            for row in db.execute(select(totals)).mappings():
+                expected[row["bucket"]] |= {
+                    counter: row[counter] for counter in COUNTERS if counter != "active_users"
+                }
+            for bucket, active_users in db.execute(
+                select(members.c.bucket, func.count()).group_by(members.c.bucket)
+            ):
+                expected[bucket]["active_users"] = active_users
+            stored = {
+                rollup.bucket: rollup
+                for rollup in db.scalars(
+                    select(TransactionRollup).where(
+                        TransactionRollup.granularity == granularity,
+                        TransactionRollup.bucket >= start,
+                        TransactionRollup.bucket < end,
+                    )
+                )
+            }
+            db.commit()
+
+            deltas = {}
+            for bucket in sorted(expected.keys() | stored.keys()):
+                delta = {
+                    counter: expected[bucket][counter] - getattr(stored.get(bucket), counter, 0)
+                    for counter in COUNTERS
+                }
+                if any(delta.values()):
+                    deltas[bucket] = delta
+            if not (missing or extra or deltas):
+                return 0
+
+            # Applied as increments like the writers' own, which are neither blocked nor overwritten
+            if missing:
+                inserted = db.execute(
+                    insert(RollupActiveUser)
+                    .values([row._asdict() for row in sorted(missing)])
+                    .on_conflict_do_nothing()
+                    .returning(RollupActiveUser.bucket)
+                ).scalars()
+                # Users recorded by a writer since the snapshot were also counted by it
+                skipped = Counter(row.bucket for row in missing) - Counter(inserted)
+                for bucket, count in skipped.items():
+                    deltas.setdefault(bucket, dict.fromkeys(COUNTERS, 0))["active_users"] -= count
+            if extra:
+                db.execute(
+                    delete(RollupActiveUser).where(
+                        tuple_(
+                            RollupActiveUser.granularity,
+                            RollupActiveUser.bucket,
+                            RollupActiveUser.username,
+                        ).in_([tuple(row) for row in extra])
+                    )
+                )
+            deltas = {bucket: delta for bucket, delta in deltas.items() if any(delta.values())}
+            if deltas:
+                statement = insert(TransactionRollup).values(
+                    [
+                        {"granularity": granularity, "bucket": bucket, **delta}
+                        for bucket, delta in sorted(deltas.items())
+                    ]
+                )
+                db.execute(
+                    statement.on_conflict_do_update(
+                        index_elements=[TransactionRollup.granularity, TransactionRollup.bucket],
+                        set_={
+                            counter: getattr(TransactionRollup, counter) + statement.excluded[counter]
+                            for counter in COUNTERS
+                        },
+                    )
+                )
+            db.commit()
+            return len(deltas)
+        finally:
+            db.close()
+
+    async def refresh(self, since: date) -> int:
+        """
+        Fix the rollups that drifted from the transactions in the database, without blocking
+        the writers.
+
+        Each month is read in a single snapshot, and the differences are then added to the
+        rollups like new transactions would be, so concurrent writes are still counted once.
+
+        Args:
+            since: Check the months from the one of this day.
+
+        Returns:
+            int: The number of buckets fixed.
+        """
+        fixed = 0
+        month = month_start(since)
+        while month <= datetime.now(UTC).date():
+            end = next_month(month)
+            for granularity in GRANULARITIES:
+                fixed += await asyncio.to_thread(self._refresh_range, granularity, month, end)
+            month = end
+        if fixed:
+            logger.warning(f"Fixed {fixed} rollups that drifted from the transactions")
+        return fixed
+
+    async def backfill(self, since: date | None = None) -> int:
+        """
+        Recompute the rollups from the transactions in the database, one month at a time.
+
+        The rollup tables are locked while a month is recomputed, which blocks the payments,
+        this is meant for maintenance. The rollups of archived months are left untouched.
+
+        Args:
+            since: Recompute the months from the one of this day only, all of them when None.
+
+        Returns:
+            int: The number of months recomputed.
+        """
+        db = SessionLocal()
+        try:
+            statement = select(func.min(Transaction.created_at), func.max(Transaction.created_at))
+            if since is not None:
+                statement = statement.where(Transaction.created_at >= month_start(since))
+            oldest, newest = db.execute(statement).one()
+            if oldest is None:
+                return 0
+
+            months = 0
+            month = month_start(oldest)
+            while month <= newest.date():
+                end = next_month(month)
+                # Writers wait for the month to be recomputed, so that their rows are counted once.
+                # The tables are locked in the order writers use them to avoid deadlocks.
+                db.execute(
+                    text("LOCK TABLE rollup_active_users, transaction_rollups IN EXCLUSIVE MODE")
+                )
+                for granularity in GRANULARITIES:
+                    self._backfill_range(db, granularity, month, end)
+                db.commit()
+                logger.info(f"Recomputed the rollups of {month:%Y-%m}")
+                months += 1
+                month = end
+            return months
+        finally:
+            db.close()
+
+
+rollup_service = RollupService()
+
+
+if __name__ == "__main__":
+    init_db()
+    asyncio.run(rollup_service.backfill())
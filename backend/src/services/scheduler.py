@@ -0,0 +1,182 @@
+import asyncio
+import random
+import time
+from datetime import UTC, datetime, timedelta
+from typing import Any, Awaitable, Callable, NamedTuple
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from src.config import config
+from src.models.base import SessionLocal
+from src.models.scheduled_job import ScheduledJob
+from src.services.avatars import avatar_reconciler
+from src.services.idempotency import PURGE_INTERVAL_SECONDS, idempotency_service
+from src.services.indexer import payment_indexer
+from src.services.partitions import month_start, previous_month, transaction_partition_service
+from src.services.reconciliation import ledger_reconciler
+from src.services.rollups import rollup_service
+from src.utils.logger import setup_logger
+from src.utils.tracing import SpanKind, start_root_span, use_span
+
+logger = setup_logger(__name__)
+
+# Added to the sleeps, so that the workers don't all check the same job at the same time
+JITTER_SECONDS = 5
+
+# Longest error message kept for a failed run
+MAX_ERROR_LENGTH = 1000
+
+# A run not finished after this long is assumed to have died with its worker, and can be taken over
+RUN_TIMEOUT = timedelta(hours=1)
+
+
+class Job(NamedTuple):
+    name: str
+    interval_seconds: int
+    run: Callable[[], Awaitable[Any]]
+
+
+async def refresh_rollups() -> int:
+    # Late transactions and fixes of the ledger only land in the current and previous months
+    return await rollup_service.refresh(since=previous_month(month_start(datetime.now(UTC))))
+
+
+def _jobs() -> list[Job]:
+    jobs = [
+        Job("avatars.warm", config.AVATAR_WARM_INTERVAL_SECONDS, avatar_reconciler.warm),
+        Job("avatars.reconcile", config.AVATAR_RECONCILE_INTERVAL_SECONDS, avatar_reconciler.run),
+        Job("ledger.index", config.LEDGER_INDEX_INTERVAL_SECONDS, payment_indexer.run),
+        Job("ledger.reconcile", config.LEDGER_RECONCILE_INTERVAL_SECONDS, ledger_reconciler.run),
+        Job("partitions.create", 86400, transaction_partition_service.create_upcoming_partitions),
+        Job("rollups.refresh", config.ROLLUP_REFRESH_INTERVAL_SECONDS, refresh_rollups),
+        Job("webhooks.purge", PURGE_INTERVAL_SECONDS, idempotency_service.purge_deliveries),
+    ]
+    return [job for job in jobs if job.interval_seconds > 0]
+
+
+class Scheduler:
+    """
+    Runs the periodic jobs of the backend in the background of the worker processes.
+
+    Every worker runs a loop per job, and a worker claims a run by moving the last start of the
+    job in the scheduled_jobs table, only if it is older than the interval and the previous run
+    finished. A job therefore runs once per interval whichever worker runs it, and the next
+    worker takes over when the one running it stops. The claim is committed before the job
+    runs, so no transaction or lock is held meanwhile.
+    """
+
+    @staticmethod
+    def _claim(job: Job) -> float | None:
+        """Claim the next run of a job, or the seconds until it is due."""
+        db = SessionLocal()
+        try:
+            now = func.current_timestamp()
+            claimed = db.scalar(
+                insert(ScheduledJob)
+                .values(name=job.name, last_started_at=now)
+                .on_conflict_do_update(
+                    index_elements=[ScheduledJob.name],
+                    set_={"last_started_at": now},
+                    where=and_(
+                        ScheduledJob.last_started_at <= now - timedelta(seconds=job.interval_seconds),
+                        or_(
+                            ScheduledJob.last_finished_at >= ScheduledJob.last_started_at,
+                            ScheduledJob.last_started_at <= now - RUN_TIMEOUT,
+                        ),
+                    ),
+                )
+                .returning(ScheduledJob.name)
+            )
+            if claimed is not None:
+                db.commit()
+                return None
+            elapsed = db.scalar(
+                select(func.extract("epoch", now - ScheduledJob.last_started_at)).where(
+                    ScheduledJob.name == job.name
+                )
+            )
+            db.commit()
+            remaining = job.interval_seconds - float(elapsed or 0)
+            # Overdue means still running in another worker, whose loop will also run the next one
+            return remaining if remaining > 0 else job.interval_seconds
+        finally:
+            db.close()
+
+    async def _run(self, job: Job) -> None:
+        error = None
+        start = time.perf_counter()
+        with use_span(start_root_span(f"job {job.name}", SpanKind.INTERNAL)):
+            try:
+                result = await job.run()
+            except Exception as e:
+                error = str(e)[:MAX_ERROR_LENGTH] or type(e).__name__
+                logger.error(f"Error running the {job.name} job: {e}")
+            else:
+                logger.debug(f"Ran the {job.name} job: {result}")
+        duration = time.perf_counter() - start
+
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(ScheduledJob)
+                .where(ScheduledJob.name == job.name)
+                .values(
+                    last_finished_at=func.clock_timestamp(),
+                    last_duration_seconds=duration,
+                    last_error=error,
+                )
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    async def run_if_due(self, job: Job) -> float:
+        """
+        Run a job unless another worker is running it or it already ran in its interval.
+
+        Args:
+            job: The job to run.
+
+        Returns:
+            float: Seconds until the job is due again.
+        """
+        delay = self._claim(job)
+        if delay is not None:
+            return delay
+        await self._run(job)
+        return job.interval_seconds
+
+    async def _run_periodically(self, job: Job) -> None:
+        delay = random.uniform(0, JITTER_SECONDS)
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                delay = await self.run_if_due(job)
+            except Exception as e:
+                logger.error(f"Error scheduling the {job.name} job: {e}")
+                delay = job.interval_seconds
+            delay += random.uniform(0, JITTER_SECONDS)
+
+    def start(self) -> list[asyncio.Task]:
+        """
+        Start the loops of the enabled jobs, cancel the tasks to stop them.
+
+        Returns:
+            list[asyncio.Task]: The tasks running the loops.
+        """
+        if not config.SCHEDULER_ENABLED:
+            return []
+        return [asyncio.create_task(self._run_periodically(job)) for job in _jobs()]
+
+    @staticmethod
+    def get_jobs() -> list[ScheduledJob]:
+        """The last run of each job, whichever worker ran it."""
+        db = SessionLocal()
+        try:
+            return list(db.scalars(select(ScheduledJob).order_by(ScheduledJob.name)).all())
+        finally:
+            db.close()
+
+
+scheduler = Scheduler()
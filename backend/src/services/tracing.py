@@ -0,0 +1,113 @@
+import asyncio
+from typing import Any
+
+import orjson
+
+from src.config import config
+from src.utils.http import http_client
+from src.utils.logger import setup_logger
+from src.utils.tracing import Span, finished_spans
+
+logger = setup_logger(__name__)
+
+EXPORT_INTERVAL_SECONDS = 5
+
+SERVICE_NAME = "solva-backend"
+
+# Status code of the failed spans in the OpenTelemetry protocol, the others are left unset
+STATUS_ERROR = 2
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_span(span: Span) -> dict[str, Any]:
+    otlp_span: dict[str, Any] = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": int(span.kind),
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": [
+            {"key": key, "value": _otlp_value(value)} for key, value in span.attributes.items()
+        ],
+        "status": {"code": STATUS_ERROR, "message": span.error} if span.error is not None else {},
+    }
+    if span.parent_id is not None:
+        otlp_span["parentSpanId"] = span.parent_id
+    return otlp_span
+
+
+class SpanExporter:
+    """
+    Exports the finished spans of the worker every few seconds.
+
+    Spans are appended to TRACE_FILE as JSON lines, and sent to the OpenTelemetry collector at
+    TRACE_OTLP_URL with the OTLP/HTTP JSON protocol, so that they can be looked at in Jaeger,
+    Tempo or any other OpenTelemetry backend. A failed export drops its spans.
+    """
+
+    @staticmethod
+    def _write(path: str, lines: bytes) -> None:
+        with open(path, "ab") as file:
+            file.write(lines)
+
+    async def _send(self, spans: list[Span]) -> None:
+        payload = {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {"key": "service.name", "value": {"stringValue": SERVICE_NAME}}
+                        ]
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "src.utils.tracing"},
+                            "spans": [_otlp_span(span) for span in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+        async with http_client.session.post(
+            f"{config.TRACE_OTLP_URL}/v1/traces",
+            data=orjson.dumps(payload),
+            headers={"Content-Type": "application/json"},
+        ) as response:
+            if response.status >= 400:
+                raise Exception(f"HTTP {response.status}: {await response.text()}")
+
+    async def flush(self) -> None:
+        """Export the spans finished since the last export."""
+        spans = [finished_spans.popleft() for _ in range(len(finished_spans))]
+        if not spans:
+            return
+        if config.TRACE_FILE:
+            lines = b"".join(orjson.dumps(span.to_dict()) + b"\n" for span in spans)
+            try:
+                await asyncio.to_thread(self._write, config.TRACE_FILE, lines)
+            except OSError as e:
+                logger.error(f"Error writing {len(spans)} spans to {config.TRACE_FILE}: {e}")
+        if config.TRACE_OTLP_URL:
+            try:
+                await self._send(spans)
+            except Exception as e:
+                logger.error(f"Error sending {len(spans)} spans to {config.TRACE_OTLP_URL}: {e}")
+
+    async def run(self) -> None:
+        """Export the spans periodically until cancelled."""
+        while True:
+            await asyncio.sleep(EXPORT_INTERVAL_SECONDS)
+            await self.flush()
+
+
+span_exporter = SpanExporter()
@@ -1,22 +1,112 @@
-from typing import Literal
+from datetime import UTC, datetime
+from typing import Any, Literal, NamedTuple
 
+from sqlalchemy import func, or_, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
 
 from src.interfaces.transaction import Transaction as TransactionType
-from src.models.base import SessionLocal
+from src.models.base import get_session
 from src.models.transaction import Transaction
+from src.models.transaction_hash import TransactionHash
+from src.services.contacts import contact_service
+from src.services.partitions import transaction_partition_service
+from src.services.realtime import realtime_hub
+from src.services.rollups import rollup_service
 from src.services.user import user_service
 from src.utils.logger import setup_logger
+from src.utils.payments import PaymentEvent, base_units_to_usdc
 
 logger = setup_logger(__name__)
 
 
+class LedgerVersion(NamedTuple):
+    """Identifies the state of a user's transaction history, the ledger being append-only."""
+
+    transaction_count: int
+    last_id: int | None  # Grows with every insert, backfilled rows included
+
+
+class TransactionRecord(NamedTuple):
+    """Columns of a transaction shown to users, read without building ORM entities."""
+
+    receiver_username: str
+    sender_username: str
+    amount: int
+    type: str
+    transaction_hash: str
+    created_at: datetime
+
+
+TRANSACTION_RECORD_COLUMNS = (
+    Transaction.receiver_username,
+    Transaction.sender_username,
+    Transaction.amount,
+    Transaction.type,
+    Transaction.transaction_hash,
+    Transaction.created_at,
+)
+
+
 class TransactionService:
     @staticmethod
+    def to_transaction_type(transaction: Transaction) -> TransactionType:
+        return TransactionType(
+            receiver_username=transaction.receiver_username,
+            sender_username=transaction.sender_username,
+            amount=base_units_to_usdc(transaction.amount),
+            type=transaction.type,  # type: ignore
+            transaction_hash=transaction.transaction_hash,
+            created_at=transaction.created_at,
+        )
+
+    @staticmethod
+    def to_json(records: list[TransactionRecord]) -> list[dict[str, Any]]:
+        """
+        Build the JSON representation of transactions, matching the TransactionType schema.
+
+        Args:
+            records: The transactions to serialize.
+
+        Returns:
+            list[dict]: The transactions, ready to be encoded.
+        """
+        return [
+            {
+                "receiver_username": record.receiver_username,
+                "sender_username": record.sender_username,
+                "amount": base_units_to_usdc(record.amount),
+                "type": record.type,
+                "transaction_hash": record.transaction_hash,
+                "created_at": record.created_at,
+            }
+            for record in records
+        ]
+
+    def publish_transactions(self, transactions: list[Transaction], db: Session) -> None:
+        """
+        Push new transactions to the connected clients of their sender and receiver.
+
+        Args:
+            transactions: The transactions being created.
+            db: The session creating them, the events are sent when it commits.
+        """
+        for transaction in transactions:
+            realtime_hub.publish(
+                {transaction.sender_username, transaction.receiver_username},
+                {
+                    "type": "transaction",
+                    "transaction": self.to_transaction_type(transaction).model_dump(mode="json"),
+                },
+                db=db,
+            )
+
     async def create_transaction(
+        self,
         sender_address: str,
         receiver_address: str,
-        amount: float,
+        amount: int,
         transaction_type: Literal["topup", "p2p"],
         transaction_hash: str,
     ) -> Transaction | None:
@@ -26,7 +116,7 @@ class TransactionService:
         Args:
             sender_address: The wallet address of the sender.
             receiver_address: The wallet address of the receiver.
-            amount: The amount being transferred.
+            amount: The amount being transferred, in USDC base units.
             transaction_type: The type of transaction ("topup" or "p2p").
             transaction_hash: The blockchain transaction hash.
 
@@ -38,8 +128,9 @@ class TransactionService:
         )
 
         # Get users by their addresses to find usernames
-        sender = await user_service.get_user_by_address(sender_address)
-        receiver = await user_service.get_user_by_address(receiver_address)
+        users = await user_service.get_users_by_addresses([sender_address, receiver_address])
+        sender = users.get(sender_address)
+        receiver = users.get(receiver_address)
 
         if not sender or not receiver:
             logger.error(
@@ -47,69 +138,194 @@ class TransactionService:
             )
             return None
 
-        db = SessionLocal()
-        try:
-            transaction = Transaction(
-                sender_username=sender.username,
-                receiver_username=receiver.username,
-                amount=amount,
-                type=transaction_type,
-                transaction_hash=transaction_hash,
+        created_at = datetime.now(UTC).replace(tzinfo=None)
+        await transaction_partition_service.ensure_partitions([created_at])
+
+        with get_session() as db:
+            try:
+                # Fails if the hash was already recorded, archived transactions included
+                db.add(TransactionHash(transaction_hash=transaction_hash, created_at=created_at))
+                db.flush()
+
+                transaction = Transaction(
+                    sender_username=sender.username,
+                    receiver_username=receiver.username,
+                    amount=amount,
+                    type=transaction_type,
+                    transaction_hash=transaction_hash,
+                    created_at=created_at,
+                )
+                db.add(transaction)
+                db.flush()
+                rollup_service.record_transactions([transaction], db)
+                contact_service.record_transactions([transaction], db)
+                self.publish_transactions([transaction], db)
+                db.commit()
+                db.refresh(transaction)
+                return transaction
+
+            except IntegrityError as e:
+                logger.error(f"Error creating transaction: {e}")
+                db.rollback()
+                return None
+
+    async def bulk_create_transactions(
+        self,
+        payments: dict[str, PaymentEvent],
+        transaction_type: Literal["topup", "p2p"],
+    ) -> int:
+        """
+        Create many transactions in a single statement, skipping the ones already recorded.
+
+        Payments involving an address unknown to the database are ignored.
+
+        Args:
+            payments: The payments to record, by blockchain transaction hash.
+            transaction_type: The type of the transactions ("topup" or "p2p").
+
+        Returns:
+            int: The number of transactions actually created.
+        """
+        if not payments:
+            return 0
+
+        addresses = {payment.sender_address for payment in payments.values()} | {
+            payment.receiver_address for payment in payments.values()
+        }
+
+        usernames = {
+            address: user.username
+            for address, user in (await user_service.get_users_by_addresses(addresses)).items()
+        }
+
+        with get_session() as db:
+            rows: list[dict[str, Any]] = []
+            for transaction_hash, payment in payments.items():
+                sender_username = usernames.get(payment.sender_address)
+                receiver_username = usernames.get(payment.receiver_address)
+                if sender_username is None or receiver_username is None:
+                    continue
+                created_at = (
+                    datetime.fromtimestamp(payment.timestamp, UTC)
+                    if payment.timestamp is not None
+                    else datetime.now(UTC)
+                )
+                rows.append(
+                    {
+                        "sender_username": sender_username,
+                        "receiver_username": receiver_username,
+                        "amount": payment.amount,
+                        "type": transaction_type,
+                        "transaction_hash": transaction_hash,
+                        "created_at": created_at.replace(tzinfo=None),
+                    }
+                )
+
+            if not rows:
+                return 0
+
+            await transaction_partition_service.ensure_partitions(
+                row["created_at"] for row in rows
             )
 
-            db.add(transaction)
-            db.commit()
-            db.refresh(transaction)
-            return transaction
+            new_hashes = set(
+                db.scalars(
+                    insert(TransactionHash)
+                    .on_conflict_do_nothing(index_elements=[TransactionHash.transaction_hash])
+                    .returning(TransactionHash.transaction_hash),
+                    [
+                        {"transaction_hash": row["transaction_hash"], "created_at": row["created_at"]}
+                        for row in rows
+                    ],
+                )
+            )
+            rows = [row for row in rows if row["transaction_hash"] in new_hashes]
+            if not rows:
+                db.commit()
+                return 0
 
-        except IntegrityError as e:
-            logger.error(f"Error creating transaction: {e}")
-            db.rollback()
-            return None
-        finally:
-            db.close()
+            inserted = list(db.scalars(insert(Transaction).returning(Transaction), rows).all())
+            rollup_service.record_transactions(inserted, db)
+            contact_service.record_transactions(inserted, db)
+            self.publish_transactions(inserted, db)
+            db.commit()
+            return len(inserted)
 
     @staticmethod
-    async def get_user_transactions(address: str) -> list[TransactionType]:
+    async def get_ledger_version(username: str) -> LedgerVersion:
+        """
+        Get the version of a user's transaction history, without loading it.
+
+        Args:
+            username: The username of the user.
+
+        Returns:
+            LedgerVersion: The number of transactions and the latest one.
+        """
+        with get_session(read_only=True) as db:
+            transaction_count, last_id = db.execute(
+                select(func.count(Transaction.id), func.max(Transaction.id)).where(
+                    or_(
+                        Transaction.sender_username == username,
+                        Transaction.receiver_username == username,
+                    )
+                )
+            ).one()
+            return LedgerVersion(transaction_count, last_id)
+
+    async def get_user_transactions(
+        self, address: str, include_archived: bool = False
+    ) -> list[TransactionRecord]:
         """
         Get all transactions for a user (both sent and received).
 
+        Only the columns shown to users are read, as plain tuples.
+
         Args:
             address: The wallet address of the user.
+            include_archived: Whether to also read the transactions moved out of the database,
+                which is much slower.
 
         Returns:
             List of transactions related to the user.
         """
         logger.debug(f"Getting transactions for user with address {address}")
 
-        user = await user_service.get_user_by_address(address)
+        user = await user_service.get_user_by_address(address, read_only=True)
         if not user:
             logger.error(f"User not found: {address}")
             return []
 
-        db = SessionLocal()
-        try:
-            transactions: list[Transaction] = (
-                db.query(Transaction)
-                .filter(
-                    (Transaction.sender_username == user.username)
-                    | (Transaction.receiver_username == user.username)
+        with get_session(read_only=True) as db:
+            transactions = [
+                TransactionRecord._make(row)
+                for row in db.execute(
+                    select(*TRANSACTION_RECORD_COLUMNS).where(
+                        or_(
+                            Transaction.sender_username == user.username,
+                            Transaction.receiver_username == user.username,
+                        )
+                    )
                 )
-                .all()
-            )
-            return [
-                TransactionType(
+            ]
+
+        if include_archived:
+            recorded = {tx.transaction_hash for tx in transactions}
+            archived = await transaction_partition_service.get_archived_transactions(user.username)
+            transactions = [
+                TransactionRecord(
                     receiver_username=tx.receiver_username,
                     sender_username=tx.sender_username,
                     amount=tx.amount,
-                    type=tx.type,  # type: ignore
+                    type=tx.type,
                     transaction_hash=tx.transaction_hash,
                     created_at=tx.created_at,
                 )
-                for tx in transactions
-            ]
-        finally:
-            db.close()
+                for tx in archived
+                if tx.transaction_hash not in recorded
+            ] + transactions
+
+        return transactions
 
 
 transaction_service = TransactionService()
@@ -1,24 +1,53 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterable, Iterator, Literal, NamedTuple, Sequence
+
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import or_
+from sqlalchemy import bindparam, or_, select, update
 
-from src.models.base import SessionLocal
+from src.models.base import get_session
 from src.models.user import User
+from src.services.multibaas import multibaas_service
+from src.utils.ens import get_ens_from_username
 from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
 
+class UserSummary(NamedTuple):
+    """Columns of a user shown to other users, read without building ORM entities."""
+
+    username: str
+    address: str
+    avatar_url: str | None
+
+
+class UserCache:
+    """Users looked up during a request, by address and by username, misses included."""
+
+    by_address: dict[str, User | None]
+    by_username: dict[str, User | None]
+
+    def __init__(self):
+        self.by_address = {}
+        self.by_username = {}
+
+    def add(self, user: User) -> None:
+        self.by_address[user.address] = user
+        self.by_username[user.username] = user
+
+    def forget(self, address: str, username: str) -> None:
+        self.by_address.pop(address, None)
+        self.by_username.pop(username, None)
+
+
+_request_cache: ContextVar[UserCache | None] = ContextVar("user_request_cache", default=None)
+
+
 class UserService:
     def __init__(self):
         pass
 
-    def get_db(self):
-        db = SessionLocal()
-        try:
-            return db
-        finally:
-            db.close()
-
     async def create_user(self, address: str, username: str) -> bool:
         """
         Create a new user with the given wallet address and username.
@@ -31,39 +60,110 @@ class UserService:
             bool: True if the user was created successfully, False otherwise.
         """
         logger.debug(f"Creating user with address {address} and username {username}")
-        db = self.get_db()
+        with get_session() as db:
+            try:
+                user = User(address=address, username=username)
+                db.add(user)
+                db.commit()
+                cache = _request_cache.get()
+                if cache is not None:
+                    cache.forget(address, username)
+                return True
+            except IntegrityError as e:
+                logger.error(f"Error creating user: {e}")
+                db.rollback()
+                return False
+
+    @contextmanager
+    def request_cache(self) -> Iterator[UserCache]:
+        """
+        Remember the users looked up until the end of the block, typically a request.
+
+        Users are loaded once per block, so the lookups done by each layer handling a request
+        don't hit the database again. Only the users read from the primary are remembered, the
+        read only lookups use them but don't fill the cache.
+
+        Yields:
+            UserCache: The users looked up so far.
+        """
+        cache = UserCache()
+        token = _request_cache.set(cache)
         try:
-            user = User(address=address, username=username)
-            db.add(user)
-            db.commit()
-            return True
-        except IntegrityError as e:
-            logger.error(f"Error creating user: {e}")
-            db.rollback()
-            return False
+            yield cache
         finally:
-            db.close()
+            _request_cache.reset(token)
+
+    def _get_users(
+        self, key: Literal["address", "username"], values: Iterable[str], read_only: bool = False
+    ) -> dict[str, User]:
+        cache = _request_cache.get()
+        cached: dict[str, User | None] = {}
+        if cache is not None:
+            cached = cache.by_address if key == "address" else cache.by_username
 
-    async def get_user_by_address(self, address: str) -> User | None:
+        values = set(values)
+        missing = values - cached.keys()
+        users = {value: cached[value] for value in values - missing}
+        if missing:
+            column = getattr(User, key)
+            with get_session(read_only) as db:
+                loaded = db.scalars(select(User).where(column.in_(missing))).all()
+            users |= dict.fromkeys(missing)
+            users |= {getattr(user, key): user for user in loaded}
+            # Replicas can lag behind, a user they miss or serve stale would be seen by the whole request
+            if cache is not None and not read_only:
+                # Misses are remembered too, create_user clears them
+                cached |= dict.fromkeys(missing)
+                for user in loaded:
+                    cache.add(user)
+
+        return {value: user for value, user in users.items() if user is not None}
+
+    async def get_users_by_addresses(
+        self, addresses: Iterable[str], read_only: bool = False
+    ) -> dict[str, User]:
+        """
+        Get users by their wallet addresses, in a single query.
+
+        Args:
+            addresses: The wallet addresses to look up.
+            read_only: Whether the caller only reads, so that a replica can answer.
+
+        Returns:
+            dict[str, User]: The users found, by address. Unknown addresses are left out.
+        """
+        return self._get_users("address", addresses, read_only)
+
+    async def get_users_by_usernames(self, usernames: Iterable[str]) -> dict[str, User]:
+        """
+        Get users by their usernames, in a single query.
+
+        Args:
+            usernames: The usernames to look up.
+
+        Returns:
+            dict[str, User]: The users found, by username. Unknown usernames are left out.
+        """
+        return self._get_users("username", usernames)
+
+    async def get_user_by_address(self, address: str, read_only: bool = False) -> User | None:
         """
         Get a user by their wallet address.
 
         Args:
             address: The wallet address to look up.
+            read_only: Whether the caller only reads, so that a replica can answer.
 
         Returns:
             User | None: The user if found, None otherwise.
         """
         logger.debug(f"Getting user with address {address}")
-        db = self.get_db()
-        try:
-            return db.query(User).filter(User.address == address).first()
-        finally:
-            db.close()
+        users = await self.get_users_by_addresses([address], read_only)
+        return users.get(address)
 
     async def search_users(
         self, query: str, limit: int = 10, exclude_address: str | None = None
-    ) -> list[User]:
+    ) -> list[UserSummary]:
         """
         Search for users whose username matches the query.
 
@@ -73,14 +173,13 @@ class UserService:
             exclude_address: Optional address to exclude from results (typically the current user).
 
         Returns:
-            list[User]: List of matching users.
+            list[UserSummary]: List of matching users.
         """
         logger.debug(f"Searching users with query: {query}")
-        db = self.get_db()
-        try:
+        with get_session(read_only=True) as db:
             # Search for usernames that contain the query or addresses that start with the query
             search_pattern = f"%{query}%"
-            query_obj = db.query(User).filter(
+            statement = select(User.username, User.address, User.avatar_url).where(
                 or_(
                     User.username.ilike(search_pattern), User.address.ilike(f"{query}%")
                 )
@@ -88,12 +187,60 @@ class UserService:
 
             # Exclude the specified address if provided
             if exclude_address:
-                query_obj = query_obj.filter(User.address != exclude_address)
+                statement = statement.where(User.address != exclude_address)
 
-            users = query_obj.limit(limit).all()
-            return users
-        finally:
-            db.close()
+            return [UserSummary._make(row) for row in db.execute(statement.limit(limit))]
+
+    async def update_avatar_urls(self, avatar_urls: dict[str, str]) -> None:
+        """
+        Store the avatar URLs of users.
+
+        Args:
+            avatar_urls: The new avatar URLs, by username.
+        """
+        if not avatar_urls:
+            return
+
+        with get_session() as db:
+            db.connection().execute(
+                update(User)
+                .where(User.username == bindparam("b_username"))
+                .values(avatar_url=bindparam("b_avatar_url")),
+                [
+                    {"b_username": username, "b_avatar_url": avatar_url}
+                    for username, avatar_url in avatar_urls.items()
+                ],
+            )
+            db.commit()
+
+    async def get_avatar_urls(self, users: Sequence[User | UserSummary]) -> list[str]:
+        """
+        Get the avatar URLs of users, resolving on-chain the ones not stored yet.
+
+        Args:
+            users: The users to get the avatars of.
+
+        Returns:
+            list[str]: The avatar URLs, in the same order as the users.
+        """
+        missing = [user for user in users if user.avatar_url is None]
+        resolved = await multibaas_service.get_ens_avatars(
+            [get_ens_from_username(user.username) for user in missing]
+        )
+        # Empty URLs are lookup errors, they'll be retried on the next read
+        new_avatar_urls = {
+            user.username: avatar_url
+            for user, avatar_url in zip(missing, resolved)
+            if avatar_url
+        }
+        await self.update_avatar_urls(new_avatar_urls)
+
+        return [
+            user.avatar_url
+            if user.avatar_url is not None
+            else new_avatar_urls.get(user.username, "")
+            for user in users
+        ]
 
     async def user_exists(self, address: str) -> bool:
         """
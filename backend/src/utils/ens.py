@@ -1,6 +1,3 @@
-from eth_utils import keccak, to_hex
-
-
 def get_ens_from_username(username: str) -> str:
     return f"{username}.solva-app.eth"
 
@@ -9,6 +6,8 @@ def namehash(name: str) -> str:
     """
     Returns the 32-byte hex string (with 0x prefix).
     """
+    from eth_utils import keccak, to_hex  # Lazy import to keep startup fast
+
     node = b"\x00" * 32  # Start with 32 bytes of zero
     if name:
         labels = name.split(".")[::-1]  # split and reverse
@@ -16,3 +15,12 @@ def namehash(name: str) -> str:
             label_hash = keccak(text=label)
             node = keccak(node + label_hash)
     return to_hex(node)
+
+
+def labelhash(label: str) -> str:
+    """
+    Returns the keccak256 hash of a single label, as emitted in the topics of events indexing it.
+    """
+    from eth_utils import keccak, to_hex  # Lazy import to keep startup fast
+
+    return to_hex(keccak(text=label))
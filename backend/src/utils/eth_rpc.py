@@ -0,0 +1,86 @@
+from typing import Any, NamedTuple, Sequence
+
+from src.config import config
+from src.utils.http import http_client
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class EthCall(NamedTuple):
+    """A read-only contract call, encoded locally and sent with eth_call."""
+
+    to: str
+    signature: str  # e.g. "text(bytes32,string)"
+    args: tuple[Any, ...]
+    output_types: tuple[str, ...]
+
+
+def encode_call(call: EthCall) -> str:
+    """ABI-encode the calldata of a call, only flat argument types are supported."""
+    # Lazy import to keep startup fast
+    from eth_abi import encode
+    from eth_utils import function_signature_to_4byte_selector, to_hex
+
+    arguments = call.signature[call.signature.index("(") + 1 : -1]
+    types = arguments.split(",") if arguments else []
+    return to_hex(function_signature_to_4byte_selector(call.signature) + encode(types, call.args))
+
+
+def decode_result(call: EthCall, result: str) -> tuple[Any, ...]:
+    from eth_abi import decode  # Lazy import to keep startup fast
+
+    return decode(call.output_types, bytes.fromhex(result.removeprefix("0x")))
+
+
+async def eth_call_batch(calls: Sequence[EthCall]) -> list[tuple[Any, ...] | None]:
+    """
+    Run read-only contract calls on ETHEREUM_RPC_URL, with JSON-RPC batch requests.
+
+    Args:
+        calls: The calls to run, against the latest block.
+
+    Returns:
+        list[tuple | None]: The decoded outputs, in the same order as the calls. Calls that
+        reverted or returned an invalid value are None.
+
+    Raises:
+        Exception: If the RPC endpoint couldn't be reached or didn't answer a batch.
+    """
+    if not config.ETHEREUM_RPC_URL:
+        raise Exception("ETHEREUM_RPC_URL is not set")
+
+    outputs: list[tuple[Any, ...] | None] = []
+    batch_size = config.ETHEREUM_RPC_BATCH_SIZE
+    for start in range(0, len(calls), batch_size):
+        chunk = calls[start : start + batch_size]
+        payload = [
+            {
+                "jsonrpc": "2.0",
+                "id": index,
+                "method": "eth_call",
+                "params": [{"to": call.to, "data": encode_call(call)}, "latest"],
+            }
+            for index, call in enumerate(chunk)
+        ]
+        async with http_client.session.post(config.ETHEREUM_RPC_URL, json=payload) as response:
+            response.raise_for_status()
+            result = await response.json()
+        if not isinstance(result, list):
+            # Endpoints without batch support answer with a single error
+            raise Exception(f"Invalid JSON-RPC batch response: {result}")
+
+        # Responses of a batch can come in any order
+        responses = {item.get("id"): item for item in result}
+        for index, call in enumerate(chunk):
+            item = responses.get(index, {})
+            if "result" not in item:
+                logger.warning(f"eth_call {call.signature} on {call.to} failed: {item.get('error')}")
+                outputs.append(None)
+                continue
+            try:
+                outputs.append(decode_result(call, item["result"]))
+            except Exception as e:
+                logger.warning(f"Invalid eth_call {call.signature} result on {call.to}: {e}")
+                outputs.append(None)
+    return outputs
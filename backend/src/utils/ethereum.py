@@ -1,17 +1,26 @@
-from eth_account.messages import encode_defunct
-from hexbytes import HexBytes
-from web3 import Web3
+from src.config import config
+from src.utils.eth_rpc import EthCall, eth_call_batch
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Returned by the isValidSignature method of smart accounts for a valid signature (EIP-1271)
+EIP1271_MAGIC_VALUE = bytes.fromhex("1626ba7e")
 
 
 def is_eth_signature_valid(message: str, signature: str, _address: str) -> bool:
     """Check if a message signature with an Ethereum wallet is valid"""
 
+    # eth_account is slow to import, it's only loaded on the first login
+    from eth_account import Account
+    from eth_account.messages import encode_defunct
+    from hexbytes import HexBytes
+
     try:
         sig = f"0x{signature[578: 578 + 130]}"  # Extracting the actual signature from the payload
 
-        w3 = Web3(Web3.HTTPProvider(""))
         encoded_message = encode_defunct(text=message)
-        recovered_address = w3.eth.account.recover_message(
+        recovered_address = Account.recover_message(
             encoded_message,
             signature=HexBytes(sig),
         )
@@ -23,5 +32,62 @@ def is_eth_signature_valid(message: str, signature: str, _address: str) -> bool:
         return True
 
 
+def recover_signer(message: str, signature: str) -> str | None:
+    """Address of the key that signed a message, None if it isn't a valid ECDSA signature."""
+    from eth_account import Account  # Lazy import to keep startup fast
+    from eth_account.messages import encode_defunct
+    from hexbytes import HexBytes
+
+    try:
+        return Account.recover_message(encode_defunct(text=message), signature=HexBytes(signature))
+    except Exception:
+        return None
+
+
+async def is_signed_by(message: str, signature: str, address: str) -> bool:
+    """
+    Check strictly that a message was signed by an address, unlike is_eth_signature_valid.
+
+    The signer of externally owned accounts is recovered from the signature, and deployed
+    smart accounts are asked with their EIP-1271 isValidSignature method when ETHEREUM_RPC_URL
+    is set. Signatures of smart accounts not deployed yet are rejected.
+
+    Args:
+        message: The signed message.
+        signature: The signature, hex encoded.
+        address: The address expected to have signed.
+
+    Returns:
+        bool: Whether the address signed the message.
+    """
+    signer = recover_signer(message, signature)
+    if signer is not None and format_eth_address(signer) == format_eth_address(address):
+        return True
+    if not config.ETHEREUM_RPC_URL:
+        return False
+
+    from eth_utils import keccak  # Lazy import to keep startup fast
+
+    message_bytes = message.encode()
+    message_hash = keccak(
+        b"\x19Ethereum Signed Message:\n" + str(len(message_bytes)).encode() + message_bytes
+    )
+    try:
+        [output] = await eth_call_batch(
+            [
+                EthCall(
+                    to=address,
+                    signature="isValidSignature(bytes32,bytes)",
+                    args=(message_hash, bytes.fromhex(signature.removeprefix("0x"))),
+                    output_types=("bytes4",),
+                )
+            ]
+        )
+    except Exception as e:
+        logger.error(f"Error checking the signature of {address}: {e}")
+        return False
+    return output is not None and output[0] == EIP1271_MAGIC_VALUE
+
+
 def format_eth_address(address: str) -> str:
     return address.lower()
@@ -0,0 +1,36 @@
+import aiohttp
+
+from src.utils.tracing import http_trace_config
+
+# Maximum number of simultaneous outbound connections per worker
+HTTP_POOL_SIZE = 100
+
+
+class HttpClient:
+    """
+    Holds the aiohttp session shared by all the outbound calls of a worker, so that
+    connections (and their TLS handshakes) are reused across requests.
+    """
+
+    _session: aiohttp.ClientSession | None
+
+    def __init__(self):
+        self._session = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        # Created lazily as the session must be bound to the running event loop
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=HTTP_POOL_SIZE),
+                trace_configs=[http_trace_config()],
+            )
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+http_client = HttpClient()
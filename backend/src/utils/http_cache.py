@@ -0,0 +1,39 @@
+import hashlib
+
+from fastapi import Request, Response
+
+
+def make_etag(*parts: object) -> str:
+    """Build an ETag from the values identifying a version of a resource."""
+    digest = hashlib.blake2b(
+        "|".join(str(part) for part in parts).encode(), digest_size=16
+    ).hexdigest()
+    return f'"{digest}"'
+
+
+def cache_headers(etag: str) -> dict[str, str]:
+    """Validators of a per-user resource, clients must revalidate them on every use."""
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """
+    Evaluate the If-None-Match header of a GET request (RFC 9110, section 13.1.2).
+
+    Args:
+        request: The incoming request.
+        etag: The current ETag of the resource.
+
+    Returns:
+        bool: True if the client's copy is up to date and a 304 can be sent, False otherwise.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return False
+    # Weak comparison, as allowed for GET
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag.removeprefix("W/") in candidates
+
+
+def not_modified_response(etag: str) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag))
@@ -0,0 +1,64 @@
+from typing import NamedTuple
+
+from src.interfaces.curvegrid import EventInput
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+USDC_DECIMALS = 6
+
+# USDC is pegged to the dollar, so a cent is worth 10**4 base units
+USD_CENT_IN_BASE_UNITS = 10 ** (USDC_DECIMALS - 2)
+
+
+class PaymentEvent(NamedTuple):
+    sender_address: str
+    receiver_address: str
+    amount: int  # In USDC base units
+    timestamp: int | None
+
+
+def parse_payment_inputs(inputs: list[EventInput]) -> PaymentEvent | None:
+    """
+    Extract the payment details from the inputs of a PaymentCompleted event.
+
+    Args:
+        inputs: The decoded event inputs.
+
+    Returns:
+        PaymentEvent | None: The payment, or None if some required input is missing or invalid.
+    """
+    sender_address = None
+    receiver_address = None
+    amount = None
+    timestamp = None
+
+    for input_data in inputs:
+        if input_data.name == "sender":
+            sender_address = input_data.value
+        elif input_data.name == "receiver":
+            receiver_address = input_data.value
+        elif input_data.name == "amount":
+            try:
+                # Amounts are kept in base units (6 decimals) to stay exact
+                amount = int(input_data.value)
+            except ValueError:
+                logger.error(f"Invalid amount format: {input_data.value}")
+        elif input_data.name == "timestamp":
+            try:
+                timestamp = int(input_data.value)
+            except ValueError:
+                logger.error(f"Invalid timestamp format: {input_data.value}")
+
+    if sender_address is None or receiver_address is None or amount is None:
+        logger.warning(
+            f"Missing required payment data: sender={sender_address}, receiver={receiver_address}, amount={amount}"
+        )
+        return None
+
+    return PaymentEvent(sender_address, receiver_address, amount, timestamp)
+
+
+def base_units_to_usdc(amount: int) -> float:
+    """Convert an amount in USDC base units to a human-readable amount."""
+    return amount / (10**USDC_DECIMALS)
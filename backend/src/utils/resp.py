@@ -0,0 +1,114 @@
+import asyncio
+from urllib.parse import urlparse
+
+
+class RespError(Exception):
+    pass
+
+
+class RespClient:
+    """
+    Minimal client for servers speaking the Redis protocol (RESP2): Redis, Valkey, KeyDB...
+
+    Commands are pipelined over a single connection per worker, opened lazily and reopened after
+    any error.
+    """
+
+    _reader: asyncio.StreamReader | None
+    _writer: asyncio.StreamWriter | None
+
+    def __init__(self, url: str, timeout: float = 1.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.database = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._reader = None
+        self._writer = None
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _encode(command: tuple[str | int, ...]) -> bytes:
+        parts = [f"*{len(command)}\r\n".encode()]
+        for argument in command:
+            value = str(argument).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(value), value))
+        return b"".join(parts)
+
+    async def _read_reply(self, reader: asyncio.StreamReader) -> object:
+        line = await reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("Connection closed")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            return RespError(payload.decode())
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            return (await reader.readexactly(length + 2))[:-2].decode()
+        if kind == b"*":
+            length = int(payload)
+            if length < 0:
+                return None
+            return [await self._read_reply(reader) for _ in range(length)]
+        raise RespError(f"Unexpected reply: {line!r}")
+
+    async def _read_replies(self, reader: asyncio.StreamReader, count: int) -> list[object]:
+        # Replies come in the order of the commands, they must be read one after the other
+        return [await self._read_reply(reader) for _ in range(count)]
+
+    async def _connect(self) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        setup: list[tuple[str | int, ...]] = []
+        if self.password:
+            setup.append(("AUTH", self.password))
+        if self.database:
+            setup.append(("SELECT", self.database))
+        for command in setup:
+            writer.write(self._encode(command))
+            reply = await self._read_reply(reader)
+            if isinstance(reply, RespError):
+                writer.close()
+                raise reply
+        return reader, writer
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = None
+        self._writer = None
+
+    async def pipeline(self, *commands: tuple[str | int, ...]) -> list[object]:
+        """
+        Send commands in a single round-trip.
+
+        Args:
+            commands: The commands and their arguments.
+
+        Returns:
+            list: The replies, in the same order. Failed commands give a RespError.
+
+        Raises:
+            Exception: If the server couldn't be reached or didn't answer in time.
+        """
+        async with self._lock:
+            try:
+                if self._reader is None or self._writer is None:
+                    reader, writer = await asyncio.wait_for(self._connect(), self.timeout)
+                    self._reader, self._writer = reader, writer
+                else:
+                    reader, writer = self._reader, self._writer
+                writer.write(b"".join(self._encode(command) for command in commands))
+                return await asyncio.wait_for(
+                    self._read_replies(reader, len(commands)), self.timeout
+                )
+            except Exception:
+                # The connection state is unknown, start over with a new one
+                self.close()
+                raise
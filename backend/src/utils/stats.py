@@ -0,0 +1,44 @@
+import math
+import time
+
+
+class DecayingAverage:
+    """
+    Average of the recent samples, each sample weighing half as much every half-life.
+
+    Without new samples the average fades toward 0 with the same half-life, a signal that is no
+    longer measured, like the wait of a pool nobody checks out from, doesn't stay stuck high.
+    """
+
+    _total: float
+    _weight: float
+    _updated_at: float
+    _sampled_at: float
+
+    def __init__(self, half_life_seconds: float):
+        self._decay_rate = math.log(2) / half_life_seconds
+        self._total = 0.0
+        self._weight = 0.0
+        self._updated_at = time.monotonic()
+        self._sampled_at = self._updated_at
+
+    def _decay(self) -> float:
+        now = time.monotonic()
+        factor = math.exp(-self._decay_rate * (now - self._updated_at))
+        self._total *= factor
+        self._weight *= factor
+        self._updated_at = now
+        return now
+
+    def record(self, sample: float) -> None:
+        self._sampled_at = self._decay()
+        self._total += sample
+        self._weight += 1
+
+    @property
+    def value(self) -> float:
+        now = self._decay()
+        if self._weight <= 0:
+            return 0.0
+        # The total and the weight decay together, their ratio only fades with the time since the last sample
+        return self._total / self._weight * math.exp(-self._decay_rate * (now - self._sampled_at))
@@ -0,0 +1,298 @@
+import functools
+import inspect
+import os
+import random
+import re
+import time
+from collections import deque
+from contextlib import AbstractContextManager, contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Iterator
+
+import aiohttp
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from sqlalchemy import Engine, event
+
+from src.config import config
+
+# Finished spans kept until they are exported, the oldest are dropped if the exporter falls behind
+MAX_PENDING_SPANS = 10_000
+
+# Longer SQL statements are truncated in the span attributes
+MAX_STATEMENT_LENGTH = 1000
+
+TRACEPARENT_PATTERN = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+class SpanKind(IntEnum):
+    # Values of the OpenTelemetry protocol
+    INTERNAL = 1
+    SERVER = 2
+    CLIENT = 3
+
+
+class Span:
+    """A timed operation of a trace, with OpenTelemetry compatible identifiers and attributes."""
+
+    end_ns: int | None
+    error: str | None
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: str | None,
+        kind: SpanKind,
+        attributes: dict[str, Any],
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+
+    @property
+    def traceparent(self) -> str:
+        """W3C trace context header of the span, for the requests it sends."""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException | str) -> None:
+        self.error = str(error) or type(error).__name__
+
+    def end(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            finished_spans.append(self)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind.name.lower(),
+            "start_ns": self.start_ns,
+            "duration_ms": ((self.end_ns or self.start_ns) - self.start_ns) / 1e6,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+finished_spans: deque[Span] = deque(maxlen=MAX_PENDING_SPANS)
+
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Span | None:
+    return _current_span.get()
+
+
+def start_root_span(
+    name: str, kind: SpanKind, traceparent: str | None = None, **attributes: Any
+) -> Span | None:
+    """
+    Start a trace, or continue the one of the caller when its trace context is given.
+
+    Args:
+        name: Name of the span.
+        kind: Kind of the span.
+        traceparent: W3C trace context header received from the caller.
+        attributes: Attributes of the span.
+
+    Returns:
+        Span | None: The span, None if tracing is disabled or the trace isn't sampled.
+    """
+    if not config.TRACING_ENABLED:
+        return None
+    match = TRACEPARENT_PATTERN.match(traceparent) if traceparent else None
+    if match is not None:
+        trace_id, parent_id, flags = match.groups()
+        if not int(flags, 16) & 1:  # The caller didn't sample the trace
+            return None
+        return Span(name, trace_id, parent_id, kind, attributes)
+    if random.random() >= config.TRACE_SAMPLE_RATE:
+        return None
+    return Span(name, os.urandom(16).hex(), None, kind, attributes)
+
+
+def start_span(name: str, kind: SpanKind = SpanKind.INTERNAL, **attributes: Any) -> Span | None:
+    """Start a child of the current span, None outside of a sampled trace."""
+    parent = _current_span.get()
+    if parent is None:
+        return None
+    return Span(name, parent.trace_id, parent.span_id, kind, attributes)
+
+
+@contextmanager
+def use_span(span: Span | None) -> Iterator[Span | None]:
+    """Make a span the current one in a block, and end it with the block."""
+    if span is None:
+        yield None
+        return
+    token = _current_span.set(span)
+    try:
+        yield span
+    except Exception as e:
+        span.record_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        span.end()
+
+
+def span(name: str, **attributes: Any) -> AbstractContextManager[Span | None]:
+    """
+    Trace a block as a child of the current span, does nothing outside of a sampled trace.
+
+    Usage:
+        with span("ens.avatars", count=len(enses)):
+            ...
+    """
+    return use_span(start_span(name, SpanKind.INTERNAL, **attributes))
+
+
+async def trace_request(
+    request: Request, call_next: Callable[[Request], Awaitable[Response]]
+) -> Response:
+    """
+    Handle a request in a server span, named after its route once it is known.
+
+    Args:
+        request: The incoming request.
+        call_next: The rest of the application.
+
+    Returns:
+        Response: The response, with the trace identifier in a header when the request is traced.
+    """
+    root = start_root_span(
+        f"{request.method} {request.url.path}",
+        SpanKind.SERVER,
+        request.headers.get("traceparent"),
+        **{"http.request.method": request.method, "url.path": request.url.path},
+    )
+    with use_span(root):
+        response = await call_next(request)
+        if root is not None:
+            route = request.scope.get("route")
+            if isinstance(route, APIRoute):
+                root.name = f"{request.method} {route.path}"
+                root.set("http.route", route.path)
+            root.set("http.response.status_code", response.status_code)
+            if response.status_code >= 500:
+                root.record_error(f"HTTP {response.status_code}")
+            response.headers["X-Trace-Id"] = root.trace_id
+    return response
+
+
+def _trace_endpoint(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    # Routes are copied with their endpoint when their router is included in the app
+    if getattr(endpoint, "_traced", False):
+        return endpoint
+    name = f"handler {endpoint.__name__}"
+    traced: Callable[..., Any]
+    if inspect.iscoroutinefunction(endpoint):
+
+        @functools.wraps(endpoint)
+        async def traced_async(*args: Any, **kwargs: Any) -> Any:
+            with span(name):
+                return await endpoint(*args, **kwargs)
+
+        traced = traced_async
+    else:
+
+        @functools.wraps(endpoint)
+        def traced_sync(*args: Any, **kwargs: Any) -> Any:
+            with span(name):
+                return endpoint(*args, **kwargs)
+
+        traced = traced_sync
+    setattr(traced, "_traced", True)
+    return traced
+
+
+class TracedRoute(APIRoute):
+    """
+    Route running its endpoint in a span, so that the time spent in the handler is told apart
+    from the dependencies, validation and serialization around it.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        super().__init__(path, _trace_endpoint(endpoint), **kwargs)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Trace the SQL statements run by an engine."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        db_span = start_span(
+            f"db {statement.split(None, 1)[0].upper() if statement else 'query'}",
+            SpanKind.CLIENT,
+            **{"db.system": "postgresql", "db.query.text": statement[:MAX_STATEMENT_LENGTH]},
+        )
+        if db_span is not None and context is not None:
+            context._tracing_span = db_span
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        db_span = getattr(context, "_tracing_span", None)
+        if db_span is not None:
+            if cursor.rowcount >= 0:
+                db_span.set("db.response.returned_rows", cursor.rowcount)
+            db_span.end()
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        db_span = getattr(exception_context.execution_context, "_tracing_span", None)
+        if db_span is not None:
+            db_span.record_error(exception_context.original_exception)
+            db_span.end()
+
+
+def http_trace_config() -> aiohttp.TraceConfig:
+    """Trace the outbound requests of an aiohttp session, and pass the trace context along."""
+    trace_config = aiohttp.TraceConfig()
+
+    async def on_request_start(_session, trace_context, params: aiohttp.TraceRequestStartParams):
+        http_span = start_span(
+            f"HTTP {params.method} {params.url.host}",
+            SpanKind.CLIENT,
+            **{
+                "http.request.method": params.method,
+                "server.address": params.url.host,
+                "url.path": params.url.path,
+            },
+        )
+        trace_context.span = http_span
+        if http_span is not None:
+            params.headers["traceparent"] = http_span.traceparent
+
+    async def on_request_end(_session, trace_context, params: aiohttp.TraceRequestEndParams):
+        http_span = trace_context.span
+        if http_span is not None:
+            http_span.set("http.response.status_code", params.response.status)
+            if params.response.status >= 500:
+                http_span.record_error(f"HTTP {params.response.status}")
+            http_span.end()
+
+    async def on_request_exception(
+        _session, trace_context, params: aiohttp.TraceRequestExceptionParams
+    ):
+        http_span = trace_context.span
+        if http_span is not None:
+            http_span.record_error(params.exception)
+            http_span.end()
+
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_request_exception.append(on_request_exception)
+    return trace_config
@@ -0,0 +1,82 @@
+import os
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, Callable
+
+import pytest
+
+# Set before src.config is imported, so that the tests never reach a real database or service.
+# Tests needing Postgres run against TEST_DATABASE_URL, a disposable database they wipe.
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL") or "sqlite://"
+os.environ["DATABASE_DIRECT_URL"] = ""
+os.environ["DATABASE_REPLICA_URLS"] = ""
+os.environ.setdefault("JWT_SECRET", "test-secret")
+os.environ.setdefault("JWT_ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from aiohttp import web  # noqa: E402
+from aiohttp.test_utils import TestServer  # noqa: E402
+from alembic import command  # noqa: E402
+from alembic.config import Config as AlembicConfig  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+
+from src.config import config  # noqa: E402
+from src.models.base import Base, init_db  # noqa: E402
+from src.utils.http import http_client  # noqa: E402
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+
+@pytest.fixture(scope="session")
+def migrated_database():
+    if not os.getenv("TEST_DATABASE_URL"):
+        pytest.skip("TEST_DATABASE_URL isn't set")
+    engine = init_db()
+    with engine.begin() as connection:
+        connection.execute(text("DROP SCHEMA public CASCADE"))
+        connection.execute(text("CREATE SCHEMA public"))
+    alembic_config = AlembicConfig(str(BACKEND_DIR / "alembic.ini"))
+    alembic_config.set_main_option("script_location", str(BACKEND_DIR / "alembic"))
+    command.upgrade(alembic_config, "head")
+    return engine
+
+
+@pytest.fixture
+def database(migrated_database):
+    """The migrated test database, emptied after each test."""
+    yield migrated_database
+    tables = ", ".join(table.name for table in Base.metadata.sorted_tables)
+    with migrated_database.begin() as connection:
+        connection.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
+
+
+@pytest.fixture
+def json_rpc(monkeypatch):
+    """
+    Serve ETHEREUM_RPC_URL locally, within the event loop of the test.
+
+    The server answers each request body with the given function, and records the bodies.
+    """
+
+    @asynccontextmanager
+    async def serve(answer: Callable[[Any], Any]):
+        bodies = []
+
+        async def handle(request: web.Request) -> web.Response:
+            body = await request.json()
+            bodies.append(body)
+            return web.json_response(answer(body))
+
+        app = web.Application()
+        app.router.add_post("/", handle)
+        server = TestServer(app)
+        await server.start_server()
+        monkeypatch.setattr(config, "ETHEREUM_RPC_URL", str(server.make_url("/")))
+        try:
+            yield bodies
+        finally:
+            # The shared session is bound to the event loop of the test
+            await http_client.close()
+            await server.close()
+
+    return serve
@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+from eth_abi import encode
+
+from src.config import config
+from src.utils.eth_rpc import EthCall, encode_call, eth_call_batch
+
+CALLS = [
+    EthCall(
+        to=f"0x{index:040x}",
+        signature="balanceOf(address)",
+        args=(f"0x{index:040x}",),
+        output_types=("uint256",),
+    )
+    for index in range(5)
+]
+
+
+def balance_result(call: EthCall) -> str:
+    return "0x" + encode(["uint256"], [int(call.to, 16) * 100]).hex()
+
+
+def reversed_batch(answer_call):
+    """Answer each call of a batch with a function of its calldata, in reverse order."""
+
+    def answer(body: list[dict]) -> list[dict]:
+        return [
+            {"jsonrpc": "2.0", "id": item["id"], **answer_call(item)} for item in reversed(body)
+        ]
+
+    return answer
+
+
+def by_calldata(responses: dict[str, dict]):
+    return lambda item: responses[item["params"][0]["data"]]
+
+
+def test_outputs_follow_the_order_of_the_calls(json_rpc, monkeypatch):
+    monkeypatch.setattr(config, "ETHEREUM_RPC_BATCH_SIZE", 2)
+    responses = {encode_call(call): {"result": balance_result(call)} for call in CALLS}
+
+    async def scenario():
+        async with json_rpc(reversed_batch(by_calldata(responses))) as bodies:
+            return await eth_call_batch(CALLS), bodies
+
+    outputs, bodies = asyncio.run(scenario())
+
+    assert outputs == [(index * 100,) for index in range(5)]
+    assert [len(body) for body in bodies] == [2, 2, 1]
+
+
+def test_failed_calls_are_none(json_rpc):
+    responses = {encode_call(call): {"result": balance_result(call)} for call in CALLS}
+    responses[encode_call(CALLS[1])] = {"error": {"code": 3, "message": "execution reverted"}}
+    responses[encode_call(CALLS[3])] = {"result": "0x"}
+
+    async def scenario():
+        async with json_rpc(reversed_batch(by_calldata(responses))):
+            return await eth_call_batch(CALLS)
+
+    assert asyncio.run(scenario()) == [(0,), None, (200,), None, (400,)]
+
+
+def test_calls_missing_from_the_response_are_none(json_rpc):
+    def answer(body: list[dict]) -> list[dict]:
+        return [{"jsonrpc": "2.0", "id": 0, "result": balance_result(CALLS[0])}]
+
+    async def scenario():
+        async with json_rpc(answer):
+            return await eth_call_batch(CALLS[:2])
+
+    assert asyncio.run(scenario()) == [(0,), None]
+
+
+def test_endpoints_without_batches_are_an_error(json_rpc):
+    def answer(body: list[dict]) -> dict:
+        return {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "Invalid"}}
+
+    async def scenario():
+        async with json_rpc(answer):
+            await eth_call_batch(CALLS)
+
+    with pytest.raises(Exception, match="Invalid JSON-RPC batch response"):
+        asyncio.run(scenario())
+
+
+def test_an_rpc_url_is_required(monkeypatch):
+    monkeypatch.setattr(config, "ETHEREUM_RPC_URL", None)
+
+    with pytest.raises(Exception, match="ETHEREUM_RPC_URL is not set"):
+        asyncio.run(eth_call_batch(CALLS))
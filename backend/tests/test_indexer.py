@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+from src.models.base import SessionLocal
+from src.models.indexer_checkpoint import IndexerCheckpoint
+from src.services.indexer import PaymentIndexer
+from src.services.transaction import transaction_service
+from src.services.user import user_service
+
+
+def payment_event(transaction_hash: str, block_number: int, amount: int = 1_000_000) -> dict:
+    return {
+        "event": {
+            "name": "PaymentCompleted",
+            "inputs": [
+                {"name": "sender", "value": "0xa"},
+                {"name": "receiver", "value": "0xb"},
+                {"name": "amount", "value": str(amount)},
+                {"name": "timestamp", "value": "1700000000"},
+            ],
+        },
+        "transaction": {"txHash": transaction_hash, "blockNumber": block_number},
+    }
+
+
+class FakeEvents:
+    """The Curvegrid events of the payment contract, paged by offset."""
+
+    def __init__(self, events: list[dict]):
+        self.events = events
+        self.offsets: list[int] = []
+        self.fail_at: int | None = None
+
+    async def __call__(self, contract_label: str, event_signature: str, limit: int, offset: int):
+        self.offsets.append(offset)
+        if offset == self.fail_at:
+            raise Exception("Failed to list events: 502")
+        return self.events[offset : offset + limit]
+
+
+def recorded_hashes() -> set[str]:
+    transactions = asyncio.run(transaction_service.get_user_transactions("0xa"))
+    return {transaction.transaction_hash for transaction in transactions}
+
+
+def checkpoint(name: str) -> IndexerCheckpoint:
+    with SessionLocal() as db:
+        return db.get(IndexerCheckpoint, name)
+
+
+@pytest.fixture
+def users(database):
+    asyncio.run(user_service.create_user("0xa", "alice"))
+    asyncio.run(user_service.create_user("0xb", "bobby"))
+
+
+def test_missing_payments_are_inserted(users):
+    asyncio.run(transaction_service.create_transaction("0xa", "0xb", 1_000_000, "p2p", "0xh0"))
+    fetch_events = FakeEvents([payment_event(f"0xh{i}", 100 + i) for i in range(7)])
+
+    report = asyncio.run(PaymentIndexer(fetch_events=fetch_events, batch_size=3).run())
+
+    assert (report.fetched, report.missing, report.created, report.last_block) == (7, 6, 6, 106)
+    assert recorded_hashes() == {f"0xh{i}" for i in range(7)}
+    assert fetch_events.offsets == [0, 3, 6]
+
+
+def test_a_duplicate_hash_is_recorded_once(users):
+    events = [payment_event("0xh0", 100), payment_event("0xh1", 101), payment_event("0xh0", 102)]
+    fetch_events = FakeEvents(events)
+
+    report = asyncio.run(PaymentIndexer(fetch_events=fetch_events, batch_size=2).run())
+
+    assert (report.fetched, report.created) == (3, 2)
+    assert recorded_hashes() == {"0xh0", "0xh1"}
+
+
+def test_runs_resume_from_the_checkpoint(users):
+    fetch_events = FakeEvents([payment_event(f"0xh{i}", 100 + i) for i in range(5)])
+    indexer = PaymentIndexer(fetch_events=fetch_events, batch_size=2)
+
+    asyncio.run(indexer.run())
+    assert (checkpoint(indexer.name).event_offset, checkpoint(indexer.name).last_block) == (5, 104)
+
+    fetch_events.offsets.clear()
+    fetch_events.events.append(payment_event("0xh5", 105))
+    report = asyncio.run(indexer.run())
+
+    assert fetch_events.offsets == [5]
+    assert (report.fetched, report.created, report.last_block) == (1, 1, 105)
+
+
+def test_an_interrupted_run_keeps_its_completed_batches(users):
+    fetch_events = FakeEvents([payment_event(f"0xh{i}", 100 + i) for i in range(6)])
+    fetch_events.fail_at = 4
+    indexer = PaymentIndexer(fetch_events=fetch_events, batch_size=2)
+
+    with pytest.raises(Exception, match="502"):
+        asyncio.run(indexer.run())
+    assert checkpoint(indexer.name).event_offset == 4
+    assert recorded_hashes() == {f"0xh{i}" for i in range(4)}
+
+    fetch_events.fail_at = None
+    fetch_events.offsets.clear()
+    report = asyncio.run(indexer.run())
+
+    # The last batch is full, the run ends on an empty page
+    assert fetch_events.offsets == [4, 6]
+    assert (report.fetched, report.created) == (2, 2)
+    assert recorded_hashes() == {f"0xh{i}" for i in range(6)}
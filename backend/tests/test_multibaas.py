@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+from eth_abi import encode
+
+from src.config import config
+from src.services.multibaas import multibaas_service
+from src.utils.ens import namehash
+
+REGISTRY_ADDRESS = "0x" + "e" * 40
+
+
+def text_result(record: str) -> dict:
+    return {"result": "0x" + encode(["string"], [record]).hex()}
+
+
+@pytest.fixture(autouse=True)
+def rpc_backend(monkeypatch):
+    monkeypatch.setattr(config, "ENS_READ_BACKEND", "rpc")
+    monkeypatch.setattr(config, "ENS_REGISTRY_CONTRACT_ADDRESS", REGISTRY_ADDRESS)
+
+
+def avatar_records(records: dict[str, dict]):
+    """Answer the text(node, "avatar") calls of a batch by name, in reverse order."""
+    by_node = {namehash(ens)[2:]: response for ens, response in records.items()}
+
+    def answer(body: list[dict]) -> list[dict]:
+        responses = []
+        for item in reversed(body):
+            call = item["params"][0]
+            assert call["to"] == REGISTRY_ADDRESS
+            # The node is the first argument, after the 4 bytes selector
+            node = call["data"][10:74]
+            responses.append({"jsonrpc": "2.0", "id": item["id"], **by_node[node]})
+        return responses
+
+    return answer
+
+
+def test_avatars_are_read_in_a_single_batch(json_rpc):
+    records = {
+        "alice.solva.eth": text_result("ipfs://alice"),
+        "bobby.solva.eth": text_result(""),
+        "carol.solva.eth": {"error": {"code": 3, "message": "execution reverted"}},
+        "david.solva.eth": text_result("https://example.com/david.png"),
+    }
+
+    async def scenario():
+        async with json_rpc(avatar_records(records)) as bodies:
+            return await multibaas_service.get_ens_avatars(list(records)), bodies
+
+    avatars, bodies = asyncio.run(scenario())
+
+    assert avatars == [
+        "ipfs://alice",
+        "https://avatars.jakerunzer.com/bobby.solva.eth",
+        "",
+        "https://example.com/david.png",
+    ]
+    assert len(bodies) == 1
+
+
+def test_avatars_are_empty_when_the_endpoint_fails(json_rpc):
+    def answer(body: list[dict]) -> dict:
+        return {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "Invalid"}}
+
+    async def scenario():
+        async with json_rpc(answer):
+            return await multibaas_service.get_ens_avatars(["alice.solva.eth", "bobby.solva.eth"])
+
+    assert asyncio.run(scenario()) == ["", ""]
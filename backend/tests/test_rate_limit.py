@@ -0,0 +1,47 @@
+import asyncio
+
+from fastapi import Request
+
+from src.services.rate_limit import RateLimiter
+
+
+def request(path: str, method: str = "GET") -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": method,
+            "path": path,
+            "query_string": b"",
+            "headers": [],
+            "client": ("203.0.113.7", 50000),
+        }
+    )
+
+
+def statuses(limiter: RateLimiter, path: str, count: int, method: str = "GET") -> list[int]:
+    async def send() -> list[int]:
+        responses = [await limiter.check(request(path, method)) for _ in range(count)]
+        return [200 if response is None else response.status_code for response in responses]
+
+    return asyncio.run(send())
+
+
+def test_polling_a_registration_keeps_the_default_limits():
+    limiter = RateLimiter()
+    statuses(limiter, "/auth/register", 1, "POST")
+
+    # Every 2 seconds for a minute, more than the 10 registrations allowed per minute
+    assert set(statuses(limiter, "/auth/register/status/4f0c2d1e", 30)) == {200}
+
+
+def test_registrations_have_a_stricter_limit():
+    limiter = RateLimiter()
+
+    assert statuses(limiter, "/auth/register", 11, "POST") == [200] * 10 + [429]
+
+
+def test_prefix_rules_cover_the_paths_under_them():
+    limiter = RateLimiter()
+    statuses(limiter, "/auth/available-ens/alice", 30)
+
+    assert statuses(limiter, "/auth/available-ens/bobby", 31) == [200] * 30 + [429]
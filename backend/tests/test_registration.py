@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+from sqlalchemy import text
+
+from src.models.base import SessionLocal
+from src.models.registration_job import RegistrationJob
+from src.services.multibaas import multibaas_service
+from src.services.registration import RegistrationService, RegistrationUserError
+from src.services.user import user_service
+
+
+@pytest.fixture
+def names(database, monkeypatch):
+    """The ENS subnames registered on-chain, by name."""
+    owners: dict[str, str] = {}
+
+    async def is_ens_subname_available(username: str) -> bool:
+        return username not in owners
+
+    async def register_ens_subname(username: str, address: str) -> bool:
+        owners[username] = address
+        return True
+
+    async def get_ens_owner(ens_name: str) -> str | None:
+        return None
+
+    monkeypatch.setattr(multibaas_service, "is_ens_subname_available", is_ens_subname_available)
+    monkeypatch.setattr(multibaas_service, "register_ens_subname", register_ens_subname)
+    monkeypatch.setattr(multibaas_service, "get_ens_owner", get_ens_owner)
+    return owners
+
+
+def job(job_id: str) -> RegistrationJob:
+    with SessionLocal() as db:
+        return db.get(RegistrationJob, job_id)
+
+
+def test_a_registration_creates_the_user(names):
+    registrations = RegistrationService()
+    pending = asyncio.run(registrations.enqueue("0xa", "alice"))
+
+    assert asyncio.run(registrations.process_next())
+
+    assert (job(pending.id).status, job(pending.id).leased_until) == ("completed", None)
+    assert names == {"alice": "0xa"}
+    assert asyncio.run(user_service.get_user_by_address("0xa")).username == "alice"
+
+
+def test_a_failed_user_insert_is_retried_once_the_lease_expires(names):
+    registrations = RegistrationService()
+    pending = asyncio.run(registrations.enqueue("0xa", "alice"))
+    # Taken in the database only, the insert of the user fails
+    asyncio.run(user_service.create_user("0xb", "alice"))
+
+    with pytest.raises(RegistrationUserError):
+        asyncio.run(registrations.process_next())
+    assert job(pending.id).status == "pending"
+    assert names == {"alice": "0xa"}
+    # Leased, not retried before its lease expires
+    assert not asyncio.run(registrations.process_next())
+
+    with SessionLocal() as db:
+        db.execute(text("DELETE FROM users WHERE address = '0xb'"))
+        db.execute(text("UPDATE registration_jobs SET leased_until = now() - interval '1 second'"))
+        db.commit()
+    assert asyncio.run(registrations.process_next())
+
+    assert job(pending.id).status == "completed"
+    assert asyncio.run(user_service.get_user_by_address("0xa")).username == "alice"
@@ -0,0 +1,135 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import Request, Response
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+
+from src.main import PRIMARY_COOKIE, unit_of_work
+from src.models.base import Replica, SessionLocal, get_session, mark_written, replica_set
+from src.models.user import User
+from src.services.user import user_service
+
+
+@pytest.fixture
+def primary():
+    engine = create_engine("sqlite://")
+    previous = SessionLocal.kw.get("bind")
+    SessionLocal.configure(bind=engine)
+    yield engine
+    SessionLocal.configure(bind=previous)
+    engine.dispose()
+
+
+@pytest.fixture
+def replicas(primary):
+    replica_set.replicas = [Replica("sqlite://"), Replica("sqlite://")]
+    for replica in replica_set.replicas:
+        replica.healthy = True
+    yield replica_set.replicas
+    replica_set.dispose()
+
+
+def read_engine():
+    with get_session(read_only=True) as db:
+        return db.get_bind()
+
+
+def test_reads_are_spread_over_the_healthy_replicas(replicas):
+    engines = [read_engine() for _ in range(4)]
+
+    assert engines == [replica.engine for replica in replicas] * 2
+
+
+def test_unhealthy_replicas_are_skipped(replicas):
+    replicas[0].healthy = False
+
+    assert {read_engine() for _ in range(3)} == {replicas[1].engine}
+
+
+def test_failed_replica_reads_fall_back_to_the_primary(primary, replicas):
+    for replica in replicas:
+        with pytest.raises(OperationalError):
+            with get_session(read_only=True):
+                raise OperationalError("SELECT 1", {}, Exception("connection refused"))
+
+    assert [replica.healthy for replica in replicas] == [False, False]
+    assert read_engine() is primary
+
+
+def test_writes_go_to_the_primary(primary, replicas):
+    with get_session() as db:
+        assert db.get_bind() is primary
+
+
+def test_users_read_from_a_replica_are_not_cached(tmp_path, primary, replicas):
+    replica = Replica(f"sqlite:///{tmp_path / 'replica.db'}")
+    replica.healthy = True
+    replicas[:] = [replica]
+    for engine in (primary, replica.engine):
+        User.__table__.create(engine)
+    # Deleted on the primary, and not replicated yet
+    with SessionLocal(bind=replica.engine) as db:
+        db.add(User(address="0xa", username="alice"))
+        db.commit()
+
+    with user_service.request_cache() as cache:
+        users = asyncio.run(user_service.get_users_by_addresses(["0xa"], read_only=True))
+        assert set(users) == {"0xa"}
+        assert cache.by_address == {}
+        assert asyncio.run(user_service.get_users_by_addresses(["0xa"])) == {}
+        assert cache.by_address == {"0xa": None}
+
+
+def request_with_cookies(cookies: dict[str, str]) -> Request:
+    cookie_header = "; ".join(f"{key}={value}" for key, value in cookies.items())
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/",
+            "query_string": b"",
+            "headers": [(b"cookie", cookie_header.encode())] if cookies else [],
+        }
+    )
+
+
+def handle(request: Request, write: bool = False) -> tuple[Response, list]:
+    engines = []
+
+    async def call_next(_request: Request) -> Response:
+        engines.append(read_engine())
+        if write:
+            mark_written()
+        return Response()
+
+    return asyncio.run(unit_of_work(request, call_next)), engines
+
+
+def test_a_write_makes_the_client_read_from_the_primary(replicas):
+    response, _ = handle(request_with_cookies({}), write=True)
+
+    cookie = response.headers["set-cookie"]
+    assert cookie.startswith(f"{PRIMARY_COOKIE}=")
+    until = float(cookie.split(";")[0].split("=")[1])
+    assert time.time() < until
+
+
+def test_reads_without_a_write_set_no_cookie(replicas):
+    response, engines = handle(request_with_cookies({}))
+
+    assert "set-cookie" not in response.headers
+    assert engines[0] in {replica.engine for replica in replicas}
+
+
+def test_the_cookie_sends_reads_to_the_primary(primary, replicas):
+    _, engines = handle(request_with_cookies({PRIMARY_COOKIE: str(int(time.time()) + 10)}))
+
+    assert engines == [primary]
+
+
+def test_an_expired_cookie_reads_from_the_replicas(replicas):
+    _, engines = handle(request_with_cookies({PRIMARY_COOKIE: str(int(time.time()) - 1)}))
+
+    assert engines[0] in {replica.engine for replica in replicas}
@@ -1,7 +1,7 @@
 // This file is auto-generated by @hey-api/openapi-ts
 
 import { type Options as ClientOptions, type TDataShape, type Client, formDataBodySerializer } from '@hey-api/client-axios';
-import type { GetAuthMessageAuthMessagePostData, GetAuthMessageAuthMessagePostResponse, GetAuthMessageAuthMessagePostError, LoginWithWalletAuthLoginPostData, LoginWithWalletAuthLoginPostResponse, LoginWithWalletAuthLoginPostError, RegisterUserAuthRegisterPostData, RegisterUserAuthRegisterPostResponse, RegisterUserAuthRegisterPostError, CheckUsernameAuthAvailableEnsUsernameGetData, CheckUsernameAuthAvailableEnsUsernameGetResponse, CheckUsernameAuthAvailableEnsUsernameGetError, IsRegisteredAuthIsRegisteredGetData, IsRegisteredAuthIsRegisteredGetResponse, IsRegisteredAuthIsRegisteredGetError, GetAvatarUserAvatarGetData, GetAvatarUserAvatarGetResponse, GetAvatarUserAvatarGetError, ChangeAvatarUserAvatarPostData, ChangeAvatarUserAvatarPostResponse, ChangeAvatarUserAvatarPostError, GetUserTransactionsUserTransactionsGetData, GetUserTransactionsUserTransactionsGetResponse, GetUserTransactionsUserTransactionsGetError, SearchUsersUserSearchGetData, SearchUsersUserSearchGetResponse, SearchUsersUserSearchGetError, ThirdwebWebhookThirdwebWebhookPostData, ThirdwebWebhookThirdwebWebhookPostError } from './types.gen';
+import type { GetAuthMessageAuthMessagePostData, GetAuthMessageAuthMessagePostResponse, GetAuthMessageAuthMessagePostError, LoginWithWalletAuthLoginPostData, LoginWithWalletAuthLoginPostResponse, LoginWithWalletAuthLoginPostError, RegisterUserAuthRegisterPostData, RegisterUserAuthRegisterPostResponse, RegisterUserAuthRegisterPostError, GetRegistrationStatusAuthRegisterStatusJobIdGetData, GetRegistrationStatusAuthRegisterStatusJobIdGetResponse, GetRegistrationStatusAuthRegisterStatusJobIdGetError, CheckUsernameAuthAvailableEnsUsernameGetData, CheckUsernameAuthAvailableEnsUsernameGetResponse, CheckUsernameAuthAvailableEnsUsernameGetError, IsRegisteredAuthIsRegisteredGetData, IsRegisteredAuthIsRegisteredGetResponse, IsRegisteredAuthIsRegisteredGetError, GetAvatarUserAvatarGetData, GetAvatarUserAvatarGetResponse, GetAvatarUserAvatarGetError, ChangeAvatarUserAvatarPostData, ChangeAvatarUserAvatarPostResponse, ChangeAvatarUserAvatarPostError, GetUserTransactionsUserTransactionsGetData, GetUserTransactionsUserTransactionsGetResponse, GetUserTransactionsUserTransactionsGetError, SearchUsersUserSearchGetData, SearchUsersUserSearchGetResponse, SearchUsersUserSearchGetError, ThirdwebWebhookThirdwebWebhookPostData, ThirdwebWebhookThirdwebWebhookPostError } from './types.gen';
 import { client as _heyApiClient } from './client.gen';
 
 export type Options<TData extends TDataShape = TDataShape, ThrowOnError extends boolean = boolean> = ClientOptions<TData, ThrowOnError> & {
@@ -50,7 +50,7 @@ export const loginWithWalletAuthLoginPost = <ThrowOnError extends boolean = fals
 
 /**
  * Register User
- * Adds an ENS subname to a user and creates the user in the database
+ * Reserves the username and registers the ENS subname and the user in the background
  */
 export const registerUserAuthRegisterPost = <ThrowOnError extends boolean = false>(options: Options<RegisterUserAuthRegisterPostData, ThrowOnError>) => {
     return (options.client ?? _heyApiClient).post<RegisterUserAuthRegisterPostResponse, RegisterUserAuthRegisterPostError, ThrowOnError>({
@@ -63,6 +63,17 @@ export const registerUserAuthRegisterPost = <ThrowOnError extends boolean = fals
     });
 };
 
+/**
+ * Get Registration Status
+ * Get the progress of a registration started with /auth/register
+ */
+export const getRegistrationStatusAuthRegisterStatusJobIdGet = <ThrowOnError extends boolean = false>(options: Options<GetRegistrationStatusAuthRegisterStatusJobIdGetData, ThrowOnError>) => {
+    return (options.client ?? _heyApiClient).get<GetRegistrationStatusAuthRegisterStatusJobIdGetResponse, GetRegistrationStatusAuthRegisterStatusJobIdGetError, ThrowOnError>({
+        url: '/auth/register/status/{job_id}',
+        ...options
+    });
+};
+
 /**
  * Check Username
  */
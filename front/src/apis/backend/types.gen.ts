@@ -33,6 +33,17 @@ export type AuthRegisterRequest = {
 
 export type AuthRegisterResponse = {
     success: boolean;
+    job_id: string;
+    status: 'pending' | 'completed' | 'failed';
+};
+
+export type AuthRegisterStatusResponse = {
+    job_id: string;
+    username: string;
+    status: 'pending' | 'completed' | 'failed';
+    error?: string | null;
+    created_at: string;
+    updated_at: string;
 };
 
 export type BodyChangeAvatarUserAvatarPost = {
@@ -154,11 +165,38 @@ export type RegisterUserAuthRegisterPostResponses = {
     /**
      * Successful Response
      */
-    200: AuthRegisterResponse;
+    202: AuthRegisterResponse;
 };
 
 export type RegisterUserAuthRegisterPostResponse = RegisterUserAuthRegisterPostResponses[keyof RegisterUserAuthRegisterPostResponses];
 
+export type GetRegistrationStatusAuthRegisterStatusJobIdGetData = {
+    body?: never;
+    path: {
+        job_id: string;
+    };
+    query?: never;
+    url: '/auth/register/status/{job_id}';
+};
+
+export type GetRegistrationStatusAuthRegisterStatusJobIdGetErrors = {
+    /**
+     * Validation Error
+     */
+    422: HttpValidationError;
+};
+
+export type GetRegistrationStatusAuthRegisterStatusJobIdGetError = GetRegistrationStatusAuthRegisterStatusJobIdGetErrors[keyof GetRegistrationStatusAuthRegisterStatusJobIdGetErrors];
+
+export type GetRegistrationStatusAuthRegisterStatusJobIdGetResponses = {
+    /**
+     * Successful Response
+     */
+    200: AuthRegisterStatusResponse;
+};
+
+export type GetRegistrationStatusAuthRegisterStatusJobIdGetResponse = GetRegistrationStatusAuthRegisterStatusJobIdGetResponses[keyof GetRegistrationStatusAuthRegisterStatusJobIdGetResponses];
+
 export type CheckUsernameAuthAvailableEnsUsernameGetData = {
     body?: never;
     path: {
@@ -5,6 +5,7 @@ import {
 	changeAvatarUserAvatarPost,
 	getAuthMessageAuthMessagePost,
 	getAvatarUserAvatarGet,
+	getRegistrationStatusAuthRegisterStatusJobIdGet,
 	getUserTransactionsUserTransactionsGet,
 	isRegisteredAuthIsRegisteredGet,
 	loginWithWalletAuthLoginPost,
@@ -16,6 +17,10 @@ import { thirdwebClient } from "@/config/thirdweb.ts";
 import { polygon } from "thirdweb/chains";
 import { USDC_CONTRACT_ADDRESS } from "@/config/polygon.ts";
 
+// The registration runs in a background job, polled until it completes or fails
+const REGISTRATION_POLL_INTERVAL_MS = 2000;
+const REGISTRATION_POLL_ATTEMPTS = 90;
+
 type AccountStoreState = {
 	account: Account | null;
 	jwtToken: string | null;
@@ -262,8 +267,34 @@ export const useAccountStore = create<AccountStoreState>((set, get) => ({
 				},
 			});
 
-			if (response.data?.success) {
-				// Successfully registered
+			if (!response.data?.success) {
+				toast.error("Registration failed", {
+					description: "Could not register username",
+				});
+				return false;
+			}
+
+			// The registration was accepted, wait for the job to register the name
+			const jobId = response.data.job_id;
+			let status = response.data.status;
+			let error: string | null | undefined = null;
+			for (let attempt = 0; status === "pending" && attempt < REGISTRATION_POLL_ATTEMPTS; attempt++) {
+				await new Promise((resolve) => setTimeout(resolve, REGISTRATION_POLL_INTERVAL_MS));
+				const statusResponse = await getRegistrationStatusAuthRegisterStatusJobIdGet({
+					path: {
+						job_id: jobId,
+					},
+					headers: {
+						Authorization: `Bearer ${jwtToken}`,
+					},
+				});
+				if (statusResponse.data) {
+					status = statusResponse.data.status;
+					error = statusResponse.data.error;
+				}
+			}
+
+			if (status === "completed") {
 				set({
 					isRegistered: true,
 					username,
@@ -272,9 +303,14 @@ export const useAccountStore = create<AccountStoreState>((set, get) => ({
 					description: `Welcome, ${username}!`,
 				});
 				return true;
-			} else {
+			} else if (status === "failed") {
 				toast.error("Registration failed", {
-					description: "Could not register username",
+					description: error ?? "Could not register username",
+				});
+				return false;
+			} else {
+				toast.error("Registration is taking longer than expected", {
+					description: "Please check again in a few minutes",
 				});
 				return false;
 			}